@@ -0,0 +1,3 @@
+"""Mesures de performance de spyrken : générateurs de circuits paramétrés (generators),
+mesure des phases de calcul et comparaison à une référence (suite), temps d'import
+(import_time). Voir `python -m benchmarks --help`."""
@@ -0,0 +1,121 @@
+"""Circuits paramétrés pour les mesures de performance.
+
+Chaque générateur construit un circuit d'environ `n` nœuds avec l'API publique
+(add_node, connect, add_component), comme le ferait un utilisateur, et retourne
+(circuit, sonde) où la sonde est la paire (from_node, to_node) mesurée par les balayages.
+"""
+import numpy as np
+
+from spyrken import Capacitor, Circuit, Inductor, Resistor, VoltageSource
+
+
+def rc_ladder(n, freq=1000):
+    """Échelle RC : n cellules série R, parallèle C, attaquée par une source AC"""
+    circuit = Circuit()
+    gnd = circuit.add_node("gnd", ground=True)
+    prev = circuit.add_node("in")
+    source = VoltageSource(1, freq, name="V")
+    source.connect(gnd, prev)
+    components = [source]
+    for k in range(n - 1):
+        node = circuit.add_node(f"n{k}")
+        r, c = Resistor(100, f"R{k}"), Capacitor(1e-7, f"C{k}")
+        r.connect(prev, node)
+        c.connect(node, gnd)
+        components += [r, c]
+        prev = node
+    circuit.add_component(components)
+    return circuit, (gnd, prev)
+
+
+def resistor_grid(n, freq=1000):
+    """Grille 2-D de résistances (côté √n), chaque nœud découplé à la masse par un
+    condensateur, source dans un coin"""
+    side = max(int(round(np.sqrt(n))), 2)
+    circuit = Circuit()
+    gnd = circuit.add_node("gnd", ground=True)
+    grid = [[circuit.add_node(f"n{i}_{j}") for j in range(side)] for i in range(side)]
+    source = VoltageSource(1, freq, internal_resistance=1, name="V")
+    source.connect(gnd, grid[0][0])
+    components = [source]
+    for i in range(side):
+        for j in range(side):
+            if i + 1 < side:
+                r = Resistor(10, f"Rv{i}_{j}")
+                r.connect(grid[i][j], grid[i + 1][j])
+                components.append(r)
+            if j + 1 < side:
+                r = Resistor(10, f"Rh{i}_{j}")
+                r.connect(grid[i][j], grid[i][j + 1])
+                components.append(r)
+            c = Capacitor(1e-9, f"C{i}_{j}")
+            c.connect(grid[i][j], gnd)
+            components.append(c)
+    circuit.add_component(components)
+    return circuit, (gnd, grid[-1][-1])
+
+
+def random_rlc(n, degree=3, window=20, freq=1000, seed=0):
+    """Graphe RLC creux aléatoire : arbre couvrant (connexité) plus des branches en
+    surplus jusqu'à un degré moyen `degree` ; types et valeurs tirés au hasard.
+    Chaque branche relie deux nœuds distants d'au plus `window` rangs, comme sur un
+    circuit réel : un graphe aléatoire sans localité se remplit presque entièrement à
+    la factorisation et ne mesure plus que ce remplissage."""
+    rng = np.random.default_rng(seed)
+    circuit = Circuit()
+    gnd = circuit.add_node("gnd", ground=True)
+    nodes = [gnd] + [circuit.add_node(f"n{k}") for k in range(n - 1)]
+    tree = [(k, k - int(rng.integers(1, min(k, window) + 1))) for k in range(1, n)]
+    count = max(n * degree // 2 - (n - 1), 0)
+    starts = rng.integers(0, n, size=count)
+    ends = np.minimum(starts + rng.integers(1, window + 1, size=count), n - 1)
+    edges = tree + [(int(a), int(b)) for a, b in zip(starts, ends) if a != b]
+    kinds = rng.choice(3, size=len(edges), p=[0.6, 0.2, 0.2])
+    scales = 10 ** rng.uniform(-1, 1, size=len(edges))
+    source = VoltageSource(1, freq, internal_resistance=1, name="V")
+    source.connect(gnd, nodes[1])
+    components = [source]
+    for k, ((a, b), kind, scale) in enumerate(zip(edges, kinds, scales)):
+        if kind == 0:
+            component = Resistor(100 * scale, f"R{k}")
+        elif kind == 1:
+            component = Capacitor(1e-7 * scale, f"C{k}")
+        else:
+            component = Inductor(1e-3 * scale, f"L{k}")
+        component.connect(nodes[a], nodes[b])
+        components.append(component)
+    circuit.add_component(components)
+    return circuit, (gnd, nodes[-1])
+
+
+def multi_source(n, sources=None, freq=1000):
+    """Réseau résistif en échelle alimenté par plusieurs sources de même fréquence
+    (une sur deux idéale), réparties régulièrement le long de l'échelle"""
+    sources = sources or max(2, n // 100)
+    circuit = Circuit()
+    gnd = circuit.add_node("gnd", ground=True)
+    nodes = [circuit.add_node(f"n{k}") for k in range(n - 1)]
+    components = []
+    for k in range(len(nodes)):
+        shunt = Resistor(1e3, f"Rs{k}")
+        shunt.connect(nodes[k], gnd)
+        components.append(shunt)
+        if k:
+            series = Resistor(10, f"R{k}")
+            series.connect(nodes[k - 1], nodes[k])
+            components.append(series)
+    for k, position in enumerate(np.linspace(0, len(nodes) - 1, sources).astype(int)):
+        source = VoltageSource(1 + 0.1 * k, freq, internal_resistance=0 if k % 2 == 0 else 5,
+                               name=f"V{k}")
+        source.connect(gnd, nodes[position])
+        components.append(source)
+    circuit.add_component(components)
+    return circuit, (gnd, nodes[len(nodes) // 2])
+
+
+GENERATORS = {
+    "rc_ladder": rc_ladder,
+    "resistor_grid": resistor_grid,
+    "random_rlc": random_rlc,
+    "multi_source": multi_source,
+}
@@ -0,0 +1,89 @@
+"""Temps d'import de spyrken, mesuré dans des interpréteurs neufs.
+
+Le budget porte sur le temps total de `import spyrken` à froid, NumPy compris : c'est
+celui que paie chaque processus (script, processus de calcul sans affichage). Le temps
+propre, hors NumPy, est affiché à titre indicatif. Le script échoue (code 1) si le
+budget est dépassé, ou si l'import charge matplotlib (réservé aux fonctions de tracé)
+ou SciPy (importé par le solveur au premier usage).
+
+    python benchmarks/import_time.py [--budget 0.25] [--repeat 5] [--detail]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEPENDENCIES = "import numpy"
+
+MEASURE = """
+import sys, time
+%s
+start = time.perf_counter()
+import spyrken
+print(time.perf_counter() - start, 'matplotlib' in sys.modules, 'scipy' in sys.modules)
+"""
+
+
+def _run(code, *flags):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    return subprocess.run([sys.executable, *flags, "-c", code], env=env, check=True,
+                          capture_output=True, text=True)
+
+
+def measure(repeat=5):
+    """(temps total, temps propre, matplotlib chargé, SciPy chargé) : meilleurs temps sur
+    `repeat` essais"""
+    total = own = float("inf")
+    matplotlib = scipy = False
+    for _ in range(repeat):
+        seconds, plotting, solver = _run(MEASURE % "").stdout.split()
+        total = min(total, float(seconds))
+        matplotlib = matplotlib or plotting == "True"
+        scipy = scipy or solver == "True"
+        seconds = _run(MEASURE % DEPENDENCIES).stdout.split()[0]
+        own = min(own, float(seconds))
+    return total, own, matplotlib, scipy
+
+
+def detail(count=15):
+    """Modules les plus coûteux (temps cumulé, -X importtime)"""
+    rows = []
+    for line in _run("import spyrken", "-X", "importtime").stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]), parts[2].rstrip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget", type=float, default=0.25,
+                        help="temps total maximal de l'import à froid, en secondes")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--detail", action="store_true", help="affiche les modules les plus coûteux")
+    args = parser.parse_args(argv)
+
+    total, own, matplotlib, scipy = measure(args.repeat)
+    print(f"import spyrken: {total * 1e3:.1f} ms, dont {own * 1e3:.1f} ms hors NumPy"
+          f" (budget {args.budget * 1e3:.0f} ms)")
+    if args.detail:
+        for microseconds, module in detail():
+            print(f"  {microseconds / 1e3:8.1f} ms {module}")
+
+    failed = False
+    if matplotlib:
+        print("Erreur: import spyrken charge matplotlib")
+        failed = True
+    if scipy:
+        print("Erreur: import spyrken charge SciPy")
+        failed = True
+    if total > args.budget:
+        print("Erreur: budget de temps d'import dépassé")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""Mesure des phases de calcul pour chaque générateur et chaque taille, résultats en JSON.
+
+    python -m benchmarks [--sizes 10,100,1000,10000,100000] [--generators rc_ladder,...]
+                         [--output resultats.json] [--compare reference.json --threshold 0.25]
+
+Phases mesurées (meilleur temps sur `--repeat` constructions complètes) :
+    build     construction du circuit avec l'API publique
+    compile   compilation de la topologie (Circuit.compile)
+    assemble  admittances et matrice du système (dense ou creuse selon la taille)
+    factorize factorisation LU seule
+    solve     première résolution (factorisation comprise)
+    resolve   nouvelle résolution après changement d'une amplitude de source
+    sweep     réponse en fréquence sur `--freqs` points (Circuit.frequency_response)
+    transient simulation temporelle sur `TRANSIENT_STEPS` pas (Circuit.transient) ; une
+              simulation qui échoue ou diverge arrête la mesure
+
+Avec `--compare`, le script se termine avec le code 1 si une phase est plus lente que la
+référence de plus de `--threshold` (relatif) et de plus de `--min-delta` secondes.
+"""
+import argparse
+import datetime
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+
+from spyrken import VoltageSource
+from spyrken.solver import factorize, use_sparse
+
+from .generators import GENERATORS
+
+PHASES = ("build", "compile", "assemble", "factorize", "solve", "resolve", "sweep", "transient")
+TRANSIENT_STEPS = 50
+
+
+class _Timer:
+    """Meilleur temps de chaque phase sur plusieurs essais"""
+
+    def __init__(self):
+        self.best = {}
+
+    def __call__(self, phase, function, *args):
+        start = time.perf_counter()
+        result = function(*args)
+        elapsed = time.perf_counter() - start
+        self.best[phase] = min(self.best.get(phase, np.inf), elapsed)
+        return result
+
+
+def run_case(generator, n, repeat=3, freqs=20):
+    """Temps (s) de chaque phase pour le circuit `generator(n)`"""
+    timer = _Timer()
+    sweep = np.logspace(1, 6, freqs)
+    for _ in range(repeat):
+        circuit, probe = timer("build", generator, n)
+        compiled = timer("compile", circuit.compile)
+        if compiled is None:
+            raise RuntimeError(f"{generator.__name__}({n}) : compilation impossible")
+        freq = circuit._analysis_frequency()
+
+        def assemble():
+            y = compiled.admittances(freq, compiled.values())
+            if use_sparse(compiled.size, circuit.solver, circuit.sparse_threshold):
+                compiled.sparse_matrix(y)
+            else:
+                compiled.matrix(y)
+            return y
+
+        y = timer("assemble", assemble)
+        timer("factorize", factorize, compiled, y, circuit.solver, circuit.sparse_threshold,
+              circuit.ordering)
+        if not timer("solve", circuit.solve):
+            raise RuntimeError(f"{generator.__name__}({n}) : résolution impossible")
+        source = next(c for c in circuit.components if isinstance(c, VoltageSource))
+        source.source_voltage = 2 * source.source_voltage
+        timer("resolve", circuit.solve)
+        timer("sweep", circuit.frequency_response, sweep, probe)
+        result = timer("transient", circuit.transient, 1e-3, 1e-3 / TRANSIENT_STEPS, "trapezoidal", probe)
+        if result is None or not np.all(np.isfinite(result[1])):
+            raise RuntimeError(f"{generator.__name__}({n}) : simulation temporelle impossible")
+    return {phase: timer.best[phase] for phase in PHASES}
+
+
+def run_suite(generators, sizes, repeat=3, freqs=20, log=print):
+    results = {}
+    for name in generators:
+        results[name] = {}
+        for n in sizes:
+            # Une seule construction pour les grandes tailles : le temps reste raisonnable
+            times = run_case(GENERATORS[name], n, repeat if n <= 10000 else 1, freqs)
+            results[name][str(n)] = times
+            log(f"{name:>14} {n:>7} " + " ".join(f"{phase}={times[phase] * 1e3:.2f}ms"
+                                                  for phase in PHASES))
+    return {
+        "meta": {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "freqs": freqs,
+        },
+        "results": results,
+    }
+
+
+def compare(current, reference, threshold=0.25, min_delta=1e-3):
+    """Régressions (générateur, taille, phase, référence, actuel) : phases mesurées des deux
+    côtés et plus lentes de plus de `threshold` (relatif) et de `min_delta` secondes"""
+    regressions = []
+    for name, sizes in current["results"].items():
+        for n, times in sizes.items():
+            base = reference["results"].get(name, {}).get(n, {})
+            for phase, seconds in times.items():
+                old = base.get(phase)
+                if old is not None and seconds > old * (1 + threshold) and seconds - old > min_delta:
+                    regressions.append((name, n, phase, old, seconds))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mesures de performance de spyrken")
+    parser.add_argument("--sizes", default="10,100,1000,10000,100000",
+                        help="nombres de nœuds, séparés par des virgules")
+    parser.add_argument("--generators", default=",".join(GENERATORS),
+                        help=f"parmi {', '.join(GENERATORS)}")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--freqs", type=int, default=20, help="points du balayage en fréquence")
+    parser.add_argument("--output", help="fichier JSON des résultats")
+    parser.add_argument("--compare", help="fichier JSON de référence")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="ralentissement relatif toléré avant échec")
+    parser.add_argument("--min-delta", type=float, default=1e-3,
+                        help="écart absolu (s) en dessous duquel un ralentissement est ignoré")
+    args = parser.parse_args(argv)
+
+    generators = [name.strip() for name in args.generators.split(",") if name.strip()]
+    unknown = [name for name in generators if name not in GENERATORS]
+    if unknown:
+        parser.error(f"générateur(s) inconnu(s): {', '.join(unknown)}")
+    sizes = [int(float(size)) for size in args.sizes.split(",")]
+
+    current = run_suite(generators, sizes, args.repeat, args.freqs)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            reference = json.load(f)
+        regressions = compare(current, reference, args.threshold, args.min_delta)
+        for name, n, phase, old, seconds in regressions:
+            print(f"Régression: {name} n={n} {phase}: {old * 1e3:.2f} ms -> {seconds * 1e3:.2f} ms"
+                  f" (+{(seconds / old - 1) * 100:.0f}%)")
+        if regressions:
+            return 1
+        print("Aucune régression")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,11 +4,14 @@ from setuptools import setup, find_packages
 setup(
     name='spyrken',  
     version='0.1.7',         
-    packages=find_packages(),
+    packages=find_packages(include=["spyrken", "spyrken.*"]),
     install_requires=[       
         'numpy',
-        'matplotlib','tqdm',
+        'matplotlib',
     ],
+    extras_require={
+        'sparse': ['scipy'],
+    },
 
     author="DiegoDaddamio",
     author_email='diego.daddamio3110@gmail.com',
@@ -19,5 +22,5 @@ setup(
         'License :: OSI Approved :: MIT License',
         'Operating System :: OS Independent',
     ],
-    python_requires='>=3.6', # Version minimale de Python requise
+    python_requires='>=3.7', # Version minimale de Python requise (__getattr__ de module, PEP 562)
 )
@@ -1,7 +1,48 @@
 # electric_circuit_simulator/__init__.py
-from .components import Component, Resistor, Capacitor, Inductor, VoltageSource
+import importlib
+
+from .components import Component, Resistor, Capacitor, Inductor, VoltageSource, Switch
 from .circuit import Circuit, Node
-from .draw import *
+from .superposition import SuperpositionResult
+from .montecarlo import MonteCarloResult
+from .sweep import ParameterSweep
+from .statespace import PoleZeroModel, StateSpace
+from .reduction import ReducedModel
+from .solution import Solution
+from .sensitivity import SensitivityResult
+from .subcircuit import Subcircuit, SubcircuitInstance
+from .batch import plot_bode_batch, plot_scope_batch
+from .instrument import Instrumentation
+
+# Fonctions de tracé chargées à la première utilisation (PEP 562) : importer spyrken
+# n'importe pas matplotlib, ce qui garde rapides les processus de calcul et les scripts
+_LAZY = {
+    "voltage_phasors": ".draw",
+    "voltage_phasors2": ".draw",
+    "plot_bode": ".draw",
+    "scope": ".draw",
+}
+
+__all__ = [
+    "Component", "Resistor", "Capacitor", "Inductor", "VoltageSource", "Switch",
+    "Circuit", "Node", "SuperpositionResult", "MonteCarloResult", "ParameterSweep",
+    "PoleZeroModel", "StateSpace", "ReducedModel", "plot_bode_batch", "plot_scope_batch",
+    "Instrumentation", "Solution", "SensitivityResult", "Subcircuit", "SubcircuitInstance",
+] + list(_LAZY)
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value  # Les accès suivants ne passent plus par ici
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
+
 
 __version__ = "0.1.7"
 
@@ -0,0 +1,145 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .circuit import Circuit
+from .components import VoltageSource
+
+
+def _paths(paths, count):
+    """Chemins de sortie : liste, ou motif formaté avec l'indice ('bode_{:03d}.png')"""
+    if isinstance(paths, str):
+        return [paths.format(k) for k in range(count)]
+    paths = list(paths)
+    if len(paths) != count:
+        raise ValueError(f"{len(paths)} chemin(s) pour {count} élément(s)")
+    return paths
+
+
+def _probe(circuit, probe):
+    """Paire (from_node, to_node) de `circuit`, les nœuds pouvant être donnés par leur nom"""
+    if probe is None:
+        circuit._report(logging.ERROR, "missing_probe",
+                        "Erreur: Une sonde (from_node, to_node) est nécessaire pour tracer un circuit")
+        return None
+    names = {node.name: node for node in circuit.nodes}
+    pair = []
+    for node in probe:
+        if isinstance(node, str):
+            if node not in names:
+                circuit._report(logging.ERROR, "unknown_node", f"Erreur: Nœud {node} introuvable dans le circuit")
+                return None
+            node = names[node]
+        pair.append(node)
+    return tuple(pair)
+
+
+def _name(node):
+    return node if isinstance(node, str) else getattr(node, "name", "?")
+
+
+def _new_figure(figsize):
+    """Figure rendue par Agg, hors de pyplot : aucune fenêtre ni interface graphique"""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def render_bode(path, frequencies, H, title, show_phase, dpi):
+    """Tâche d'un processus : diagramme de Bode enregistré dans `path`"""
+    from .draw import _bode_figure
+    fig = _new_figure((10, 7) if show_phase else (10, 5))
+    _bode_figure(fig, frequencies, H, title, show_phase)
+    fig.savefig(path, dpi=dpi)
+    return path
+
+
+def render_scope(path, V, freq, reference, from_name, to_name, periods, points, dpi):
+    """Tâche d'un processus : oscillogramme enregistré dans `path`"""
+    from .draw import _scope_figure
+    fig = _new_figure((12, 6))
+    _scope_figure(fig, V, freq, reference, from_name, to_name, periods, points)
+    fig.savefig(path, dpi=dpi)
+    return path
+
+
+def run_batch(render, tasks, workers):
+    """Rend les tâches au fil de leur calcul : `tasks` est un générateur évalué dans ce
+    processus (résolution des circuits) pendant que le pool rend les figures déjà prêtes.
+    Une tâche None (élément en erreur) donne None dans la liste des chemins retournée."""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return [render(*task) if task is not None else None for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(render, *task) if task is not None else None for task in tasks]
+        return [future.result() if future is not None else None for future in futures]
+
+
+def _bode_tasks(items, paths, freqs, probe, show_phase, dpi):
+    for item, path in zip(items, paths):
+        if isinstance(item, Circuit):
+            pair = _probe(item, probe)
+            H = item.frequency_response(freqs, pair) if pair is not None else None
+            if H is None:
+                yield None
+                continue
+            title = f"Tension entre {pair[0].name} et {pair[1].name}"
+            yield path, np.asarray(freqs, dtype=float), H, title, show_phase, dpi
+        else:
+            frequencies, H = item[0], item[1]
+            title = item[2] if len(item) > 2 else "Réponse en fréquence"
+            yield path, np.asarray(frequencies, dtype=float), np.asarray(H), title, show_phase, dpi
+
+
+def plot_bode_batch(items, paths, freqs=None, probe=None, show_phase=True, workers=None, dpi=100):
+    """Diagrammes de Bode de nombreux circuits ou résultats, rendus sans affichage (Agg)
+    dans des fichiers par un pool de `workers` processus (tous les cœurs par défaut).
+
+    Chaque élément est un Circuit, dont la réponse est calculée sur `freqs` entre les
+    nœuds de `probe` (objets Node ou noms), ou un résultat (fréquences, H[, titre]).
+    `paths` est une liste de chemins ou un motif comme 'bode_{:03d}.png'. Les circuits
+    sont résolus dans ce processus pendant que les figures précédentes sont rendues.
+    Retourne la liste des chemins écrits (None pour un élément en erreur)."""
+    items = list(items)
+    tasks = _bode_tasks(items, _paths(paths, len(items)), freqs, probe, show_phase, dpi)
+    return run_batch(render_bode, tasks, workers)
+
+
+def _scope_tasks(items, paths, probe, periods, points, dpi):
+    for item, path in zip(items, paths):
+        if isinstance(item, Circuit):
+            pair = _probe(item, probe)
+            solution = item.solve(write_back=False) if pair is not None else False
+            if not solution:
+                yield None
+                continue
+            from_node, to_node = pair
+            V = ((solution.voltage(to_node) if to_node else 0)
+                 - (solution.voltage(from_node) if from_node else 0))
+            sources = [c for c in item.components if isinstance(c, VoltageSource)]
+            reference = (sources[0].source_voltage, sources[0].freq) if sources else None
+            yield (path, complex(V), item.freq, reference, _name(from_node), _name(to_node),
+                   periods, points, dpi)
+        else:
+            V, freq = item[0], item[1]
+            reference = item[2] if len(item) > 2 else None
+            names = probe if probe is not None else ("référence", "sonde")
+            yield (path, complex(V), freq, reference, _name(names[0]), _name(names[1]),
+                   periods, points, dpi)
+
+
+def plot_scope_batch(items, paths, probe=None, periods=3, points=1000, workers=None, dpi=100):
+    """Oscillogrammes statiques de nombreux circuits ou résultats, rendus sans affichage
+    dans des fichiers par un pool de processus, comme plot_bode_batch.
+
+    Chaque élément est un Circuit, résolu puis sondé entre les nœuds de `probe` (la
+    référence tracée est sa première source), ou un résultat (V, fréquence[, (amplitude
+    de référence, fréquence de référence)]) où V est le phaseur de la tension.
+    Retourne la liste des chemins écrits (None pour un élément en erreur)."""
+    items = list(items)
+    tasks = _scope_tasks(items, _paths(paths, len(items)), probe, periods, points, dpi)
+    return run_batch(render_scope, tasks, workers)
@@ -0,0 +1,40 @@
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Cache borné : les entrées les moins récemment utilisées sont évincées en premier"""
+    def __init__(self, maxsize=8):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def get(self, key, default=None):
+        """Retourne l'entrée associée à `key` et la marque comme récemment utilisée"""
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Ajoute ou remplace une entrée, en évinçant la plus ancienne si le cache est plein"""
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def __str__(self):
+        return f"LRUCache: {len(self._data)}/{self.maxsize} entrée(s), {self.hits} succès, {self.misses} échec(s)"
@@ -1,28 +1,66 @@
+import logging
+import time
+from collections.abc import MutableSequence
+
 import numpy as np
 from .components import *
+from .compiled import CompiledCircuit
+from .superposition import SuperpositionResult
+from .sweep import ParameterSweep
+from .transient import METHODS, run_transient
+from .montecarlo import DISTRIBUTIONS, run_monte_carlo
+from .netlist import read_netlist
+from .statespace import build_state_space
+from .reduction import prima
+from .store import ComponentStore
+from .cache import LRUCache
+from .solver import (SPARSE_THRESHOLD, IncrementalSolver, SingularMatrixError, SparseFactor,
+                     condition_estimate, factorize, use_sparse)
+from .instrument import Instrumentation, report
+from .solution import build_solution
+from .sensitivity import adjoint_sensitivities
 
 class Node:
     """Représente un nœud dans le circuit"""
     def __init__(self, name=None, ground=False):
         self.name = name if name else f"Node_{id(self)}"
-        self.components = []  # Composants connectés à ce nœud
         self.voltage = 0      # Potentiel du nœud
         self.current = 0
+        self._store = None    # Stockage des composants qui y sont connectés
         self.isG = ground
-        self.priority = 0     # Priorité du nœud (plus élevée pour ground)
-        
-        # Si c'est un nœud de référence, sa priorité est maximale
-        if ground:
-            self.priority = 1000
-    
+        # Priorité propre du nœud (maximale pour ground) ; chaque source connectée ajoute 100
+        self._priority = 1000 if ground else 0
+
+    @property
+    def isG(self):
+        """Nœud de masse"""
+        return self._isG
+
+    @isG.setter
+    def isG(self, ground):
+        self._isG = ground
+        if self._store is not None and self._store.owned:
+            self._store.version += 1  # Change la référence : le circuit doit être recompilé
+
+    @property
+    def components(self):
+        """Composants connectés à ce nœud"""
+        return [] if self._store is None else self._store.touching(self)
+
+    @property
+    def priority(self):
+        """Priorité du nœud (plus élevée pour ground et les nœuds reliés aux sources)"""
+        if self._store is None:
+            return self._priority
+        return self._priority + 100 * self._store.source_count(self)
+
+    @priority.setter
+    def priority(self, priority):
+        self._priority += priority - self.priority
+
     def connect(self, component):
-        """Connecte un composant à ce nœud"""
-        if component not in self.components:
-            self.components.append(component)
-            
-            # Si ce nœud est connecté à une source, augmenter sa priorité
-            if isinstance(component, VoltageSource):
-                self.priority += 100
+        """Enregistre le nœud auprès du composant ; la connexion est portée par Component.connect"""
+        component._store.node_id(self)
             
     def is_connected(self):
         """Vérifie si le nœud est connecté à au moins un composant"""
@@ -32,27 +70,163 @@ class Node:
         status = "GND" if self.isG else f"V={self.voltage}V"
         return f"{self.name}: {status}, {len(self.components)} élément(s) lié(s)"
     
+class NodeList(list):
+    """Liste des nœuds d'un circuit ; toute modification incrémente `version`, ce qui
+    suffit à détecter un changement de nœuds sans parcourir la liste"""
+    version = 0
+
+
+def _bump(method):
+    def changed(self, *args):
+        self.version += 1
+        return method(self, *args)
+    changed.__name__ = method.__name__
+    return changed
+
+
+for _name in ("append", "extend", "insert", "remove", "pop", "clear", "sort", "reverse",
+              "__setitem__", "__delitem__", "__iadd__", "__imul__"):
+    setattr(NodeList, _name, _bump(getattr(list, _name)))
+
+class ComponentList(MutableSequence):
+    """Composants d'un circuit, vus comme une liste : les lignes du stockage en colonnes
+    dans leur ordre. append et extend ajoutent au stockage (un composant déjà présent
+    est ignoré, comme avec add_component) ; remove, del et les affectations retirent ou
+    réordonnent ses lignes. Un composant retiré garde ses valeurs et ses nœuds."""
+
+    def __init__(self, circuit):
+        self._circuit = circuit
+
+    def _items(self):
+        return self._circuit.store.components()
+
+    def __len__(self):
+        return len(self._circuit.store)
+
+    def __iter__(self):
+        return iter(self._items())
+
+    def __getitem__(self, index):
+        items = self._items()
+        return list(items[index]) if isinstance(index, slice) else items[index]
+
+    def __contains__(self, component):
+        return isinstance(component, Component) and self._circuit.store.contains(component)
+
+    def __setitem__(self, index, value):
+        items = list(self._items())
+        items[index] = value
+        self._circuit.components = items
+
+    def __delitem__(self, index):
+        items = list(self._items())
+        del items[index]
+        self._circuit.components = items
+
+    def insert(self, index, component):
+        if component in self:
+            return
+        items = list(self._items())
+        items.insert(index, component)
+        self._circuit.components = items
+
+    def append(self, component):
+        self._circuit.add_component(component)
+
+    def remove(self, component):
+        store = self._circuit.store
+        if component not in self:
+            raise ValueError(f"{component.name} n'appartient pas au circuit")
+        len(store)  # Recopie des composants en attente : le composant a alors sa ligne
+        store.delete([component._index])
+
+    def __eq__(self, other):
+        return list(self) == list(other) if isinstance(other, (list, tuple, ComponentList)) else NotImplemented
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+# Les matrices des ports des sous-circuits ne sont définies qu'à une fréquence donnée
+_FREQUENCY_ONLY = ("Erreur: Les sous-circuits ne sont pris en charge que par les analyses en "
+                   "fréquence (solve, frequency_response, sensitivities...)")
 
 class Circuit:
-"""Représente la breadboard du circuit"""
+    """Représente la breadboard du circuit"""
     def __init__(self):
-        self.components = []
-        self.nodes = []
+        self.store = ComponentStore(owned=True)   # Composants en colonnes (voir ComponentStore)
+        self._nodes = NodeList()
         self.freq = 0
         self._solved = False
+        self._compiled = None
+        self.solver = "auto"                      # "auto", "dense" ou "sparse"
+        self.sparse_threshold = SPARSE_THRESHOLD  # Taille à partir de laquelle "auto" passe en creux
+        self.ordering = "amd"                     # Renumérotation du solveur creux ("amd", "colamd", "rcm")
+        self.max_update_rank = 8                  # Nombre de composants modifiés au-delà duquel on refactorise
+        self.factor_cache_size = 8                # Factorisations conservées (par fréquence, état des interrupteurs...)
+        self.eliminate_sources = False            # Sources idéales en supernœuds plutôt qu'en courants de branche
+        self.solution_cache = LRUCache(32)        # Solutions par (topologie, valeurs, amplitudes, fréquence)
+        self._written = None                      # Clé de la solution reportée sur les nœuds et composants
+        self._ordered = None                      # Version du stockage déjà triée par comp_order
+        self.instrumentation = Instrumentation()  # Temps par phase, compteurs et crochets de solve()
+        self.instances = []                       # Instances de sous-circuits (voir add_subcircuit)
+
+
+    @property
+    def nodes(self):
+        """Nœuds du circuit (la masse en premier)"""
+        return self._nodes
+
+    @nodes.setter
+    def nodes(self, nodes):
+        version = self._nodes.version + 1
+        self._nodes = NodeList(nodes)
+        self._nodes.version = version
 
+    @classmethod
+    def from_netlist(cls, source, title=True):
+        """Construit un circuit à partir d'une netlist SPICE (chemin ou flux texte).
+        Cartes reconnues : R, C, L et V ([DC] valeur, AC module [phase], SIN(...)), valeurs
+        avec suffixes SI, commentaires "*" et ";", continuations "+", arrêt à ".end".
+        Les nœuds "0" et "gnd" désignent la masse. Si `title` est vrai, la première ligne
+        est le titre, comme en SPICE."""
+        return read_netlist(cls(), source, title)
+
+    @property
+    def components(self):
+        """Composants du circuit, dans l'ordre du stockage (vue modifiable, voir ComponentList)"""
+        return ComponentList(self)
+
+    @components.setter
+    def components(self, components):
+        """Remplace les composants : les absents sont retirés, les nouveaux ajoutés, et les
+        lignes du stockage suivent l'ordre de `components`"""
+        components = list(components)
+        if len({id(component) for component in components}) != len(components):
+            raise ValueError("Un composant ne peut figurer qu'une fois dans le circuit")
+        store = self.store
+        kept = {id(component) for component in components}
+        store.delete([i for i, component in enumerate(store.components()) if id(component) not in kept])
+        for component in components:
+            if not store.contains(component):
+                store.adopt(component)
+        len(store)  # Recopie des composants ajoutés : chacun a alors sa ligne
+        order = [component._index for component in components]
+        if order != list(range(len(order))):
+            store.permute(np.array(order, dtype=np.intp))
 
     def add_component(self,component):
         if isinstance(component,list):
             for comp in component:
-                self.components.append(comp)
-        else:
-            self.components.append(component)
+                self.add_component(comp)
+        elif not self.store.contains(component):
+            self.store.adopt(component)
     
     def add_node(self, name=None, ground=False):
         """Ajoute un nœud au circuit"""
         node = Node(name, ground)
         self.nodes.append(node)
+        self.store.node_id(node)
         
         # Si c'est un nœud de masse, le placer en premier dans la liste
         if ground:
@@ -61,6 +235,16 @@ class Circuit:
         
         return node
 
+    def add_subcircuit(self, definition, nodes, name=None):
+        """Place une instance du Subcircuit `definition`, ses ports reliés aux nœuds `nodes`
+        du circuit (dans l'ordre de definition.ports). Les instances d'une même définition
+        partagent sa matrice des ports, réduite une fois par fréquence."""
+        from .subcircuit import SubcircuitInstance
+        instance = SubcircuitInstance(definition, nodes, name)
+        self.instances.append(instance)
+        self.store.version += 1  # Nouvelle topologie : le circuit doit être recompilé
+        return instance
+
     def add_ground_node(self, name="GND"):
         """Ajoute un nœud de masse au circuit"""
         # Vérifier si un nœud de masse existe déjà
@@ -74,160 +258,527 @@ class Circuit:
         self.freq = f
 
     def comp_order(self):
-        components = self.components
-        for comp in components:
-            if comp._firstorder:
-                components.remove(comp)
-                components.insert(0,comp)
-        self.components = components
-    
+        """Place les composants du premier ordre (sources) en tête, sans changer l'ordre relatif"""
+        if self._ordered == self.store.version:
+            return
+        later = self.store.kind[:len(self.store)] != "V"
+        if np.any(later[:-1] > later[1:]):
+            self.store.permute(np.argsort(later, kind="stable"))
+        self._ordered = self.store.version
 
-    def solve(self):
-        """Résout le circuit en utilisant la méthode des noeuds avec détection automatique de référence"""
-        # Rechercher les sources de tension AC
-        ac_sources = [comp for comp in self.components if isinstance(comp, VoltageSource) and comp.freq > 0]
-        
-        # Déterminer la fréquence d'analyse
-        if len(ac_sources) > 0:
-            if len(set(src.freq for src in ac_sources)) > 1:
-                print("Attention: Plusieurs sources AC avec des fréquences différentes détectées.")
-                print("L'analyse supposera une fréquence de la première source AC.")
-            
-            # Utiliser la fréquence de la première source AC
-            self.freq = ac_sources[0].freq
-        else:
-            # Circuit DC par défaut
-            self.freq = 0
-        
+    def _signature(self):
+        """Empreinte de la topologie (versions des nœuds et du stockage, sources idéales)"""
+        return (self.nodes.version,
+                self.store.version,
+                self.store.ideal_sources().tobytes(),
+                self.eliminate_sources)
+
+    def compile(self):
+        """Fige la topologie du circuit en indices entiers et tableaux d'assemblage.
+        Le résultat est réutilisé tant que la topologie ne change pas."""
         if len(self.nodes) < 2:
-            print("Erreur: Au moins deux nœuds sont nécessaires pour l'analyse.")
-            return False
-        
+            self._report(logging.ERROR, "too_few_nodes",
+                         "Erreur: Au moins deux nœuds sont nécessaires pour l'analyse.")
+            return None
+
         # Organiser les composants par priorité
         self.comp_order()
-        
-        # Vérifier que tous les composants sont connectés
-        for component in self.components:
-            if None in component.nodes or len(component.nodes) < 2:
-                print(f"Erreur: Le composant {component.name} n'est pas correctement connecté.")
-                return False
-        
+
+        signature = self._signature()
+        if self._compiled is not None and self._compiled.signature == signature:
+            return self._compiled
+
+        # Vérifier que tous les composants sont connectés à des nœuds du circuit
+        store = self.store
+        members = np.zeros(len(store.nodes) + 1, dtype=bool)  # Dernière case : non connecté (-1)
+        members[[store.node_id(node) for node in self.nodes]] = True
+        bad = ~(members[store.node1[:len(store)]] & members[store.node2[:len(store)]])
+        if np.any(bad):
+            self._report(logging.ERROR, "unconnected_component",
+                         f"Erreur: Le composant {store.names[np.argmax(bad)]} n'est pas correctement connecté.")
+            return None
+
+        # Sous-circuits : nœuds du circuit et définitions valides
+        if self.instances:
+            nodes = set(map(id, self.nodes))
+            for instance in self.instances:
+                if not all(id(node) in nodes for node in instance.nodes):
+                    self._report(logging.ERROR, "unconnected_subcircuit",
+                                 f"Erreur: Le sous-circuit {instance.name} n'est pas correctement connecté.")
+                    return None
+                try:
+                    instance.definition.compile_ports()
+                except ValueError as e:
+                    self._report(logging.ERROR, "invalid_subcircuit",
+                                 f"Erreur: Sous-circuit {instance.name}: {e}")
+                    return None
+
         # Trouver le nœud de référence (GND)
         reference_node = None
         for node in self.nodes:
             if node.isG:
                 reference_node = node
                 break
-        
+
         # Si aucun nœud de masse n'est désigné, prendre le nœud avec la priorité la plus élevée
         if reference_node is None:
-            nodes_sorted = sorted(self.nodes, key=lambda n: n.priority, reverse=True)
-            reference_node = nodes_sorted[0]
-            print(f"Aucun nœud de masse défini, utilisation de {reference_node.name} comme référence.")
-        
-        reference_node.voltage = 0  # Définir la tension de référence à 0
-        
-        # Identifier les autres nœuds dans l'ordre de priorité
-        other_nodes = [n for n in self.nodes if n != reference_node]
-        other_nodes.sort(key=lambda n: n.priority, reverse=True)
-        
-        # Construire la matrice d'admittance (Y) et le vecteur de courants (I)
-        n = len(other_nodes)
-        if n == 0:
-            print("Erreur: Aucun nœud à analyser après avoir défini la référence.")
-            return False
-            
-        Y = np.zeros((n, n), dtype=complex)  # Matrice d'admittance
-        I = np.zeros(n, dtype=complex)       # Vecteur de courants
+            priorities = self.store.priorities(self.nodes)
+            reference_node = self.nodes[int(np.argmax(priorities))]
+            self._report(logging.WARNING, "no_ground",
+                         f"Aucun nœud de masse défini, utilisation de {reference_node.name} comme référence.")
+
+        # Les solutions de l'ancienne topologie ne resserviront plus
+        self.solution_cache.clear()
+        self._written = None
+        try:
+            self._compiled = CompiledCircuit(self, reference_node, signature, self.factor_cache_size,
+                                             self.eliminate_sources)
+        except SingularMatrixError:
+            self._report(logging.ERROR, "source_loop", "Erreur: Boucle de sources de tension idéales détectée.")
+            return None
+        return self._compiled
+
+    def _analysis_frequency(self):
+        """Fréquence d'analyse : celle de la première source AC, 0 pour un circuit DC"""
+        # Rechercher les sources de tension AC
+        store = self.store
+        freqs = store.freq[store.sources()]
+        ac_freqs = freqs[freqs > 0]
         
-        # Pour chaque composant, ajouter sa contribution à la matrice Y
-        for component in self.components:
-            node1, node2 = component.nodes
+        # Déterminer la fréquence d'analyse
+        if len(ac_freqs) > 0:
+            if np.any(ac_freqs != ac_freqs[0]):
+                self._report(logging.WARNING, "multiple_frequencies",
+                             "Attention: Plusieurs sources AC avec des fréquences différentes détectées.\n"
+                             "L'analyse supposera une fréquence de la première source AC.\n"
+                             "Utilisez solve_superposition() pour une analyse exacte multi-fréquences.")
             
-            # Calculer l'admittance Y = 1/Z à la fréquence actuelle
+            # Utiliser la fréquence de la première source AC
+            return float(ac_freqs[0])
+        # Circuit DC par défaut
+        return 0
+
+    def _report(self, level, code, message):
+        """Journalise un diagnostic et le transmet aux crochets de l'instrumentation"""
+        report(level, code, message, self.instrumentation)
+
+    def solve(self, write_back=True):
+        """Résout le circuit en utilisant la méthode des noeuds avec détection automatique de référence.
+        Retourne une Solution (tableaux des tensions et courants) ou False en cas d'erreur ;
+        avec write_back=False, les nœuds et composants ne sont pas mis à jour."""
+        instrumentation = self.instrumentation
+        instrumentation.count("solves")
+        if not instrumentation.hooks:
+            return self._solve(instrumentation, write_back)
+        # Crochets : chaque résolution est signalée avec son issue et sa durée
+        start = time.perf_counter()
+        hits = instrumentation.counters.get("cache_hits", 0)
+        solution = self._solve(instrumentation, write_back)
+        instrumentation.emit("solve", freq=self.freq,
+                             size=self._compiled.size if self._compiled is not None else None,
+                             cached=instrumentation.counters.get("cache_hits", 0) > hits,
+                             ok=solution is not False, seconds=time.perf_counter() - start)
+        return solution
+
+    def _solve(self, instrumentation, write_back):
+        with instrumentation.phase("validation"):
+            self.freq = self._analysis_frequency()
+
+            compiled = self.compile()
+            if compiled is None:
+                return False
+
+            compiled.reference.voltage = 0  # Définir la tension de référence à 0
+
+            if compiled.n == 0:
+                self._report(logging.ERROR, "no_unknowns",
+                             "Erreur: Aucun nœud à analyser après avoir défini la référence.")
+                return False
+
+            # Un point de fonctionnement déjà résolu est repris du cache ; s'il est déjà reporté
+            # sur les nœuds et composants, il n'y a rien à faire
+            values = compiled.values()
+            key = (compiled.signature, self.freq, values.tobytes(), compiled.amplitudes().tobytes())
+            if compiled.definitions:
+                key += compiled.definition_state()
+            solution = self.solution_cache.get(key)
+        if solution is not None:
+            instrumentation.count("cache_hits")
+        else:
             try:
-                Z = component.get_imp_cplx(self.freq)
-                if abs(Z) < 1e-12:
-                    Y_comp = 1e12  # Limite pour éviter division par zéro
-                else:
-                    Y_comp = 1 / Z
-            except Exception as e:
-                print(f"Erreur lors du calcul de l'impédance pour {component.name}: {e}")
+                # Construire la matrice du système nodal modifié et le second membre
+                # (les matrices des ports des sous-circuits peuvent être singulières)
+                with instrumentation.phase("assembly"):
+                    y = compiled.admittances(self.freq, values)
+                    I = compiled.rhs(y)
+
+                # Résoudre le système (tensions des nœuds et courants des sources idéales)
+                with instrumentation.phase("solve"):
+                    x = self._incremental_solve(compiled, y, I)
+            except SingularMatrixError:
+                self._solved = False
+                self._report(logging.ERROR, "singular_matrix",
+                             "Erreur: La matrice du système est singulière (pivot nul ou négligeable).\n"
+                             "Vérifiez qu'il n'y a pas de boucles de sources de tension ou de composants isolés.")
                 return False
-            
-            # Construction de la matrice selon les indices des nœuds
-            if node1 != reference_node and node2 != reference_node:
-                i = other_nodes.index(node1)
-                j = other_nodes.index(node2)
-                Y[i, i] += Y_comp
-                Y[j, j] += Y_comp
-                Y[i, j] -= Y_comp
-                Y[j, i] -= Y_comp
-            elif node1 == reference_node and node2 != reference_node:
-                j = other_nodes.index(node2)
-                Y[j, j] += Y_comp
-            elif node2 == reference_node and node1 != reference_node:
-                i = other_nodes.index(node1)
-                Y[i, i] += Y_comp
-        
-        # Pour chaque source de tension, modifier matrice Y et vecteur I
-        for component in self.components:
-            if isinstance(component, VoltageSource):
-                node1, node2 = component.nodes
-                V_source = component.source_voltage
-                
-                # Obtenir l'admittance de la source
-                try:
-                    Z_source = component.get_imp_cplx(self.freq)
-                    Y_source = 1 / Z_source if abs(Z_source) > 1e-12 else 1e12
-                except Exception as e:
-                    print(f"Erreur lors du calcul de l'impédance de la source {component.name}: {e}")
-                    return False
-                
-                # Application correcte des sources au vecteur I
-                if node1 != reference_node and node2 == reference_node:
-                    i = other_nodes.index(node1)
-                    I[i] += V_source * Y_source
-                elif node2 != reference_node and node1 == reference_node:
-                    j = other_nodes.index(node2)
-                    I[j] -= V_source * Y_source
-                elif node1 != reference_node and node2 != reference_node:
-                    i = other_nodes.index(node1)
-                    j = other_nodes.index(node2)
-                    I[i] += V_source * Y_source
-                    I[j] -= V_source * Y_source
-        
-        # Résoudre le système Y⋅V = I
-        try:
-            # Vérifier si la matrice est singulière
-            det = np.linalg.det(Y)
-            if abs(det) < 1e-10:
-                print("Erreur: La matrice d'admittance est singulière (déterminant proche de zéro).")
-                print("Vérifiez qu'il n'y a pas de boucles de sources de tension ou de composants isolés.")
+            except np.linalg.LinAlgError as e:
                 self._solved = False
+                self._report(logging.ERROR, "solve_failed",
+                             f"Erreur: Impossible de résoudre le système: {e}\n"
+                             "Assurez-vous que le circuit est bien connecté et qu'il n'y a pas de boucles de sources de tension.")
                 return False
-            
-            V = np.linalg.solve(Y, I)
-            self._solved = True
-            
-            # Mettre à jour les tensions des nœuds
-            for i, node in enumerate(other_nodes):
-                node.voltage = V[i]
-            
-            # Calculer les tensions et courants de chaque composant
-            for component in self.components:
-                node1, node2 = component.nodes
-                if node1 and node2:
-                    component.voltage = node1.voltage - node2.voltage
-                    component.calc_I(self.freq)
-            
-            return True
-        
+
+            # Tableaux de la solution, puis report éventuel, dans une même phase
+            with instrumentation.phase("scatter"):
+                solution = build_solution(compiled, self.freq, x, y)
+                self.solution_cache.put(key, solution)
+                self._solved = True
+                if write_back:
+                    self._write_back(compiled, solution)
+                    self._written = key
+            return solution
+
+        self._solved = True
+        if write_back and key != self._written:
+            with instrumentation.phase("scatter"):
+                self._write_back(compiled, solution)
+            self._written = key
+        return solution
+
+    def _factorize(self, compiled, y):
+        """Factorise la matrice du système avec le solveur dense ou creux"""
+        factor = factorize(compiled, y, self.solver, self.sparse_threshold, self.ordering)
+        sparse = isinstance(factor, SparseFactor)
+        condition = None
+        if self.instrumentation.condition:
+            # Estimation facultative : réassemble Y et coûte quelques résolutions
+            Y = compiled.sparse_matrix(y) if sparse else compiled.matrix(y)
+            condition = condition_estimate(Y, factor)
+        self.instrumentation.factorization(compiled.size, sparse, factor.nnz, condition)
+        return factor
+
+    def _incremental_solve(self, compiled, y, I):
+        """Réutilise une factorisation conservée pour la même fréquence et le même état des
+        interrupteurs (mise à jour de rang faible si quelques composants ont changé),
+        sinon refactorise"""
+        if compiled.size == 0:
+            return np.zeros(0, dtype=complex)  # Tous les nœuds sont imposés par des sources idéales
+        key = ("phasor", self.freq, self.solver, self.sparse_threshold, self.ordering,
+               compiled.switch_states())
+        state = compiled.cache.get(key)
+        if state is not None:
+            V = state.solve(y, I)
+            if V is not None:
+                self.instrumentation.count("factor_reuses")
+                return V
+        factor = self._factorize(compiled, y)
+        compiled.cache.put(key, IncrementalSolver(compiled, y, factor, self.max_update_rank))
+        return factor.solve(I)
+
+    def solve_superposition(self):
+        """Analyse par superposition des circuits à sources de fréquences différentes.
+        Les sources sont regroupées par fréquence (continu compris) ; chaque groupe est
+        résolu avec les autres sources éteintes, tous les groupes en un seul appel empilé."""
+        compiled = self.compile()
+        if compiled is None:
+            return None
+        if len(compiled.sources) == 0:
+            self._report(logging.ERROR, "no_source", "Erreur: Aucune source de tension dans le circuit")
+            return None
+
+        source_freqs = compiled.store.freq[compiled.sources]
+        freqs, group = np.unique(source_freqs, return_inverse=True)
+
+        # Une ligne de tensions de sources par fréquence, les autres sources éteintes
+        amplitudes = compiled.amplitudes()
+        E = np.where(group[None, :] == np.arange(len(freqs))[:, None], amplitudes, 0)
+        sparse = use_sparse(compiled.size, self.solver, self.sparse_threshold)
+
+        try:
+            V = compiled.solve_stacked(compiled.admittances(freqs), E, sparse, self.ordering)
         except np.linalg.LinAlgError as e:
-            self._solved = False
-            print(f"Erreur: Impossible de résoudre le système: {e}")
-            print("Assurez-vous que le circuit est bien connecté et qu'il n'y a pas de boucles de sources de tension.")
-            return False
+            self._report(logging.ERROR, "solve_failed", f"Erreur: Impossible de résoudre le système: {e}")
+            return None
+
+        return SuperpositionResult(freqs, V, compiled.index)
+
+    def _probe_indices(self, compiled, probes):
+        """Indices (vers, depuis) des paires de nœuds sondées"""
+        single = len(probes) == 2 and isinstance(probes[0], Node)
+        pairs = [probes] if single else list(probes)
+        to_idx = np.array([compiled.index[to_node] for from_node, to_node in pairs], dtype=np.intp)
+        from_idx = np.array([compiled.index[from_node] for from_node, to_node in pairs], dtype=np.intp)
+        return to_idx, from_idx, single
+
+    def frequency_response(self, freqs, probes, chunk=None):
+        """Fonction de transfert complexe (V_to - V_from) / V_source pour chaque fréquence.
+        Toutes les sources sont placées à la fréquence balayée, la référence est la première source.
+        `probes` est une paire (from_node, to_node) ou une liste de paires ; le résultat
+        a la forme (F,) ou (F, P). Les systèmes de chaque fréquence sont résolus en un seul appel empilé."""
+        compiled = self.compile()
+        if compiled is None:
+            return None
+        if len(compiled.sources) == 0:
+            self._report(logging.ERROR, "no_source", "Erreur: Aucune source de tension dans le circuit")
+            return None
+
+        v_ref = compiled.amplitudes()[0]
+        if abs(v_ref) < 1e-12:
+            self._report(logging.ERROR, "zero_reference", "Erreur: La source de référence a une amplitude nulle.")
+            return None
+
+        freqs = np.atleast_1d(np.asarray(freqs, dtype=float))
+        to_idx, from_idx, single = self._probe_indices(compiled, probes)
+        sparse = use_sparse(compiled.size, self.solver, self.sparse_threshold)
+
+        try:
+            V = compiled.solve_stacked(compiled.admittances(freqs), sparse=sparse,
+                                       ordering=self.ordering, chunk=chunk)
+        except np.linalg.LinAlgError as e:
+            self._report(logging.ERROR, "solve_failed", f"Erreur: Impossible de résoudre le système: {e}")
+            return None
+
+        H = V[:, to_idx] - V[:, from_idx]
+        H /= v_ref
+        return H[:, 0] if single else H
+
+    def sensitivities(self, from_node, to_node, freqs):
+        """Dérivées de la fonction de transfert (V_to - V_from) / V_source par rapport à la
+        valeur de chaque composant, pour chaque fréquence (sources placées à la fréquence
+        balayée comme dans frequency_response). Méthode adjointe : une factorisation et deux
+        résolutions par fréquence, quel que soit le nombre de composants.
+        Retourne un SensitivityResult."""
+        compiled = self.compile()
+        if compiled is None:
+            return None
+        if len(compiled.sources) == 0:
+            self._report(logging.ERROR, "no_source", "Erreur: Aucune source de tension dans le circuit")
+            return None
+        if abs(compiled.amplitudes()[0]) < 1e-12:
+            self._report(logging.ERROR, "zero_reference", "Erreur: La source de référence a une amplitude nulle.")
+            return None
+
+        to_idx, from_idx, _ = self._probe_indices(compiled, (from_node, to_node))
+        try:
+            return adjoint_sensitivities(compiled, freqs, to_idx[0], from_idx[0], self.solver,
+                                         self.sparse_threshold, self.ordering)
+        except np.linalg.LinAlgError as e:
+            self._report(logging.ERROR, "solve_failed", f"Erreur: Impossible de résoudre le système: {e}")
+            return None
+
+    def state_space(self, sparse=False):
+        """Descripteur (G + sC) x = b u du circuit, avec u la tension de la première source
+        et les autres sources dans le même rapport d'amplitude (voir StateSpace).
+        Avec `sparse`, G et C sont des matrices creuses (SciPy)."""
+        compiled = self.compile()
+        if compiled is None:
+            return None
+        if len(compiled.sources) == 0:
+            self._report(logging.ERROR, "no_source", "Erreur: Aucune source de tension dans le circuit")
+            return None
+        if abs(compiled.amplitudes()[0]) < 1e-12:
+            self._report(logging.ERROR, "zero_reference", "Erreur: La source de référence a une amplitude nulle.")
+            return None
+        if compiled.instance_nodes:
+            self._report(logging.ERROR, "subcircuit_unsupported", _FREQUENCY_ONLY)
+            return None
+        return build_state_space(compiled, sparse)
+
+    def poles_zeros(self, from_node, to_node):
+        """Pôles, zéros et gain de la fonction de transfert (V_to - V_from) / V_source.
+        Le problème aux valeurs propres est résolu une seule fois : le PoleZeroModel
+        retourné évalue ensuite la réponse en fréquence (response), la réponse indicielle
+        (step) et les résonances (resonances) sans nouvelle résolution du circuit."""
+        system = self.state_space()
+        if system is None:
+            return None
+        try:
+            return system.transfer(from_node, to_node)
+        except np.linalg.LinAlgError as e:
+            self._report(logging.ERROR, "solve_failed", f"Erreur: Impossible de résoudre le système: {e}")
+            return None
+
+    def reduce(self, ports, order=4, s0=None):
+        """Modèle réduit (PRIMA) du circuit vu depuis les nœuds `ports`.
+        La base de Krylov par blocs est construite à partir d'une seule factorisation du
+        circuit complet ; le ReducedModel retourné a une taille d'au plus `order` fois
+        (sources + ports) et répond à frequency_response, impedance et transient pour
+        un coût indépendant du nombre de nœuds d'origine. Sa passivité est conservée."""
+        compiled = self.compile()
+        if compiled is None:
+            return None
+        sparse = use_sparse(compiled.size, self.solver, self.sparse_threshold)
+        system = self.state_space(sparse)
+        if system is None:
+            return None
+        try:
+            return prima(system, ports, order, s0, sparse, self.ordering)
+        except np.linalg.LinAlgError as e:
+            self._report(logging.ERROR, "solve_failed", f"Erreur: Impossible de résoudre le système: {e}")
+            return None
+
+    def adaptive_frequency_response(self, f_min, f_max, probes, points_per_decade=10,
+                                    tol_db=0.5, tol_deg=2.0, max_points=5000):
+        """Balayage fréquentiel adaptatif : part d'une grille logarithmique grossière et
+        bisecte (en échelle log) les intervalles où le gain (dB) ou la phase (°) s'écarte
+        de l'interpolation linéaire de plus que la tolérance. Chaque passe de raffinement
+        est résolue en un seul appel empilé. Retourne (freqs, H) avec une grille non uniforme."""
+        decades = np.log10(f_max) - np.log10(f_min)
+        n_initial = max(3, int(np.ceil(decades * points_per_decade)) + 1)
+        log_f = np.linspace(np.log10(f_min), np.log10(f_max), n_initial)
+
+        H = self.frequency_response(10 ** log_f, probes)
+        if H is None:
+            return None
+        single = H.ndim == 1
+        H = H.reshape(len(log_f), -1)
+
+        while len(log_f) < max_points:
+            gain = 20 * np.log10(np.maximum(np.abs(H), 1e-15))
+            phase = np.degrees(np.unwrap(np.angle(H), axis=0))
+
+            # Écart entre chaque point intérieur et la corde de ses voisins
+            x0, x1, x2 = log_f[:-2], log_f[1:-1], log_f[2:]
+            alpha = ((x1 - x0) / (x2 - x0))[:, None]
+            err_gain = np.abs(gain[1:-1] - (gain[:-2] + alpha * (gain[2:] - gain[:-2])))
+            err_phase = np.abs(phase[1:-1] - (phase[:-2] + alpha * (phase[2:] - phase[:-2])))
+            bad = np.flatnonzero(((err_gain > tol_db) | (err_phase > tol_deg)).any(axis=1))
+            if len(bad) == 0:
+                break
+
+            # Bisecter les deux intervalles adjacents à chaque point trop courbé
+            intervals = np.unique(np.concatenate([bad, bad + 1]))
+            widths = log_f[intervals + 1] - log_f[intervals]
+            intervals = intervals[widths > 1e-9 * decades]
+            intervals = intervals[:max_points - len(log_f)]
+            if len(intervals) == 0:
+                break
+            new_log_f = 0.5 * (log_f[intervals] + log_f[intervals + 1])
+
+            H_new = self.frequency_response(10 ** new_log_f, probes)
+            if H_new is None:
+                return None
+            log_f = np.concatenate([log_f, new_log_f])
+            H = np.concatenate([H, H_new.reshape(len(new_log_f), -1)])
+            order = np.argsort(log_f)
+            log_f, H = log_f[order], H[order]
+
+        freqs = 10 ** log_f
+        return freqs, (H[:, 0] if single else H)
+
+    def sweep_parameter(self, component, values, probes, freqs=None, chunk=None):
+        """Balaye la valeur d'un composant, éventuellement croisée avec une grille de fréquences.
+        Sans `freqs`, le circuit est évalué à sa fréquence d'analyse ; avec `freqs`, toutes les
+        sources sont placées à chaque fréquence comme dans frequency_response.
+        Tous les systèmes (valeurs x fréquences) sont résolus par appels empilés.
+        Retourne un ParameterSweep dont `data` a la forme (valeurs, fréquences, sondes)."""
+        compiled = self.compile()
+        if compiled is None:
+            return None
+
+        values = np.atleast_1d(np.asarray(values, dtype=float))
+        if freqs is None:
+            freqs = [self._analysis_frequency()]
+        freqs = np.atleast_1d(np.asarray(freqs, dtype=float))
+        slot = compiled.slot(component)
+
+        # Grille (valeur, fréquence) aplatie en lignes d'admittances
+        grid = np.repeat(compiled.values()[None, :], len(values), axis=0)
+        grid[:, slot] = values
+        single = len(probes) == 2 and isinstance(probes[0], Node)
+        pairs = [probes] if single else list(probes)
+        to_idx, from_idx, _ = self._probe_indices(compiled, pairs)
+        sparse = use_sparse(compiled.size, self.solver, self.sparse_threshold)
+
+        try:
+            y = compiled.admittances(freqs[None, :], grid[:, None, :])
+            V = compiled.solve_stacked(y.reshape(-1, y.shape[-1]), sparse=sparse,
+                                       ordering=self.ordering, chunk=chunk)
+        except np.linalg.LinAlgError as e:
+            self._report(logging.ERROR, "solve_failed", f"Erreur: Impossible de résoudre le système: {e}")
+            return None
+
+        data = (V[:, to_idx] - V[:, from_idx]).reshape(len(values), len(freqs), len(pairs))
+        return ParameterSweep(component, values, freqs, pairs, data)
+
+    def transient(self, t_stop, dt, method="trapezoidal", probes=None, chunk=None):
+        """Simulation temporelle à partir du repos (condensateurs déchargés, bobines sans courant).
+        Les condensateurs et bobines sont remplacés par leur modèle compagnon (trapèzes ou
+        Euler implicite) : la matrice constante est factorisée une fois par pas de temps et
+        chaque pas ne demande qu'une descente-remontée. Les sources suivent leur `waveform`
+        si elle est définie, sinon amplitude * sin(ωt + phase).
+        Retourne (t, tensions) : sondes (from_node, to_node) ou, par défaut, tous les nœuds
+        dans l'ordre de `self.nodes`. Avec `chunk`, retourne un générateur de blocs (t, tensions)."""
+        if method not in METHODS:
+            raise ValueError(f"Méthode inconnue: {method} (choix: {', '.join(METHODS)})")
+        compiled = self.compile()
+        if compiled is None:
+            return None
+        if compiled.instance_nodes:
+            self._report(logging.ERROR, "subcircuit_unsupported", _FREQUENCY_ONLY)
+            return None
+
+        if probes is None:
+            to_idx = np.array([compiled.index[node] for node in self.nodes], dtype=np.intp)
+            from_idx = np.full(len(to_idx), compiled.n, dtype=np.intp)
+            single = False
+        else:
+            to_idx, from_idx, single = self._probe_indices(compiled, probes)
+
+        try:
+            blocks = run_transient(self, compiled, t_stop, dt, method, to_idx, from_idx, chunk)
+            if single:
+                blocks = ((t, values[:, 0]) for t, values in blocks)
+            if chunk is not None:
+                return blocks
+            t, values = next(blocks)
+        except SingularMatrixError:
+            self._report(logging.ERROR, "singular_matrix",
+                         "Erreur: La matrice du système discrétisé est singulière (pivot nul ou négligeable).\n"
+                         "Vérifiez qu'il n'y a pas de composants isolés ni de résistances nulles.")
+            return None
+        return t, values
+
+    def monte_carlo(self, n, tolerances, probes, workers=None, seed=None, batch=1000,
+                    distribution="uniform", bins=50):
+        """Analyse de tolérances Monte-Carlo à la fréquence d'analyse du circuit.
+        `tolerances` associe à chaque composant sa tolérance relative (0.05 pour ±5 %),
+        tirée uniformément ou selon une loi normale (tolérance = 3σ). Les tirages sont
+        évalués par lots empilés, répartis sur `workers` processus avec des graines
+        reproductibles dérivées de `seed`, et réduits à la volée (moyenne, variance,
+        extrema, histogrammes) sans conserver les échantillons."""
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Distribution inconnue: {distribution} (choix: {', '.join(DISTRIBUTIONS)})")
+        freq = self._analysis_frequency()
+        compiled = self.compile()
+        if compiled is None:
+            return None
+
+        slots = np.array([compiled.slot(comp) for comp in tolerances], dtype=np.intp)
+        tol = np.array([tolerances[comp] for comp in tolerances], dtype=float)
+        to_idx, from_idx, _ = self._probe_indices(compiled, probes)
+        sparse = use_sparse(compiled.size, self.solver, self.sparse_threshold)
+
+        try:
+            return run_monte_carlo(compiled, n, slots, tol, distribution, freq, to_idx, from_idx,
+                                   workers, seed, batch, bins, sparse)
+        except np.linalg.LinAlgError as e:
+            self._report(logging.ERROR, "solve_failed", f"Erreur: Impossible de résoudre le système: {e}")
+            return None
+
+    def _write_back(self, compiled, solution):
+        """Reporte la solution sur les nœuds et les composants"""
+        # Mettre à jour les tensions des nœuds
+        V = solution.node_voltages
+        for i, node in enumerate(compiled.nodes):
+            node.voltage = V[i]
+
+        # Tensions, impédances et courants de tous les composants, en colonnes
+        store, kinds = compiled.store, compiled.kinds
+        store.voltage[:compiled.m] = solution.branch_voltages
+        reactive = (kinds == "C") | (kinds == "L")
+        store.impedance[:compiled.m][reactive] = compiled.impedances(self.freq)[reactive]
+        store.current[:compiled.m] = solution.currents
     
     def display(self):
         """Affiche l'état actuel du circuit"""
@@ -239,5 +790,9 @@ class Circuit:
         print(f"  Noeuds: {len(self.nodes)}")
         for node in self.nodes:
             print(f"    {node}")
+        if self.instances:
+            print(f"  Sous-circuits: {len(self.instances)}")
+            for instance in self.instances:
+                print(f"    {instance}")
     
     
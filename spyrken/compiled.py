@@ -0,0 +1,395 @@
+import numpy as np
+from .cache import LRUCache
+from .solver import SingularMatrixError, factorize, scipy_module
+from .solution import first_index
+
+
+class CompiledCircuit:
+    """Topologie figée d'un circuit : indices entiers des nœuds et tableaux de
+    dispersion (ligne, colonne, composant) pour l'assemblage du système nodal modifié.
+
+    Les nœuds inconnus sont numérotés de 0 à n-1, le nœud de référence reçoit
+    l'indice n (tension nulle ajoutée en fin de vecteur). Chaque source idéale
+    (résistance interne nulle) ajoute une inconnue de courant de branche après les
+    nœuds, sauf si `eliminate_sources` la remplace par un supernœud. `row_of_node`
+    donne la ligne du système de chaque nœud (`size` pour un nœud éliminé).
+    Les instances de sous-circuits ajoutent les termes de leur matrice des ports après
+    les admittances des composants : `y` compte alors plus de `m` termes."""
+
+    def __init__(self, circuit, reference, signature, cache_size=8, eliminate_sources=False):
+        self.signature = signature
+        self.store = store = circuit.store
+        self.reference = reference
+        self.m = m = len(store)
+
+        # Nœuds inconnus dans l'ordre de priorité (tri stable)
+        priorities = store.priorities(circuit.nodes)
+        order = [k for k in np.argsort(-priorities, kind="stable") if circuit.nodes[k] is not reference]
+        self.nodes = [circuit.nodes[k] for k in order]
+        self.n = len(self.nodes)
+
+        self.index = {node: i for i, node in enumerate(self.nodes)}
+        self.index[reference] = self.n
+
+        # Noms des nœuds (référence en dernier) et des composants, partagés par les solutions
+        self.node_names = tuple(node.name for node in self.nodes) + (reference.name,)
+        self.component_names = tuple(store.names[:m])
+        self.node_lookup = first_index(self.node_names)
+        self.component_lookup = first_index(self.component_names)
+
+        # Indices des nœuds du stockage vers les indices du système
+        position = np.full(len(store.nodes), self.n, dtype=np.intp)
+        position[[store.node_id(node) for node in self.nodes]] = np.arange(self.n)
+
+        self.kinds = store.kind[:m].copy()
+        self.node1 = position[store.node1[:m]]
+        self.node2 = position[store.node2[:m]]
+        self.sources = np.flatnonzero(self.kinds == "V")
+        self.switches = np.flatnonzero(self.kinds == "S")
+
+        # Sous-circuits instanciés : définition et nœuds (indices du système) de chaque instance
+        instances = getattr(circuit, "instances", [])
+        self.instance_definitions = [instance.definition for instance in instances]
+        self.instance_nodes = [np.array([self.index[node] for node in instance.nodes], dtype=np.intp)
+                               for instance in instances]
+        self.definitions = list({id(d): d for d in self.instance_definitions}.values())
+
+        # Positions (parmi les sources) des sources idéales et des sources de Norton
+        ideal = store.value[self.sources] == 0
+        self.ideal = np.flatnonzero(ideal)
+        self.norton = np.flatnonzero(~ideal)
+        self.eliminate_sources = eliminate_sources
+
+        if eliminate_sources:
+            self._eliminate_sources()
+        else:
+            self.size = self.n + len(self.ideal)
+            self.row_of_node = np.arange(self.n + 1)
+            self.row_of_node[self.n] = self.size
+            self.tree = []
+            self.offset_nodes = self.offset_sources = np.zeros(0, dtype=np.intp)
+            self.offset_signs = np.zeros(0)
+
+        self._build_scatter()
+        # Factorisations valables pour cette topologie, indexées notamment par l'état des interrupteurs
+        self.cache = LRUCache(cache_size)
+
+    def __getstate__(self):
+        """Une copie envoyée à un autre processus ne garde que les tableaux d'assemblage"""
+        state = self.__dict__.copy()
+        for key in ("store", "nodes", "reference", "index"):
+            state[key] = None
+        state["cache"] = LRUCache(self.cache.maxsize)
+        # Sous-circuits : modèles des ports figés, sans les objets du bloc
+        models = {id(d): d.port_model() for d in self.definitions}
+        state["definitions"] = list(models.values())
+        state["instance_definitions"] = [models[id(d)] for d in self.instance_definitions]
+        return state
+
+    def _eliminate_sources(self):
+        """Remplace les sources idéales par des supernœuds : chaque nœud relié par des
+        sources idéales s'écrit V = V(racine) + somme de tensions de sources. Un arbre
+        contenant la référence a pour racine la référence et ses nœuds sont connus."""
+        n = self.n
+        adjacency = {}
+        for j in self.ideal:
+            a, b = self.node1[self.sources[j]], self.node2[self.sources[j]]
+            # V(a) - V(b) = E : de a vers b on retranche E, de b vers a on l'ajoute
+            adjacency.setdefault(a, []).append((b, j, -1.0))
+            adjacency.setdefault(b, []).append((a, j, 1.0))
+
+        root_of = np.arange(n + 1)
+        paths = {}
+        self.tree = []  # (nœud, parent, source) dans l'ordre du parcours en largeur
+        used = set()
+        for root in [n] + sorted(adjacency):
+            if root not in adjacency or root in paths:
+                continue
+            paths[root] = {}
+            queue = [root]
+            while queue:
+                node = queue.pop(0)
+                for other, j, sign in adjacency[node]:
+                    if j in used:
+                        continue
+                    used.add(j)
+                    if other in paths:
+                        raise SingularMatrixError("boucle de sources de tension idéales")
+                    path = dict(paths[node])
+                    path[j] = path.get(j, 0.0) + sign
+                    paths[other] = path
+                    root_of[other] = root_of[node]
+                    self.tree.append((other, node, j))
+                    queue.append(other)
+
+        # Décalage de tension de chaque nœud par rapport à sa racine
+        entries = [(node, j, sign) for node, path in paths.items() for j, sign in path.items()]
+        self.offset_nodes = np.array([entry[0] for entry in entries], dtype=np.intp)
+        self.offset_sources = np.array([entry[1] for entry in entries], dtype=np.intp)
+        self.offset_signs = np.array([entry[2] for entry in entries], dtype=float)
+
+        # Une ligne par racine libre ; les nœuds rattachés à la référence disparaissent
+        free = [i for i in range(n) if root_of[i] == i]
+        self.size = len(free)
+        rows = np.full(n + 1, self.size)
+        rows[free] = np.arange(self.size)
+        self.row_of_node = rows[root_of]
+
+    def _build_scatter(self):
+        """Précalcule les indices de dispersion de la matrice et du second membre"""
+        N = self.size
+        row_of_node = self.row_of_node
+
+        # Les sources idéales n'ont pas d'admittance
+        passive = np.ones(self.m, dtype=bool)
+        passive[self.sources[self.ideal]] = False
+        self.passive = np.flatnonzero(passive)
+        a = row_of_node[self.node1[self.passive]]
+        b = row_of_node[self.node2[self.passive]]
+        ones = np.ones(len(self.passive))
+
+        # Termes des matrices des ports (P, P) de chaque instance de sous-circuit, rangés
+        # après les admittances des composants dans `y`
+        row_nodes, col_nodes = [np.zeros(0, dtype=np.intp)], [np.zeros(0, dtype=np.intp)]
+        for nodes in self.instance_nodes:
+            row_nodes.append(np.repeat(nodes, len(nodes)))
+            col_nodes.append(np.tile(nodes, len(nodes)))
+        self.block_row_nodes = np.concatenate(row_nodes)
+        self.block_col_nodes = np.concatenate(col_nodes)
+        self.block_slots = self.m + np.arange(len(self.block_row_nodes))
+
+        # Chaque dipôle contribue +y en (a,a), (b,b) et -y en (a,b), (b,a)
+        rows = np.concatenate([a, b, a, b, row_of_node[self.block_row_nodes]])
+        cols = np.concatenate([a, b, b, a, row_of_node[self.block_col_nodes]])
+        signs = np.concatenate([ones, ones, -ones, -ones, np.ones(len(self.block_slots))])
+        slots = np.concatenate([np.tile(self.passive, 4), self.block_slots])
+        keep = (rows < N) & (cols < N)
+        self.rows = rows[keep]
+        self.cols = cols[keep]
+        self.signs = signs[keep]
+        self.slots = slots[keep]
+        self.flat = self.rows * N + self.cols
+
+        # Lignes de branche des sources idéales : V(node1) - V(node2) = E, et le courant
+        # de branche (de node1 vers node2 à travers la source) dans les lois des nœuds
+        const_rows, const_cols, const_vals = [], [], []
+        if not self.eliminate_sources:
+            for k, j in enumerate(self.ideal):
+                branch = self.n + k
+                for node, sign in ((self.node1[self.sources[j]], 1.0), (self.node2[self.sources[j]], -1.0)):
+                    if node < self.n:
+                        const_rows += [node, branch]
+                        const_cols += [branch, node]
+                        const_vals += [sign, sign]
+        self.const_rows = np.array(const_rows, dtype=np.intp)
+        self.const_cols = np.array(const_cols, dtype=np.intp)
+        self.const_vals = np.array(const_vals, dtype=float)
+        self.const_flat = self.const_rows * N + self.const_cols
+
+        # Sources de Norton : injection E*y en node1, -E*y en node2
+        norton = self.sources[self.norton]
+        k = len(norton)
+        rows = np.concatenate([row_of_node[self.node1[norton]], row_of_node[self.node2[norton]]])
+        signs = np.concatenate([np.ones(k), -np.ones(k)])
+        positions = np.tile(self.norton, 2)
+        keep = rows < N
+        self.src_rows = rows[keep]
+        self.src_signs = signs[keep]
+        self.src_positions = positions[keep]
+        self.src_slots = self.sources[self.src_positions]
+
+    def component(self, k):
+        """Objet composant de l'indice `k`"""
+        return self.store.view(k)
+
+    def slot(self, component):
+        """Indice du composant `component` dans les tableaux du circuit"""
+        if component._store is not self.store:
+            raise ValueError(f"{component.name} n'appartient pas au circuit")
+        return component._index
+
+    def values(self):
+        """Valeurs actuelles des composants (R, C, L, résistance interne ou d'interrupteur)"""
+        values = self.store.value[:self.m].copy()
+        if len(self.switches):
+            values[self.switches] = self.switch_values(self.switch_states())
+        return values
+
+    def amplitudes(self):
+        """Tensions actuelles des sources"""
+        return self.store.amplitude[self.sources]
+
+    def switch_states(self):
+        """Vecteur d'état des interrupteurs (fermé = True)"""
+        return tuple(bool(self.component(i).closed) for i in self.switches)
+
+    def switch_values(self, states):
+        """Résistances des interrupteurs pour les états `states` (tableau (..., s) de booléens)"""
+        switches = [self.component(i) for i in self.switches]
+        r_on = np.array([switch.r_on for switch in switches], dtype=float)
+        r_off = np.array([switch.r_off for switch in switches], dtype=float)
+        return np.where(states, r_on, r_off)
+
+    def impedances(self, freq, values=None):
+        """Impédances complexes de tous les composants.
+        `freq` (scalaire ou tableau) est diffusée contre le dernier axe de `values`."""
+        if values is None:
+            values = self.values()
+        w = 2 * np.pi * np.asarray(freq, dtype=float)[..., None]
+        kinds = self.kinds
+        with np.errstate(divide="ignore", invalid="ignore"):
+            Z = np.where(kinds == "C", 1 / (1j * w * values), values + 0j)
+            Z = np.where(kinds == "L", 1j * w * values, Z)
+            Z = np.where((kinds == "C") & (w == 0), 1e12, Z)
+        return Z
+
+    def admittances(self, freq, values=None):
+        """Admittances de tous les composants (limitées à 1e12 pour une impédance nulle),
+        suivies des termes des matrices des ports des sous-circuits instanciés"""
+        Z = self.impedances(freq, values)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            y = np.where(np.abs(Z) < 1e-12, 1e12, 1 / Z)
+        if not self.instance_nodes:
+            return y
+        # Une réduction par définition et par fréquence, partagée par toutes ses instances
+        freq = np.asarray(freq, dtype=float)
+        blocks = {id(d): d.port_admittance(freq).reshape(freq.shape + (-1,)) for d in self.definitions}
+        terms = [np.broadcast_to(blocks[id(d)], y.shape[:-1] + blocks[id(d)].shape[-1:])
+                 for d in self.instance_definitions]
+        return np.concatenate([y] + terms, axis=-1)
+
+    def definition_state(self):
+        """État (topologie, valeurs) des sous-circuits instanciés, pour les clés de cache"""
+        return tuple(definition.state() for definition in self.definitions)
+
+    def matrix(self, y):
+        """Matrice du système dense. Les axes en tête de `y` donnent des matrices empilées."""
+        y = np.asarray(y)
+        batch = y.shape[:-1]
+        N = self.size
+        Y = np.zeros(batch + (N * N,), dtype=np.result_type(y, float))
+        np.add.at(Y, (..., self.flat), self.signs * y[..., self.slots])
+        Y[..., self.const_flat] += self.const_vals
+        return Y.reshape(batch + (N, N))
+
+    def sparse_matrix(self, y):
+        """Matrice du système creuse (assemblage COO converti en CSC)"""
+        data = np.concatenate([self.signs * np.asarray(y)[self.slots], self.const_vals])
+        rows = np.concatenate([self.rows, self.const_rows])
+        cols = np.concatenate([self.cols, self.const_cols])
+        return scipy_module("sparse").coo_matrix((data, (rows, cols)), shape=(self.size, self.size)).tocsc()
+
+    def offsets(self, e=None):
+        """Tensions imposées par les sources idéales aux nœuds des supernœuds (..., n+1)"""
+        if e is None:
+            e = self.amplitudes()
+        e = np.asarray(e)
+        X0 = np.zeros(e.shape[:-1] + (self.n + 1,), dtype=np.result_type(e, float))
+        np.add.at(X0, (..., self.offset_nodes), self.offset_signs * e[..., self.offset_sources])
+        return X0
+
+    def rhs(self, y, e=None):
+        """Second membre : injections des sources de Norton, puis tensions des sources
+        idéales (lignes de branche) ou courants dus aux décalages des supernœuds"""
+        if e is None:
+            e = self.amplitudes()
+        y = np.asarray(y)
+        e = np.asarray(e)
+        N = self.size
+        I = np.zeros(np.broadcast_shapes(y.shape[:-1], e.shape[:-1]) + (N + 1,),
+                     dtype=np.result_type(y, e, float))
+        np.add.at(I, (..., self.src_rows),
+                  self.src_signs * e[..., self.src_positions] * y[..., self.src_slots])
+        if self.eliminate_sources:
+            # Courant imposé dans chaque dipôle par les décalages de tension
+            X0 = self.offsets(e)
+            p = self.passive
+            current = y[..., p] * (X0[..., self.node1[p]] - X0[..., self.node2[p]])
+            np.add.at(I, (..., self.row_of_node[self.node1[p]]), -current)
+            np.add.at(I, (..., self.row_of_node[self.node2[p]]), current)
+            np.add.at(I, (..., self.row_of_node[self.block_row_nodes]),
+                      -y[..., self.block_slots] * X0[..., self.block_col_nodes])
+        else:
+            I[..., self.n:N] = e[..., self.ideal]
+        return I[..., :N]
+
+    def source_rhs_map(self, y):
+        """Second membre sous forme creuse, linéaire en e pour des admittances `y` fixées :
+        (lignes, positions des sources, poids), soit I[lignes] += poids * e[positions]"""
+        B = self.rhs(y, np.eye(len(self.sources)))
+        positions, rows = np.nonzero(B)
+        return rows, positions, B[positions, rows]
+
+    def offset_matrix(self):
+        """Matrice (n+1, k) des décalages de tension dus aux sources idéales"""
+        return self.offsets(np.eye(len(self.sources))).T
+
+    def assemble(self, y, e=None):
+        """Construit la matrice du système et le second membre à partir des admittances"""
+        return self.matrix(y), self.rhs(y, e)
+
+    def solve_stacked(self, y, e=None, sparse=False, ordering="amd", chunk=None):
+        """Résout les systèmes définis par les lignes d'admittances `y` (B, m) et de tensions
+        de sources `e` (B, k) ; retourne les tensions complètes (B, n+1).
+        En dense, les systèmes sont résolus par paquets empilés (B, N, N) de taille bornée."""
+        y = np.asarray(y)
+        if e is None:
+            e = self.amplitudes()
+        e = np.broadcast_to(e, (len(y), len(self.sources)))
+        x = np.empty((len(y), self.size), dtype=complex)
+        if sparse:
+            for k in range(len(y)):
+                factor = factorize(self, y[k], "sparse", ordering=ordering, check=False)
+                x[k] = factor.solve(self.rhs(y[k], e[k]))
+        else:
+            chunk = chunk or max(1, 2 ** 26 // (16 * max(self.size, 1) ** 2))
+            for start in range(0, len(y), chunk):
+                part = slice(start, start + chunk)
+                Y, I = self.assemble(y[part], e[part])
+                x[part] = np.linalg.solve(Y, I[..., None])[..., 0]
+        return self.full_voltages(x, e)
+
+    def incidence(self, slots):
+        """Colonnes d'incidence (+1 en node1, -1 en node2) des composants `slots`,
+        exprimées sur les lignes du système"""
+        slots = np.asarray(slots, dtype=np.intp)
+        U = np.zeros((self.size + 1, len(slots)))
+        columns = np.arange(len(slots))
+        np.add.at(U, (self.row_of_node[self.node1[slots]], columns), 1)
+        np.add.at(U, (self.row_of_node[self.node2[slots]], columns), -1)
+        return U[:self.size]
+
+    def full_voltages(self, x, e=None):
+        """Tensions de tous les nœuds (..., n+1) à partir de la solution `x` du système,
+        le nœud de référence (indice n) étant à 0"""
+        x = np.asarray(x)
+        padded = np.concatenate([x, np.zeros(x.shape[:-1] + (1,), dtype=x.dtype)], axis=-1)
+        V = padded[..., self.row_of_node]
+        if len(self.offset_nodes):
+            V = V + self.offsets(e)
+        return V
+
+    def source_currents(self, x, V, y, e=None):
+        """Courants des sources idéales, de node1 vers node2 à travers la source"""
+        if not self.eliminate_sources:
+            return x[self.n:self.size]
+        if e is None:
+            e = self.amplitudes()
+
+        # Courant sortant de chaque nœud par les dipôles ; une source de Norton débite (V - E) y
+        p = self.passive
+        current = y[p] * (V[self.node1[p]] - V[self.node2[p]])
+        norton = self.sources[self.norton]
+        current[np.searchsorted(p, norton)] -= y[norton] * e[self.norton]
+        residual = np.zeros(self.n + 1, dtype=complex)
+        np.add.at(residual, self.node1[p], current)
+        np.add.at(residual, self.node2[p], -current)
+        np.add.at(residual, self.block_row_nodes, y[self.block_slots] * V[self.block_col_nodes])
+
+        # Des feuilles vers les racines : chaque source équilibre la loi des nœuds de son enfant
+        currents = np.zeros(len(self.sources), dtype=complex)
+        for node, parent, j in reversed(self.tree):
+            leaving = -residual[node]
+            currents[j] = leaving if self.node1[self.sources[j]] == node else -leaving
+            residual[parent] -= leaving
+        return currents[self.ideal]
@@ -1,18 +1,95 @@
 import numpy as np
+from .store import KINDS, RowStore
+
+
+def _column(field, doc, optional=False, real_if_zero=False):
+    """Propriété lisant et écrivant la colonne `field` du stockage (NaN pour None si
+    `optional`, réel si la partie imaginaire est nulle avec `real_if_zero`)"""
+    def get(self):
+        value = self._store.get(field, self._index)
+        if isinstance(value, np.generic):
+            value = value.item()
+        if optional and value != value:
+            return None
+        if real_if_zero and isinstance(value, complex) and value.imag == 0:
+            return value.real
+        return value
+
+    def set(self, value):
+        self._store.set(field, self._index, np.nan if value is None else value)
+
+    return property(get, set, doc=doc)
+
 
 class Component:
-    """Classe de base pour les composants électriques"""
+    """Classe de base pour les composants électriques.
+    Vue sur une ligne du stockage en colonnes d'un circuit (voir ComponentStore) : un
+    composant créé seul a son propre stockage d'une ligne, repris par add_component."""
+    __slots__ = ("_store", "_index")
+    _kind = None  # Code du type de composant utilisé par le circuit compilé
+    _firstorder = False
+    # Attributs rares, conservés hors des colonnes
+    _defaults = {"phase": 0, "unit": None, "A_imp": None}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls._kind is not None:
+            KINDS.setdefault(cls._kind, cls)
+
     def __init__(self, value, name=None):
-        self.value = value
-        self.name = name
-        self.phase = 0
-        self.cplx_imp = None
-        self.unit = None
-        self.voltage = 0
-        self.current = 0
-        self._firstorder = False
-        self.A_imp = None
-        self.nodes = [None, None]  # Nœuds auxquels le composant est connecté
+        object.__setattr__(self, "_store", RowStore(self._kind, value, name, self))
+        object.__setattr__(self, "_index", 0)
+
+    value = _column("value", "Valeur du composant (R, C, L ou résistance interne)")
+    voltage = _column("voltage", "Tension node1 - node2")
+    current = _column("current", "Courant de node1 vers node2", optional=True)
+    cplx_imp = _column("impedance", "Impédance complexe", optional=True)
+
+    @property
+    def name(self):
+        return self._store.name_of(self._index)
+
+    @name.setter
+    def name(self, name):
+        self._store.rename(self._index, name)
+
+    @property
+    def nodes(self):
+        """Nœuds auxquels le composant est connecté"""
+        store, i = self._store, self._index
+        return [store.node_of(store.get("node1", i)), store.node_of(store.get("node2", i))]
+
+    @nodes.setter
+    def nodes(self, nodes):
+        store, i = self._store, self._index
+        store.set("node1", i, store.node_id(nodes[0]))
+        store.set("node2", i, store.node_id(nodes[1]))
+        if store.owned:
+            store.version += 1
+
+    def __getattr__(self, name):
+        # Appelé seulement si l'attribut n'est ni une colonne ni un attribut de classe
+        if name.startswith("__") or name in Component.__slots__:
+            raise AttributeError(name)
+        extras = self._store.extras.get(self._index)
+        if extras is not None and name in extras:
+            return extras[name]
+        try:
+            return type(self)._defaults[name]
+        except KeyError:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'") from None
+
+    def __setattr__(self, name, value):
+        if name in Component.__slots__ or isinstance(getattr(type(self), name, None), property):
+            object.__setattr__(self, name, value)
+        else:
+            self._store.extras_of(self._index)[name] = value
+
+    @property
+    def uid(self):
+        """Identifiant unique, conservé quand le composant change de stockage"""
+        return int(self._store.get("uid", self._index))
+
     def get_I(self, f=0):
         """Calcule le courant traversant le composant"""
         pass
@@ -24,9 +101,6 @@ class Component:
     def connect(self, node1, node2):
         """Connecte le composant à deux nœuds du circuit"""
         self.nodes = [node1, node2]
-        # Ajouter ce composant à la liste des composants connectés à chaque nœud
-        node1.connect(self)
-        node2.connect(self)
         
     def __str__(self):
         if hasattr(self, 'source_voltage'):
@@ -36,10 +110,12 @@ class Component:
         
 class Resistor(Component):
     """Sous classe de composant : résistance"""
+    __slots__ = ()
+    _kind = "R"
+
     def __init__(self, R, name=None):
         super().__init__(R, name)
         self.cplx_imp = R
-        self.phase = 0
     
     def calc_I(self, f=0):  # Ajout du paramètre f avec une valeur par défaut
         self.current = self.voltage/self.value
@@ -50,9 +126,12 @@ class Resistor(Component):
     
 class Capacitor(Component):
     """Sous classe de composant : condensateur"""
+    __slots__ = ()
+    _kind = "C"
+    _defaults = {**Component._defaults, "phase": -1j}
+
     def __init__(self, C, name=None):
         super().__init__(C, name)
-        self.phase = -1j
     def calc_I(self,f):
         if f != 0:
             self.current = self.voltage/self.cplx_imp
@@ -71,15 +150,17 @@ class Capacitor(Component):
     
 class Inductor(Component):
     """Sous classe de composant : bobine"""
+    __slots__ = ()
+    _kind = "L"
+    _defaults = {**Component._defaults, "phase": 1j}
+
     def __init__(self, L, name=None):
         super().__init__(L, name)
-        self.phase = 1j
     def calc_I(self,f):
         self.get_imp_cplx(f)
         if f != 0:
             self.current = self.voltage/self.cplx_imp
-        else :
-            self.current = None
+        # En continu l'impédance est nulle : le courant est celui fourni par la résolution
         return self.current
     
     def get_imp_cplx(self, f):
@@ -88,29 +169,109 @@ class Inductor(Component):
             return self.cplx_imp  # Retourner directement la valeur
     
 class VoltageSource(Component):
-    def __init__(self, voltage, f=0, internal_resistance=0, name=None):
+    """Sous classe de composant : source de tension"""
+    __slots__ = ()
+    _kind = "V"
+    _firstorder = True
+    _defaults = {**Component._defaults, "waveform": None}  # Forme d'onde v(t) pour l'analyse temporelle
+
+    def __init__(self, voltage, f=0, internal_resistance=0, name=None, waveform=None):
         super().__init__(internal_resistance, name)
         self.source_voltage = voltage
-        self.r_int = internal_resistance
         self.freq = f
-        self._firstorder = True
+        if waveform is not None:
+            self.waveform = waveform
+
+    source_voltage = _column("amplitude", "Tension de la source (phaseur)", real_if_zero=True)
+    freq = _column("freq", "Fréquence de la source (0 pour le continu)")
+    r_int = _column("value", "Résistance interne")
         
     def set_frequency(self, f):
         self.freq = f
+
+    def voltage_at(self, t):
+        """Tension instantanée : forme d'onde si définie, sinon amplitude * sin(ωt + phase)"""
+        t = np.asarray(t, dtype=float)
+        if self.waveform is not None:
+            return np.broadcast_to(np.asarray(self.waveform(t), dtype=float), t.shape)
+        if self.freq == 0:
+            return np.full(t.shape, np.real(self.source_voltage))
+        return np.imag(self.source_voltage * np.exp(2j * np.pi * self.freq * t))
         
     def get_imp_cplx(self,f):
         return complex(self.value, 0)
     
     def calc_I(self,f):
         """Calcule le courant à travers la source de tension"""
-        # Pour une source de tension idéale, le courant est déterminé 
-        # par le reste du circuit et non par la source elle-même
-        # Cependant, si une résistance interne est spécifiée, on peut calculer:
+        # Avec une résistance interne, le courant (de node1 vers node2 à travers la source)
+        # se déduit de la chute de tension dans cette résistance
         if self.r_int > 0:
-            self.current = self.voltage / self.r_int
+            self.current = (self.voltage - self.source_voltage) / self.r_int
         else:
-            # Pour une source idéale, le courant est défini par le circuit
-            # Cette valeur sera mise à jour correctement après résolution complète
+            # Pour une source idéale, le courant de branche est fourni par la résolution (MNA)
             pass
         
-        return self.current
\ No newline at end of file
+        return self.current
+
+class Switch(Component):
+    """Sous classe de composant : interrupteur.
+    Fermé, il vaut r_on (1 mΩ par défaut) ; ouvert, r_off.
+    r_on doit être strictement positif et fini : une résistance nulle rendrait la matrice
+    nodale singulière (pour un court-circuit parfait, relier directement les nœuds).
+    Avec `period`, l'état suit une commande périodique : fermé pendant la fraction
+    `duty` de chaque période, à partir de `delay`."""
+    __slots__ = ()
+    _kind = "S"
+
+    def __init__(self, closed=False, name=None, r_on=1e-3, r_off=1e12, period=None, duty=0.5, delay=0):
+        super().__init__(r_on, name)
+        self.r_on = r_on
+        self.r_off = r_off
+        self.closed = closed
+        self.period = period
+        self.duty = duty
+        self.delay = delay
+
+    @property
+    def value(self):
+        """Résistance correspondant à l'état actuel"""
+        return self.r_on if self.closed else self.r_off
+
+    @value.setter
+    def value(self, resistance):
+        """Modifie la résistance de l'état actuel : r_on si fermé, r_off si ouvert"""
+        if self.closed:
+            self.r_on = resistance
+        else:
+            self.r_off = resistance
+
+    _r_on = _column("value", "Résistance à l'état fermé")
+
+    @property
+    def r_on(self):
+        """Résistance à l'état fermé"""
+        return self._r_on
+
+    @r_on.setter
+    def r_on(self, r_on):
+        if not 0 < r_on < np.inf:
+            raise ValueError(f"La résistance à l'état fermé doit être strictement positive et finie: {r_on}")
+        self._r_on = r_on
+
+    def toggle(self):
+        self.closed = not self.closed
+
+    def state_at(self, t):
+        """État (fermé = True) aux instants `t` ; constant sans commande périodique"""
+        t = np.asarray(t, dtype=float)
+        if self.period is None:
+            return np.full(t.shape, bool(self.closed))
+        return np.mod(t - self.delay, self.period) < self.duty * self.period
+
+    def get_imp_cplx(self, f=0):
+        return complex(self.value, 0)
+
+    def calc_I(self, f=0):
+        if self.value != 0:
+            self.current = self.voltage / self.value
+        return self.current
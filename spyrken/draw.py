@@ -1,68 +1,59 @@
 from .components import *
 from .circuit import *
+import logging
 import numpy as np
+import matplotlib
 import matplotlib.pyplot as plt
 from matplotlib.lines import Line2D
 from matplotlib.animation import FuncAnimation
+from matplotlib.collections import LineCollection
 from matplotlib.widgets import Button, Slider
-from matplotlib.patches import FancyArrowPatch
-from tqdm import tqdm
-    
-def voltage_phasors(self, duration=10, fps=60, theme='light'):
-    """
-    Version haute performance de l'animation des vecteurs tournants.
-    """
-    
-    # Configuration du thème
-    if theme == 'dark':
-        plt.style.use('dark_background')
-        grid_color = 'gray'
-        text_color = 'white'
-        bg_color = '#1e1e1e'
-        button_color = '#444444'
-        button_text_color = 'white'
-        button_hover_color = '#666666'
-    else:
-        plt.style.use('default')
-        grid_color = 'lightgray'
-        text_color = 'black'
-        bg_color = 'white'
-        button_color = '#e0e0e0'
-        button_text_color = 'black'
-        button_hover_color = '#f0f0f0'
-    
-    # Créer une figure optimisée
-    plt.rcParams['path.simplify'] = True
-    plt.rcParams['path.simplify_threshold'] = 1.0
-    
-    fig = plt.figure(figsize=(10, 8), facecolor=bg_color, dpi=100)
-    plt.subplots_adjust(bottom=0.25)
-    ax = fig.add_subplot(111)
+
+# Couleurs des diagrammes de Fresnel selon le thème
+_THEMES = {
+    'dark': dict(style='dark_background', grid_color='gray', text_color='white', bg_color='#1e1e1e',
+                 button_color='#444444', button_text_color='white', button_hover_color='#666666'),
+    'light': dict(style='default', grid_color='lightgray', text_color='black', bg_color='white',
+                  button_color='#e0e0e0', button_text_color='black', button_hover_color='#f0f0f0'),
+}
+
+_COMPONENT_COLORS = {
+    Resistor: '#FF5733',
+    Capacitor: '#33A1FF',
+    Inductor: '#33FF57',
+    VoltageSource: '#FF33A1'
+}
+
+
+def _speed_label(speed):
+    percentage = speed * 100
+    if percentage >= 100:
+        return f"Vitesse: {percentage:.0f}%"
+    elif percentage >= 10:
+        return f"Vitesse: {percentage:.1f}%"
+    return f"Vitesse: {percentage:.2e}%"
+
+
+def _phasor_scene(self, ax, theme, arrows):
+    """Dessine le diagramme de Fresnel statique dans `ax` et prépare les artistes animés.
+    Tous les vecteurs sont dans un seul artiste (quiver avec `arrows`, sinon LineCollection
+    et têtes en nuage de points). Retourne (phaseurs, dessin, artistes animés, texte de
+    vitesse), où dessin(P, t) place les phaseurs tournés P à l'instant t."""
+    grid_color, text_color, bg_color = theme['grid_color'], theme['text_color'], theme['bg_color']
     
     # Collecter les tensions
-    original_voltages = []
+    voltages = []
     labels = []
     colors = []
-    
-    component_colors = {
-        Resistor: '#FF5733',
-        Capacitor: '#33A1FF',
-        Inductor: '#33FF57',
-        VoltageSource: '#FF33A1'
-    }
-    
     for component in self.components:
         if hasattr(component, 'voltage') and component.voltage is not None:
-            voltage = component.voltage
-            if not isinstance(voltage, complex):
-                voltage = complex(voltage, 0)
-                
-            original_voltages.append(voltage)
+            voltages.append(complex(component.voltage))
             labels.append(component.name)
-            colors.append(component_colors.get(type(component), '#AAAAAA'))
+            colors.append(_COMPONENT_COLORS.get(type(component), '#AAAAAA'))
+    V = np.array(voltages, dtype=complex)
     
     # Calculer l'échelle du graphique
-    max_magnitude = max([abs(v) for v in original_voltages]) * 1.2 if original_voltages else 10
+    max_magnitude = np.max(np.abs(V)) * 1.2 if len(V) and np.any(V) else 10
     
     # Configurer les axes
     ax.set_xlim(-max_magnitude, max_magnitude)
@@ -82,30 +73,23 @@ def voltage_phasors(self, duration=10, fps=60, theme='light'):
         ax.text(radius*0.7, radius*0.7, f"{radius:.1f}V", 
             color=text_color, alpha=0.7, fontsize=8)
     
-    # Utiliser FancyArrowPatch pour des flèches qui ne tournent pas
-    arrows = []
-    label_texts = []
-    info_texts = []
-    
-    for color in colors:
-        # Créer une flèche élégante avec FancyArrowPatch
-        arrow = FancyArrowPatch(
-            (0, 0), (0, 0),
-            arrowstyle='-|>',
-            mutation_scale=15,  # Taille de la tête de flèche
-            lw=2,
-            color=color,
-            zorder=3
-        )
-        ax.add_patch(arrow)
-        arrows.append(arrow)
-        
-        # Textes
-        label_text = ax.text(0, 0, "", fontsize=9, color=color, fontweight='bold')
-        info_text = ax.text(0, 0, "", fontsize=8, color=color)
-        
-        label_texts.append(label_text)
-        info_texts.append(info_text)
+    # Vecteurs : un seul artiste pour tous les composants
+    zeros = np.zeros(len(V))
+    if arrows:
+        vectors = ax.quiver(zeros, zeros, V.real, V.imag, color=colors, angles='xy',
+                            scale_units='xy', scale=1, width=0.004, zorder=3)
+        heads = None
+    else:
+        segments = np.zeros((len(V), 2, 2))
+        vectors = LineCollection(segments, colors=colors, linewidths=2, capstyle='round', zorder=3)
+        ax.add_collection(vectors)
+        heads = ax.scatter(V.real, V.imag, s=64, c=colors, marker='.', zorder=3)
+    
+    # Textes
+    label_texts = [ax.text(0, 0, label, fontsize=9, color=color, fontweight='bold')
+                   for label, color in zip(labels, colors)]
+    info_texts = [ax.text(0, 0, "", fontsize=8, color=color) for color in colors]
+    magnitudes = [f"{magnitude:.2f}V ∠" for magnitude in np.abs(V)]
     
     # Légende
     legend_elements = [Line2D([0], [0], color=color, lw=2, label=label) 
@@ -127,257 +111,78 @@ def voltage_phasors(self, duration=10, fps=60, theme='light'):
     ax.set_title(f"Diagramme de Fresnel animé à {self.freq} Hz", 
             fontsize=14, color=text_color, fontweight='bold')
     
-    # État de l'animation
-    animation_running = [False]  # Commence en pause
-    speed_factor = [1.0]
-    elapsed_time = [0.0]
+    offset = 0.05 * max_magnitude
     
-    # Fonction d'animation
-    def animate(frame):
-        # Mettre à jour le temps seulement si l'animation est en cours
-        if animation_running[0]:
-            delta_t = 1.0 / fps * speed_factor[0]
-            elapsed_time[0] += delta_t
-        t = elapsed_time[0]
-        
-        # Mettre à jour le texte de temps
-        time_text.set_text(f"t = {t:.3e} s")
-        
-        # Facteur de rotation (wt)
-        omega = 2 * np.pi * self.freq
-        rotation = np.exp(1j * omega * t)
-        
-        for i, voltage in enumerate(original_voltages):
-            # Rotation du vecteur
-            rotated_voltage = voltage * rotation
-            x, y = rotated_voltage.real, rotated_voltage.imag
-            
-            # Mise à jour de la flèche - FancyArrowPatch maintient l'orientation correcte
-            arrows[i].set_positions((0, 0), (x, y))
-            
-            # Mise à jour textes
-            label_texts[i].set_position((x*1.1, y*1.1))
-            label_texts[i].set_text(labels[i])
-            
-            magnitude = abs(voltage)
-            phase = np.angle(rotated_voltage)
-            info_texts[i].set_text(f"{magnitude:.2f}V ∠{np.degrees(phase):.1f}°")
-            
-            offset = 0.05 * max_magnitude
-            text_x = x + offset * np.cos(phase + np.pi/2)
-            text_y = y + offset * np.sin(phase + np.pi/2)
-            info_texts[i].set_position((text_x, text_y))
-        
-        # Note: FancyArrowPatch n'est pas inclus dans le retour car blit=False
-        return label_texts + info_texts + [time_text, speed_text]
-    
-    # Fonction pour le bouton Play/Pause
-    def toggle_animation(event):
-        animation_running[0] = not animation_running[0]
-        if animation_running[0]:
-            play_button.label.set_text('Pause')
+    def draw(P, t):
+        # Positions et angles de tous les phaseurs en une fois ; seuls les textes
+        # demandent encore un appel par composant
+        x, y = P.real, P.imag
+        if arrows:
+            vectors.set_UVC(x, y)
         else:
-            play_button.label.set_text('Play')
-    
-    # Fonction pour le slider de vitesse
-    def update_speed(val):
-        speed_factor[0] = 10 ** val
-        percentage = speed_factor[0] * 100
-        
-        if percentage >= 100:
-            speed_text.set_text(f"Vitesse: {percentage:.0f}%")
-        elif percentage >= 10:
-            speed_text.set_text(f"Vitesse: {percentage:.1f}%")
-        else:
-            speed_text.set_text(f"Vitesse: {percentage:.2e}%")
-    
-    # Fonction pour le bouton Reset
-    def reset_animation(event):
-        elapsed_time[0] = 0.0
-    
-    # Ajouter bouton Play/Pause
-    play_ax = plt.axes([0.4, 0.05, 0.1, 0.04])
-    play_button = Button(play_ax, 'Play', color=button_color, hovercolor=button_hover_color)
-    play_button.label.set_color(button_text_color)
-    play_button.on_clicked(toggle_animation)
-    
-    # Ajouter bouton Reset
-    reset_ax = plt.axes([0.55, 0.05, 0.1, 0.04])
-    reset_button = Button(reset_ax, 'Reset', color=button_color, hovercolor=button_hover_color)
-    reset_button.label.set_color(button_text_color)
-    reset_button.on_clicked(reset_animation)
-    
-    # Ajouter slider pour la vitesse
-    speed_ax = plt.axes([0.2, 0.12, 0.6, 0.03])
-    speed_slider = Slider(speed_ax, 'Vitesse (log)', -8, 0.7, valinit=0, valstep=0.1)
-    speed_slider.on_changed(update_speed)
-    # Créer l'animation - désactive le blitting pour les FancyArrowPatch
-    anim = FuncAnimation(fig, animate, interval=1000/fps, blit=False, 
-                        save_count=fps*duration)
-    
-    plt.show()
-    
-def voltage_phasors2(self, duration=10, fps=60, theme='light'):
-    """
-    Version haute performance de l'animation des vecteurs tournants.
-    """
+            segments[:, 1, 0] = x
+            segments[:, 1, 1] = y
+            vectors.set_segments(segments)
+            heads.set_offsets(np.column_stack((x, y)))
+        phase = np.angle(P)
+        degrees = np.degrees(phase)
+        label_xy = np.column_stack((x, y)) * 1.1
+        info_xy = np.column_stack((x - offset * np.sin(phase), y + offset * np.cos(phase)))
+        for i in range(len(P)):
+            label_texts[i].set_position(label_xy[i])
+            info_texts[i].set_text(f"{magnitudes[i]}{degrees[i]:.1f}°")
+            info_texts[i].set_position(info_xy[i])
+        time_text.set_text(f"t = {t:.3e} s")
     
-    # Configuration du thème
-    if theme == 'dark':
-        plt.style.use('dark_background')
-        grid_color = 'gray'
-        text_color = 'white'
-        bg_color = '#1e1e1e'
-        button_color = '#444444'
-        button_text_color = 'white'
-        button_hover_color = '#666666'
-    else:
-        plt.style.use('default')
-        grid_color = 'lightgray'
-        text_color = 'black'
-        bg_color = 'white'
-        button_color = '#e0e0e0'
-        button_text_color = 'black'
-        button_hover_color = '#f0f0f0'
+    artists = [vectors] + ([heads] if heads is not None else []) + label_texts + info_texts + [time_text, speed_text]
+    return V, draw, artists, speed_text
+
+
+def _phasor_animation(self, duration, fps, theme, arrows, output, speed, dpi):
+    theme = _THEMES['dark' if theme == 'dark' else 'light']
+    omega = 2 * np.pi * self.freq
+    
+    if output is not None:
+        # Rendu hors écran : toutes les trames sont calculées d'avance en tableaux, puis
+        # rendues par Agg sur le fond statique dessiné une fois
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from .render import export_frames
+        with matplotlib.style.context(theme['style']):
+            fig = Figure(figsize=(10, 8), facecolor=theme['bg_color'], dpi=dpi)
+            FigureCanvasAgg(fig)
+            ax = fig.add_subplot(111)
+            V, draw, artists, speed_text = _phasor_scene(self, ax, theme, arrows)
+            speed_text.set_text(_speed_label(speed))
+            t = np.arange(int(duration * fps)) / fps * speed
+            P = V[None, :] * np.exp(1j * omega * t)[:, None]
+            return export_frames(fig, artists, lambda k: draw(P[k], t[k]), len(t), output, fps)
+    
+    plt.style.use(theme['style'])
     
     # Créer une figure optimisée
     plt.rcParams['path.simplify'] = True
     plt.rcParams['path.simplify_threshold'] = 1.0
     
-    fig = plt.figure(figsize=(10, 8), facecolor=bg_color, dpi=100)
+    fig = plt.figure(figsize=(10, 8), facecolor=theme['bg_color'], dpi=dpi)
     plt.subplots_adjust(bottom=0.25)
     ax = fig.add_subplot(111)
-    
-    # Collecter les tensions
-    original_voltages = []
-    labels = []
-    colors = []
-    
-    # Utiliser les mêmes couleurs que la version originale
-    component_colors = {
-        Resistor: '#FF5733',
-        Capacitor: '#33A1FF',
-        Inductor: '#33FF57',
-        VoltageSource: '#FF33A1'
-    }
-    
-    for component in self.components:
-        if hasattr(component, 'voltage') and component.voltage is not None:
-            voltage = component.voltage
-            if not isinstance(voltage, complex):
-                voltage = complex(voltage, 0)
-                
-            original_voltages.append(voltage)
-            labels.append(component.name)
-            colors.append(component_colors.get(type(component), '#AAAAAA'))
-    
-    # Calculer l'échelle du graphique
-    max_magnitude = max([abs(v) for v in original_voltages]) * 1.2 if original_voltages else 10
-    
-    # Configurer les axes
-    ax.set_xlim(-max_magnitude, max_magnitude)
-    ax.set_ylim(-max_magnitude, max_magnitude)
-    ax.set_aspect('equal')
-    
-    # Dessiner les éléments statiques
-    ax.axhline(y=0, color=grid_color, linestyle='-', alpha=0.5, linewidth=1.5)
-    ax.axvline(x=0, color=grid_color, linestyle='-', alpha=0.5, linewidth=1.5)
-    ax.grid(True, alpha=0.3, color=grid_color, linestyle='--')
-    
-    # Cercles de magnitude
-    circle_radii = np.linspace(max_magnitude/4, max_magnitude, 4)
-    for radius in circle_radii:
-        circle = plt.Circle((0, 0), radius, fill=False, color=grid_color, alpha=0.3, linestyle='--')
-        ax.add_artist(circle)
-        ax.text(radius*0.7, radius*0.7, f"{radius:.1f}V", 
-            color=text_color, alpha=0.7, fontsize=8)
-    
-    # Préparer les objets pour l'animation
-    lines = []        # Corps des vecteurs
-    arrow_heads = []  # Têtes de flèches
-    label_texts = []  # Noms des composants
-    info_texts = []   # Informations de magnitude/phase
-    
-    for i, color in enumerate(colors):
-        # Ligne principale du vecteur
-        line, = ax.plot([0, 0], [0, 0], color=color, lw=2, solid_capstyle='round')
-        lines.append(line)
-        
-        # Tête de flèche
-        arrow_head, = ax.plot([0], [0], marker='.', color=color, markersize=8)
-        arrow_heads.append(arrow_head)
-        
-        # Textes
-        label_text = ax.text(0, 0, labels[i], fontsize=9, color=color, fontweight='bold')
-        info_text = ax.text(0, 0, "", fontsize=8, color=color)
-        
-        label_texts.append(label_text)
-        info_texts.append(info_text)
-    
-    # Légende
-    legend_elements = [Line2D([0], [0], color=color, lw=2, label=label) 
-                    for label, color in zip(labels, colors)]
-    ax.legend(handles=legend_elements, loc='upper right', framealpha=0.7)
-    
-    # Textes d'information
-    time_text = ax.text(0.02, 0.95, "t = 0.000 s", transform=ax.transAxes, 
-                    fontsize=10, color=text_color,
-                    bbox=dict(facecolor=bg_color, alpha=0.8, edgecolor='none'))
-    
-    speed_text = ax.text(0.02, 0.90, "Vitesse: 100%", transform=ax.transAxes, 
-                    fontsize=10, color=text_color,
-                    bbox=dict(facecolor=bg_color, alpha=0.8, edgecolor='none'))
-    
-    # Titre et étiquettes
-    ax.set_xlabel('Partie réelle (V)', color=text_color)
-    ax.set_ylabel('Partie imaginaire (V)', color=text_color)
-    ax.set_title(f"Diagramme de Fresnel animé à {self.freq} Hz", 
-            fontsize=14, color=text_color, fontweight='bold')
+    V, draw, artists, speed_text = _phasor_scene(self, ax, theme, arrows)
     
     # État de l'animation
     animation_running = [False]  # Commence en pause
-    speed_factor = [1.0]
+    speed_factor = [speed]
     elapsed_time = [0.0]
+    speed_text.set_text(_speed_label(speed))
     
-    # Fonction d'animation
+    # Fonction d'animation : une seule multiplication complexe fait tourner tous les phaseurs
     def animate(frame):
         # Mettre à jour le temps seulement si l'animation est en cours
         if animation_running[0]:
-            delta_t = 1.0 / fps * speed_factor[0]
-            elapsed_time[0] += delta_t
+            elapsed_time[0] += 1.0 / fps * speed_factor[0]
         t = elapsed_time[0]
-        
-        # Mettre à jour le texte de temps
-        time_text.set_text(f"t = {t:.3e} s")
-        
-        # Facteur de rotation (wt)
-        omega = 2 * np.pi * self.freq
-        rotation = np.exp(1j * omega * t)  # Utiliser la formule complexe exacte
-        
-        for i, voltage in enumerate(original_voltages):
-            # Rotation du vecteur (maintenir la formule originale)
-            rotated_voltage = voltage * rotation
-            x, y = rotated_voltage.real, rotated_voltage.imag
-            
-            # Mise à jour vecteur
-            lines[i].set_data([0, x], [0, y])
-            arrow_heads[i].set_data([x], [y])
-            
-            # Mise à jour textes
-            label_texts[i].set_position((x*1.1, y*1.1))
-            
-            # Calculer et mettre à jour les informations
-            magnitude = abs(voltage)
-            phase = np.angle(rotated_voltage)
-            info_texts[i].set_text(f"{magnitude:.2f}V ∠{np.degrees(phase):.1f}°")
-            
-            offset = 0.05 * max_magnitude
-            text_x = x + offset * np.cos(phase + np.pi/2)
-            text_y = y + offset * np.sin(phase + np.pi/2)
-            info_texts[i].set_position((text_x, text_y))
-        
-        # Retourner tous les objets à mettre à jour
-        return lines + arrow_heads + label_texts + info_texts + [time_text, speed_text]
+        draw(V * np.exp(1j * omega * t), t)
+        return artists
     
     # Fonction pour le bouton Play/Pause
     def toggle_animation(event):
@@ -390,15 +195,7 @@ def voltage_phasors2(self, duration=10, fps=60, theme='light'):
     # Fonction pour le slider de vitesse
     def update_speed(val):
         speed_factor[0] = 10 ** val
-        percentage = speed_factor[0] * 100
-        
-        # Format selon la magnitude
-        if percentage >= 100:
-            speed_text.set_text(f"Vitesse: {percentage:.0f}%")
-        elif percentage >= 10:
-            speed_text.set_text(f"Vitesse: {percentage:.1f}%")
-        else:
-            speed_text.set_text(f"Vitesse: {percentage:.2e}%")
+        speed_text.set_text(_speed_label(speed_factor[0]))
     
     # Fonction pour le bouton Reset
     def reset_animation(event):
@@ -406,78 +203,60 @@ def voltage_phasors2(self, duration=10, fps=60, theme='light'):
     
     # Ajouter bouton Play/Pause
     play_ax = plt.axes([0.4, 0.05, 0.1, 0.04])
-    play_button = Button(play_ax, 'Play', color=button_color, hovercolor=button_hover_color)
-    play_button.label.set_color(button_text_color)
+    play_button = Button(play_ax, 'Play', color=theme['button_color'], hovercolor=theme['button_hover_color'])
+    play_button.label.set_color(theme['button_text_color'])
     play_button.on_clicked(toggle_animation)
     
     # Ajouter bouton Reset
     reset_ax = plt.axes([0.55, 0.05, 0.1, 0.04])
-    reset_button = Button(reset_ax, 'Reset', color=button_color, hovercolor=button_hover_color)
-    reset_button.label.set_color(button_text_color)
+    reset_button = Button(reset_ax, 'Reset', color=theme['button_color'], hovercolor=theme['button_hover_color'])
+    reset_button.label.set_color(theme['button_text_color'])
     reset_button.on_clicked(reset_animation)
     
     # Ajouter slider pour la vitesse
     speed_ax = plt.axes([0.2, 0.12, 0.6, 0.03])
-    speed_slider = Slider(speed_ax, 'Vitesse (log)', -8, 0.7, valinit=0, valstep=0.1)
+    speed_slider = Slider(speed_ax, 'Vitesse (log)', -8, 0.7, valinit=np.log10(speed), valstep=0.1)
     speed_slider.on_changed(update_speed)
     
-    
-    # Créer l'animation optimisée
+    # Créer l'animation avec blitting : seuls les vecteurs et les textes sont redessinés
     anim = FuncAnimation(fig, animate, interval=1000/fps, blit=True, 
                         cache_frame_data=False, save_count=fps*duration)
     
     plt.show()
+    return anim
 
-def plot_bode(self,from_node,to_node,freq_range,show_phase=True):
-    """ Génère un diagramme de Bode 
-    Utilisation : Tel une sonde oscilloscope, il faut partir d'une référence (from, souvent GND) vers une comparaison (to)"""
-    gains = []
-    phases = []
-    frequencies = freq_range
-
-    sources = [c for c in self.components if isinstance(c, VoltageSource)]
-
-    for freq in tqdm(frequencies) :
-        self.freq = freq
-        for source in sources:
-            source.freq = freq
-        
-        self.solve()
-
-        Vfn = from_node.voltage
-        Vtn = to_node.voltage
-
-        V = Vtn - Vfn
-        v_ref = sources[0].source_voltage
-
-        # Gain
-        if abs(v_ref) < 1e-12:
-            gain_db = -100
-        else:
-            gain = abs(V) / abs(v_ref)
-            gain_db = 20 * np.log10(gain) if gain > 0 else -100
-        
-        # Phase
+def voltage_phasors(self, duration=10, fps=60, theme='light', output=None, speed=1.0, dpi=100):
+    """
+    Version haute performance de l'animation des vecteurs tournants (flèches).
+    Avec `output` (.mp4, .gif ou .png), les `duration * fps` trames sont rendues sans
+    affichage et écrites dans ce fichier (voir render.export_frames), le temps avançant
+    de `speed / fps` par trame ; retourne alors le chemin écrit.
+    """
+    return _phasor_animation(self, duration, fps, theme, True, output, speed, dpi)
+    
+def voltage_phasors2(self, duration=10, fps=60, theme='light', output=None, speed=1.0, dpi=100):
+    """
+    Version haute performance de l'animation des vecteurs tournants (segments terminés
+    par un point). Mêmes options que voltage_phasors.
+    """
+    return _phasor_animation(self, duration, fps, theme, False, output, speed, dpi)
 
-        v1 = V if isinstance(V, complex) else complex(V, 0)
-        v2 = v_ref if isinstance(v_ref, complex) else complex(v_ref, 0)
-        phase = np.angle(v1/v2, deg=True)
+def _bode_figure(fig, frequencies, H, title, show_phase=True):
+    """Trace le diagramme de Bode de la réponse H dans `fig` ; retourne (phases, gains)"""
+    # Gain et phase
+    magnitude = np.abs(H)
+    with np.errstate(divide='ignore'):
+        gains = np.where(magnitude > 0, 20 * np.log10(magnitude), -100)
+    phases = np.angle(H, deg=True)
 
-        
-        
-        # Stocker les résultats
-        gains.append(gain_db)
-        phases.append(phase)
     # Créer les graphiques
     if show_phase:
-        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(10, 7), sharex=True)
-        plt.subplots_adjust(hspace=0.3)
+        ax1, ax2 = fig.subplots(2, 1, sharex=True)
+        fig.subplots_adjust(hspace=0.3)
     else:
-        fig, ax1 = plt.subplots(figsize=(10, 5))
+        ax1 = fig.subplots()
     
     # Graphique du gain
-    title = f"Tension entre {from_node.name} et {to_node.name}"
-
     ax1.semilogx(frequencies, gains, 'b-', linewidth=2)
     ax1.set_ylabel('Gain (dB)')
     ax1.set_title(title)
@@ -493,20 +272,119 @@ def plot_bode(self,from_node,to_node,freq_range,show_phase=True):
     else:
         ax1.set_xlabel('Fréquence (Hz)')
     
-    plt.tight_layout()
-    plt.show()
+    fig.tight_layout()
+    return phases, gains
+
+def plot_bode(self,from_node,to_node,freq_range,show_phase=True,adaptive=False,tol_db=0.5,tol_deg=2.0,analytic=False,
+              show=True,output=None):
+    """ Génère un diagramme de Bode 
+    Utilisation : Tel une sonde oscilloscope, il faut partir d'une référence (from, souvent GND) vers une comparaison (to)
+    En mode adaptatif, seules les bornes de freq_range sont utilisées et la grille est raffinée autour des résonances
+    En mode analytique, les pôles et zéros sont extraits une fois et la réponse est évaluée sans résoudre le circuit
+    Avec `output`, la figure est enregistrée dans ce fichier ; avec show=False, elle n'est pas affichée"""
+    frequencies = np.asarray(freq_range, dtype=float)
+
+    if analytic:
+        model = self.poles_zeros(from_node, to_node)
+        if model is None:
+            return
+        H = model.response(frequencies)
+    elif adaptive:
+        result = self.adaptive_frequency_response(frequencies.min(), frequencies.max(), (from_node, to_node),
+                                                  tol_db=tol_db, tol_deg=tol_deg)
+        if result is None:
+            return
+        frequencies, H = result
+    else:
+        H = self.frequency_response(frequencies, (from_node, to_node))
+        if H is None:
+            return
+
+    fig = plt.figure(figsize=(10, 7) if show_phase else (10, 5))
+    phases, gains = _bode_figure(fig, frequencies, H, f"Tension entre {from_node.name} et {to_node.name}", show_phase)
+    if output is not None:
+        fig.savefig(output)
+    if show:
+        plt.show()
+    else:
+        plt.close(fig)
     
     return frequencies, phases, gains
 
-def scope(self, from_node, to_node, interactive=True):
+def _waveform(t, V, freq, out=None):
+    """|V| sin(2πft + arg V) aux instants t (partie réelle constante en continu), écrit
+    dans `out` s'il est fourni"""
+    if out is None:
+        out = np.empty(np.shape(t))
+    if freq == 0:
+        out.fill(np.real(V))
+        return out
+    np.multiply(t, 2 * np.pi * freq, out=out)
+    np.add(out, np.angle(V), out=out)
+    np.sin(out, out=out)
+    out *= abs(V)
+    return out
+
+def _scope_info(V, freq):
+    """Mesures affichées par l'oscilloscope pour la tension V (phaseur)"""
+    if freq > 0:
+        amplitude = abs(V)
+        return '\n'.join((
+            f'Fréquence: {freq:.2f} Hz',
+            f'Période: {1/freq*1000:.2f} ms',
+            f'Amplitude: {amplitude:.3f} V',
+            f'Phase: {np.degrees(np.angle(V)):.1f}°',
+            f'V RMS: {amplitude/np.sqrt(2):.3f} V'
+        ))
+    return f'Tension DC: {np.real(V):.3f} V'
+
+def _scope_title(freq, from_name, to_name):
+    if freq > 0:
+        return f'Tension entre {from_name} et {to_name}'
+    return f'Tension DC entre {from_name} et {to_name}'
+
+def _scope_axes(ax):
+    """Habillage commun des oscillogrammes"""
+    ax.set_xlabel('Temps (s)')
+    ax.set_ylabel('Tension (V)')
+    ax.grid(True, alpha=0.3)
+    return ax.text(0.02, 0.95, '', transform=ax.transAxes, 
+                   fontsize=9, va='top', ha='left',
+                   bbox=dict(boxstyle='round', facecolor='white', alpha=0.7))
+
+def _scope_figure(fig, V, freq, reference, from_name, to_name, periods=3, points=1000):
+    """Oscillogramme statique dans `fig` : tension V (phaseur à `freq`) et, si fournie, la
+    référence (amplitude, fréquence) sur `periods` périodes (0,1 s en continu)"""
+    ax = fig.subplots()
+    t = np.linspace(0, periods / freq if freq > 0 else 0.1, points)
+    ax.plot(t, _waveform(t, V, freq), 'b-', linewidth=2, label=f'Tension {from_name}-{to_name}')
+    if reference is not None:
+        ax.plot(t, _waveform(t, *reference), 'r--', linewidth=1.5, label='Référence')
+    if freq > 0:
+        for i in range(1, int(periods) + 1):
+            ax.axvline(x=i / freq, color='gray', linestyle='--', alpha=0.3)
+    info_text = _scope_axes(ax)
+    info_text.set_text(_scope_info(V, freq))
+    ax.set_xlim(0, t[-1])
+    ax.set_title(_scope_title(freq, from_name, to_name))
+    ax.legend()
+    return ax
+
+def scope(self, from_node, to_node, interactive=True, fps=30, points=1000, show=True):
     """
-    Affiche un oscilloscope simulé de la tension entre deux nœuds avec contrôles interactifs
+    Affiche un oscilloscope simulé de la tension entre deux nœuds avec contrôles interactifs.
+    La résolution se fait dans un fil de calcul séparé : pendant un calcul, les évènements
+    des curseurs se remplacent (seul le dernier est résolu) et l'affichage, rafraîchi `fps`
+    fois par seconde, recalcule les courbes dans des tampons et les redessine par blitting.
+    Avec show=False, la figure est retournée sans être affichée.
     """
-    from matplotlib.widgets import Slider, Button, RadioButtons, TextBox
+    from matplotlib.widgets import Slider, Button
+    from matplotlib.transforms import blended_transform_factory
+    from .render import BlitManager, LatestWorker
     
     sources = [c for c in self.components if isinstance(c, VoltageSource)]
     if not sources:
-        print("Erreur: Aucune source de tension dans le circuit")
+        self._report(logging.ERROR, "no_source", "Erreur: Aucune source de tension dans le circuit")
         return
         
     if not(self._solved):
@@ -514,67 +392,55 @@ def scope(self, from_node, to_node, interactive=True):
     
     # Source principale à contrôler
     main_source = sources[0]
+    max_periods = 100  # Au-delà, les repères de période ne sont plus affichés
     
     # Créer une figure avec espaces pour les contrôles
     fig, ax = plt.subplots(figsize=(12, 8))
     plt.subplots_adjust(left=0.1, bottom=0.3, right=0.9, top=0.9)
     
-    # Fonctions pour calculer et mettre à jour le signal
-    def calculate_signal(time_array):
-        # Résoudre le circuit avec les paramètres actuels
-        self.solve()
-        
-        # Tensions aux nœuds
-        Vfn = from_node.voltage if from_node else 0
-        Vtn = to_node.voltage if to_node else 0
-        V = Vtn - Vfn
-        
-        # Pour le circuit DC
-        if self.freq == 0:
-            return np.ones_like(time_array) * np.real(V)
-        
-        # Pour le circuit AC
-        omega = 2 * np.pi * self.freq
-        if isinstance(V, complex):
-            amplitude = abs(V)
-            phase = np.angle(V)
-            return amplitude * np.sin(omega * time_array + phase)
-        else:
-            return V * np.sin(omega * time_array)
-    
-    def calculate_ref_signal(time_array):
-        v_ref = main_source.source_voltage
-        
-        # Pour le circuit DC
-        if main_source.freq == 0:
-            return np.ones_like(time_array) * v_ref
-            
-        # Pour le circuit AC
-        omega = 2 * np.pi * main_source.freq
-        if isinstance(v_ref, complex):
-            ref_amplitude = abs(v_ref)
-            ref_phase = np.angle(v_ref)
-            return ref_amplitude * np.sin(omega * time_array + ref_phase)
-        else:
-            return v_ref * np.sin(omega * time_array)
+    # Paramètres de la source demandés par les contrôles ; seul le fil de calcul les
+    # applique au circuit, l'interface ne touche jamais au circuit pendant un calcul
+    params = {"amplitude": main_source.source_voltage, "freq": main_source.freq,
+              "r_int": main_source.r_int}
+    
+    def solve_request(request):
+        """Exécuté dans le fil de calcul : (paramètres, fréquence, tension) ou None"""
+        main_source.source_voltage = request["amplitude"]
+        main_source.freq = request["freq"]
+        main_source.r_int = request["r_int"]
+        self.freq = request["freq"]
+        # La tension est lue dans la Solution : les nœuds ne sont pas modifiés par ce fil
+        solution = self.solve(write_back=False)
+        if not solution:
+            return None
+        Vfn = solution.voltage(from_node) if from_node else 0
+        Vtn = solution.voltage(to_node) if to_node else 0
+        return request, self.freq, complex(Vtn - Vfn)
+    
+    # Tampons alloués une fois : temps et courbes sont recalculés sur place. Ils partent de
+    # zéro car les courbes (et la mise à l'échelle des widgets) les lisent avant le premier calcul
+    unit = np.linspace(0, 1, points)
+    t = np.zeros(points)
+    signal = np.zeros(points)
+    ref = np.zeros(points)
+    multiples = np.repeat(np.arange(1, max_periods + 1, dtype=float), 3)
+    multiples[2::3] = np.nan
+    period_x = np.empty(3 * max_periods)
+    period_y = np.tile([0.0, 1.0, np.nan], max_periods)
     
     # Créer les graphiques initiaux
     t_max_init = 0.1 if main_source.freq == 0 else 3/max(main_source.freq, 1)
-    t = np.linspace(0, t_max_init, 1000)
-    
-    signal_line, = ax.plot([], [], 'b-', linewidth=2, label=f'Tension {from_node.name}-{to_node.name}')
-    ref_line, = ax.plot([], [], 'r--', linewidth=1.5, label='Référence')
     
-    # Configurer les axes
-    ax.set_xlabel('Temps (s)')
-    ax.set_ylabel('Tension (V)')
-    ax.grid(True, alpha=0.3)
-    ax.legend()
+    signal_line, = ax.plot(unit, signal, 'b-', linewidth=2, label=f'Tension {from_node.name}-{to_node.name}')
+    ref_line, = ax.plot(unit, ref, 'r--', linewidth=1.5, label='Référence')
+    # Repères de période : une seule ligne, segments séparés par des NaN, hauteur en
+    # coordonnées des axes
+    period_line, = ax.plot([], [], color='gray', linestyle='--', alpha=0.3,
+                           transform=blended_transform_factory(ax.transData, ax.transAxes))
     
-    # Informations de mesure
-    info_text = ax.text(0.02, 0.95, '', transform=ax.transAxes, 
-                       fontsize=9, va='top', ha='left',
-                       bbox=dict(boxstyle='round', facecolor='white', alpha=0.7))
+    # Configurer les axes et les informations de mesure
+    info_text = _scope_axes(ax)
+    ax.legend(handles=[signal_line, ref_line])
     
     # Ajouter les contrôles pour la source
     # 1. Amplitude de la source
@@ -616,146 +482,118 @@ def scope(self, from_node, to_node, interactive=True):
     reset_ax = plt.axes([0.6, 0.03, 0.1, 0.04])
     reset_button = Button(reset_ax, 'Réinitialiser')
     
+    # Dernier résultat affiché et redessin demandé sans nouveau calcul (fenêtre, référence)
+    shown = [solve_request(dict(params)) or (dict(params), self.freq, 0j)]
+    dirty = [False]
+    
     # Fonction de mise à jour de l'affichage
     def update_display():
+        request, freq, V = shown[0]
+        
         # Mettre à jour le temps en fonction de la fréquence si nécessaire
         t_max = time_slider.val
-        if self.freq > 0:
+        if freq > 0 and t_max < 2 / freq:
             # Ajuster pour montrer au moins 2 périodes
-            period = 1.0 / self.freq
-            if t_max < 2 * period:
-                t_max = 2 * period
-                time_slider.set_val(t_max)
-        
-        t = np.linspace(0, t_max, 1000)
+            t_max = 2 / freq
+            time_slider.set_val(t_max)
         
-        # Calculer les signaux
-        signal = calculate_signal(t)
-        ref = calculate_ref_signal(t)
-        
-        # Mettre à jour les lignes
+        # Calculer les signaux dans les tampons
+        np.multiply(unit, t_max, out=t)
+        _waveform(t, V, freq, out=signal)
+        _waveform(t, request["amplitude"], request["freq"], out=ref)
         signal_line.set_data(t, signal)
         ref_line.set_data(t, ref)
-        
-        # Ajuster les limites des axes
-        y_max = max(np.max(np.abs(signal)), np.max(np.abs(ref))) * 1.2
-        ax.set_xlim(0, t_max)
-        ax.set_ylim(-y_max, y_max)
-        
-        # Afficher/masquer la référence selon l'état
         ref_line.set_visible(show_ref[0])
         
-        # Mise à jour des informations
-        if self.freq > 0:
-            V = to_node.voltage - from_node.voltage
-            amplitude = abs(V)
-            phase = np.angle(V) if isinstance(V, complex) else 0
-            
-            info_str = '\n'.join((
-                f'Fréquence: {self.freq:.2f} Hz',
-                f'Période: {1/self.freq*1000:.2f} ms',
-                f'Amplitude: {amplitude:.3f} V',
-                f'Phase: {np.degrees(phase):.1f}°',
-                f'V RMS: {amplitude/np.sqrt(2):.3f} V'
-            ))
-        else:
-            V = to_node.voltage - from_node.voltage
-            V_real = np.real(V)
-            
-            info_str = f'Tension DC: {V_real:.3f} V'
-        
-        info_text.set_text(info_str)
-        
-        # Dessiner les périodes pour les signaux AC
-        if self.freq > 0:
-            # Supprimer les lignes verticales existantes
-            for line in ax.get_lines():
-                if line not in [signal_line, ref_line] and line.get_linestyle() == '--':
-                    line.remove()
-            
-            # Ajouter des lignes pour les périodes
-            period = 1.0 / self.freq
-            for i in range(1, int(t_max / period) + 1):
-                ax.axvline(x=i * period, color='gray', linestyle='--', alpha=0.3)
+        # Repères de période pour les signaux AC
+        count = int(t_max * freq) if freq > 0 else 0
+        if count > max_periods:
+            count = 0
+        np.divide(multiples[:3 * count], freq or 1, out=period_x[:3 * count])
+        period_line.set_data(period_x[:3 * count], period_y[:3 * count])
         
-        # Titre du graphique
-        if self.freq > 0:
-            ax.set_title(f'Tension entre {from_node.name} et {to_node.name} - {self.freq:.2f} Hz')
+        # Mise à jour des informations
+        info_text.set_text(_scope_info(V, freq))
+        
+        # Le fond (axes, titre) n'est redessiné que si les limites ou le titre changent :
+        # l'échelle verticale garde une marge et ne suit l'amplitude que si la courbe
+        # en sort ou n'en occupe plus qu'une petite partie
+        full = False
+        if ax.get_xlim() != (0, t_max):
+            ax.set_xlim(0, t_max)
+            full = True
+        peak = max(np.max(np.abs(signal)), np.max(np.abs(ref))) or 1.0
+        top = ax.get_ylim()[1]
+        if not 1.1 * peak <= top <= 2.5 * peak:
+            ax.set_ylim(-1.5 * peak, 1.5 * peak)
+            full = True
+        title = _scope_title(freq, from_node.name, to_node.name)
+        if ax.get_title() != title:
+            ax.set_title(title)
+            full = True
+        
+        if full:
+            fig.canvas.draw_idle()
         else:
-            ax.set_title(f'Tension DC entre {from_node.name} et {to_node.name}')
-        
-        fig.canvas.draw_idle()
+            blitter.update()
+    
+    def refresh():
+        """Appelé par le minuteur de l'interface : affiche le dernier résultat arrivé"""
+        result = worker.poll()
+        if result is not None:
+            shown[0] = result
+        elif not dirty[0]:
+            return
+        dirty[0] = False
+        update_display()
+    
+    def request(**changes):
+        params.update(changes)
+        if interactive:
+            worker.submit(dict(params))
     
     # Fonctions de rappel pour les contrôles
     def update_amplitude(val):
-        main_source.source_voltage = val
-        if interactive:
-            self.solve()
-            update_display()
+        request(amplitude=val)
     
     def update_frequency(val):
-        if val > 0:
-            main_source.freq = val
-            self.freq = val
-            mode_button.label.set_text('AC')
-        else:
-            main_source.freq = 0
-            self.freq = 0
-            mode_button.label.set_text('DC')
-        
-        if interactive:
-            self.solve()
-            update_display()
+        mode_button.label.set_text('AC' if val > 0 else 'DC')
+        request(freq=max(val, 0))
     
     def update_impedance(val):
-        main_source.r_int = val
-        main_source.value = val
-        if interactive:
-            self.solve()
-            update_display()
+        request(r_int=val)
     
     def update_time(val):
-        update_display()
+        dirty[0] = True
     
     def toggle_mode(event):
+        # Le changement du curseur de fréquence met à jour la source et le libellé
         if mode_button.label.get_text() == 'DC':
-            mode_button.label.set_text('AC')
-            freq = freq_slider.val if freq_slider.val > 0 else 50
-            freq_slider.set_val(freq)
-            main_source.freq = freq
-            self.freq = freq
+            freq_slider.set_val(freq_slider.val if freq_slider.val > 0 else 50)
         else:
-            mode_button.label.set_text('DC')
-            main_source.freq = 0
-            self.freq = 0
             freq_slider.set_val(0)
-        
-        if interactive:
-            self.solve()
-            update_display()
     
     def toggle_ref(event):
         show_ref[0] = not show_ref[0]
         ref_button.label.set_text('Afficher réf' if not show_ref[0] else 'Masquer réf')
-        update_display()
+        dirty[0] = True
+        fig.canvas.draw_idle()
     
     def force_update(event):
-        self.solve()
-        update_display()
+        worker.submit(dict(params))
     
     def reset(event):
         ampl_slider.reset()
         freq_slider.reset()
         imp_slider.reset()
         time_slider.reset()
-        main_source.freq = freq_init
-        main_source.source_voltage = main_source.source_voltage
-        main_source.r_int = main_source.r_int
-        mode_button.label.set_text('DC' if freq_init == 0 else 'AC')
         show_ref[0] = True
         ref_button.label.set_text('Masquer réf')
-        self.solve()
-        update_display()
+        worker.submit(dict(params))
+    
+    def close(event):
+        timer.stop()
+        worker.stop()
     
     # Connecter les fonctions de rappel
     ampl_slider.on_changed(update_amplitude)
@@ -767,9 +605,15 @@ def scope(self, from_node, to_node, interactive=True):
     update_button.on_clicked(force_update)
     reset_button.on_clicked(reset)
     
-    # Initialiser l'affichage
-    self.solve()
+    # Initialiser l'affichage, puis lancer le fil de calcul et le minuteur
+    blitter = BlitManager(fig.canvas, [signal_line, ref_line, period_line, info_text])
+    worker = LatestWorker(solve_request)
     update_display()
-    
-    plt.show()
-    return fig
\ No newline at end of file
+    timer = fig.canvas.new_timer(interval=int(1000 / fps))
+    timer.add_callback(refresh)
+    timer.start()
+    fig.canvas.mpl_connect('close_event', close)
+    
+    if show:
+        plt.show()
+    return fig
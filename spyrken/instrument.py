@@ -0,0 +1,134 @@
+import logging
+import time
+
+# Journal de la bibliothèque : erreurs et avertissements y passent au lieu de print().
+# Sans configuration, les messages de niveau WARNING et plus s'affichent sur stderr.
+logger = logging.getLogger("spyrken")
+
+
+def report(level, code, message, instrumentation=None):
+    """Journalise un diagnostic ; `code` (ex. "singular_matrix") est joint à
+    l'enregistrement (record.code) et transmis aux crochets de `instrumentation`"""
+    logger.log(level, message, extra={"code": code})
+    if instrumentation is not None:
+        instrumentation.count("errors" if level >= logging.ERROR else "warnings")
+        instrumentation.emit("diagnostic", level=level, code=code, message=message)
+
+
+class _Phase:
+    """Chronomètre d'une phase, utilisé comme gestionnaire de contexte"""
+    __slots__ = ("instrumentation", "name", "start")
+
+    def __init__(self, instrumentation, name):
+        self.instrumentation = instrumentation
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.instrumentation.add_time(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NoPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_PHASE = _NoPhase()
+
+
+class Instrumentation:
+    """Mesures d'un circuit : temps cumulé et nombre de passages par phase, compteurs,
+    estimation facultative du conditionnement et crochets.
+
+    Phases de solve() : "validation" (fréquence d'analyse, compilation, clé du cache),
+    "assembly" (admittances et second membre), "solve" (factorisation ou mise à jour,
+    descente-remontée) et "scatter" (tableaux de la Solution et report sur les nœuds et
+    composants).
+    Compteurs : "solves", "cache_hits" (solutions reprises du cache), "factorizations",
+    "factor_reuses" (factorisation conservée réutilisée), "errors", "warnings".
+
+    Un crochet est appelé hook(event, data) avec data un dict : "solve" après chaque
+    résolution (freq, size, cached, ok, seconds), "factorization" après chaque
+    factorisation (size, sparse, nnz, condition) et "diagnostic" pour chaque erreur ou
+    avertissement (level, code, message)."""
+
+    def __init__(self):
+        self.timing = True       # Chronométrage des phases (désactivable pour les boucles serrées)
+        self.condition = False   # Estimer le conditionnement à chaque factorisation
+        self.hooks = []
+        self.reset()
+
+    def reset(self):
+        """Remet à zéro temps, compteurs et dernières valeurs"""
+        self.times = {}
+        self.calls = {}
+        self.counters = {}
+        self.matrix_size = None       # Taille du dernier système factorisé
+        self.max_matrix_size = 0
+        self.last_condition = None    # Dernier conditionnement estimé (norme 1)
+
+    def phase(self, name):
+        """Gestionnaire de contexte chronométrant la phase `name`"""
+        return _Phase(self, name) if self.timing else _NO_PHASE
+
+    def add_time(self, name, seconds):
+        self.times[name] = self.times.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def count(self, name, k=1):
+        self.counters[name] = self.counters.get(name, 0) + k
+
+    def factorization(self, size, sparse, nnz=None, condition=None):
+        """Enregistre une factorisation de taille `size`"""
+        self.count("factorizations")
+        self.matrix_size = size
+        self.max_matrix_size = max(self.max_matrix_size, size)
+        if condition is not None:
+            self.last_condition = condition
+        if self.hooks:
+            self.emit("factorization", size=size, sparse=sparse, nnz=nnz, condition=condition)
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+        return hook
+
+    def remove_hook(self, hook):
+        self.hooks.remove(hook)
+
+    def emit(self, event, **data):
+        for hook in list(self.hooks):
+            hook(event, data)
+
+    def summary(self):
+        """Temps, passages et compteurs sous forme de dict (pour un export JSON...)"""
+        return {
+            "times": dict(self.times),
+            "calls": dict(self.calls),
+            "counters": dict(self.counters),
+            "matrix_size": self.matrix_size,
+            "max_matrix_size": self.max_matrix_size,
+            "condition": self.last_condition,
+        }
+
+    def __str__(self):
+        lines = ["Instrumentation:"]
+        for name, seconds in self.times.items():
+            calls = self.calls[name]
+            lines.append(f"  {name}: {seconds * 1e3:.3f} ms en {calls} passage(s)"
+                         f" ({seconds / calls * 1e6:.1f} µs/passage)")
+        for name, value in self.counters.items():
+            lines.append(f"  {name}: {value}")
+        if self.matrix_size is not None:
+            lines.append(f"  Taille du système: {self.matrix_size} (max {self.max_matrix_size})")
+        if self.last_condition is not None:
+            lines.append(f"  Conditionnement estimé: {self.last_condition:.3e}")
+        return "\n".join(lines)
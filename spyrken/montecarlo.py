@@ -0,0 +1,189 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+DISTRIBUTIONS = ("uniform", "normal")
+
+
+class MonteCarloResult:
+    """Statistiques en ligne (Welford) d'un tirage Monte-Carlo : moyenne, variance,
+    extrema et histogramme du module (V) et de la phase (°) de chaque sonde.
+    La phase est mesurée par rapport au phaseur nominal `reference` puis décalée de sa
+    phase : elle ne saute pas de ±180° autour du nominal. Les échantillons hors des bornes
+    des histogrammes sont comptés à part (`overflow`).
+    Aucun échantillon n'est conservé ; deux résultats partiels se fusionnent avec `merge`."""
+
+    def __init__(self, edges, reference):
+        # Bornes des histogrammes : modules des P sondes puis phases, forme (2P, bins+1)
+        self.edges = edges
+        self.reference = reference  # Phaseurs nominaux des sondes (P,)
+        self.count = 0
+        self._mean = np.zeros(len(edges))
+        self._m2 = np.zeros(len(edges))
+        self._min = np.full(len(edges), np.inf)
+        self._max = np.full(len(edges), -np.inf)
+        self._hist = np.zeros((len(edges), edges.shape[1] - 1), dtype=np.int64)
+        self._outside = np.zeros((len(edges), 2), dtype=np.int64)  # Sous / au-dessus des bornes
+
+    def update(self, V):
+        """Ajoute un lot de phaseurs (b, P)"""
+        samples = _samples(V, self.reference)
+        batch = MonteCarloResult(self.edges, self.reference)
+        batch.count = len(samples)
+        batch._mean = samples.mean(axis=0)
+        batch._m2 = ((samples - batch._mean) ** 2).sum(axis=0)
+        batch._min = samples.min(axis=0)
+        batch._max = samples.max(axis=0)
+        batch._hist = np.array([np.histogram(samples[:, k], self.edges[k])[0]
+                                for k in range(samples.shape[1])])
+        batch._outside = np.stack([(samples < self.edges[:, 0]).sum(axis=0),
+                                   (samples > self.edges[:, -1]).sum(axis=0)], axis=1)
+        self.merge(batch)
+
+    def merge(self, other):
+        """Fusionne un autre résultat partiel (formule parallèle de Chan)"""
+        if other.count == 0:
+            return self
+        total = self.count + other.count
+        delta = other._mean - self._mean
+        self._mean = self._mean + delta * other.count / total
+        self._m2 = self._m2 + other._m2 + delta ** 2 * self.count * other.count / total
+        self._min = np.minimum(self._min, other._min)
+        self._max = np.maximum(self._max, other._max)
+        self._hist = self._hist + other._hist
+        self._outside = self._outside + other._outside
+        self.count = total
+        return self
+
+    def _split(self, values):
+        P = len(values) // 2
+        return values[:P], values[P:]
+
+    @property
+    def mean(self):
+        """Moyenne du module de chaque sonde"""
+        return self._split(self._mean)[0]
+
+    @property
+    def std(self):
+        """Écart-type du module de chaque sonde"""
+        return self._split(np.sqrt(self._m2 / max(self.count - 1, 1)))[0]
+
+    @property
+    def minimum(self):
+        return self._split(self._min)[0]
+
+    @property
+    def maximum(self):
+        return self._split(self._max)[0]
+
+    @property
+    def histogram(self):
+        """(effectifs, bornes) de l'histogramme du module de chaque sonde"""
+        P = len(self._hist) // 2
+        return self._hist[:P], self.edges[:P]
+
+    @property
+    def overflow(self):
+        """Nombre d'échantillons du module sous et au-dessus des bornes de l'histogramme (P, 2)"""
+        return self._outside[:len(self._outside) // 2]
+
+    @property
+    def phase_mean(self):
+        return self._split(self._mean)[1]
+
+    @property
+    def phase_std(self):
+        return self._split(np.sqrt(self._m2 / max(self.count - 1, 1)))[1]
+
+    @property
+    def phase_histogram(self):
+        P = len(self._hist) // 2
+        return self._hist[P:], self.edges[P:]
+
+    @property
+    def phase_overflow(self):
+        return self._outside[len(self._outside) // 2:]
+
+    def __str__(self):
+        lines = [f"Monte-Carlo: {self.count} tirage(s)"]
+        for k, (mean, std) in enumerate(zip(self.mean, self.std)):
+            lines.append(f"  Sonde {k}: |V| = {mean:.6g} ± {std:.3g} V, "
+                         f"phase = {self.phase_mean[k]:.3f} ± {self.phase_std[k]:.3g}°")
+        return "\n".join(lines)
+
+
+def _samples(V, reference):
+    """Module et phase (°) des phaseurs (b, P), côte à côte. La phase est prise par rapport
+    au phaseur nominal de chaque sonde, dans ]-180°, 180°], puis décalée de sa phase."""
+    phase = np.angle(V * np.conj(reference), deg=True) + np.angle(reference, deg=True)
+    return np.concatenate([np.abs(V), phase], axis=1)
+
+
+def draw_values(rng, nominal, slots, tolerances, distribution, count):
+    """Tire `count` jeux de valeurs : tolérance relative uniforme (±tol) ou normale (tol = 3σ)"""
+    values = np.repeat(nominal[None, :], count, axis=0)
+    shape = (count, len(slots))
+    if distribution == "uniform":
+        deviation = rng.uniform(-1, 1, shape) * tolerances
+    else:
+        deviation = rng.standard_normal(shape) * tolerances / 3
+    values[:, slots] *= 1 + deviation
+    return values
+
+
+def evaluate(compiled, values, E, freq, to_idx, from_idx, sparse=False):
+    """Phaseurs des sondes pour un lot de jeux de valeurs (b, m)"""
+    V = compiled.solve_stacked(compiled.admittances(freq, values), E, sparse)
+    return V[:, to_idx] - V[:, from_idx]
+
+
+def run_worker(compiled, nominal, slots, tolerances, distribution, E, freq,
+               to_idx, from_idx, edges, reference, count, batch, seed, sparse):
+    """Tâche d'un processus : tire et évalue `count` échantillons par lots, réduits à la volée"""
+    rng = np.random.default_rng(seed)
+    result = MonteCarloResult(edges, reference)
+    done = 0
+    while done < count:
+        size = min(batch, count - done)
+        values = draw_values(rng, nominal, slots, tolerances, distribution, size)
+        result.update(evaluate(compiled, values, E, freq, to_idx, from_idx, sparse))
+        done += size
+    return result
+
+
+def run_monte_carlo(compiled, n, slots, tolerances, distribution, freq, to_idx, from_idx,
+                    workers, seed, batch, bins, sparse):
+    """Répartit `n` tirages entre `workers` processus, chacun avec sa graine dérivée de `seed`"""
+    nominal = compiled.values()
+    E = compiled.amplitudes()
+    workers = workers or os.cpu_count() or 1
+    seeds = np.random.SeedSequence(seed).spawn(workers + 1)
+
+    # Phaseurs nominaux (référence des phases), puis lot pilote (non compté) pour fixer les
+    # bornes des histogrammes
+    reference = evaluate(compiled, nominal[None, :], E, freq, to_idx, from_idx, sparse)[0]
+    rng = np.random.default_rng(seeds[0])
+    pilot = evaluate(compiled, draw_values(rng, nominal, slots, tolerances, distribution, min(n, batch)),
+                     E, freq, to_idx, from_idx, sparse)
+    samples = _samples(pilot, reference)
+    low, high = samples.min(axis=0), samples.max(axis=0)
+    margin = np.maximum(0.5 * (high - low), 1e-12 * np.maximum(np.abs(high), 1))
+    edges = np.linspace(low - margin, high + margin, bins + 1).T
+
+    counts = [n // workers + (k < n % workers) for k in range(workers)]
+    args = [(compiled, nominal, slots, tolerances, distribution, E, freq, to_idx, from_idx,
+             edges, reference, counts[k], batch, seeds[k + 1], sparse)
+            for k in range(workers) if counts[k]]
+
+    if workers == 1:
+        partials = [run_worker(*task) for task in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            partials = list(pool.map(run_worker, *zip(*args)))
+
+    result = MonteCarloResult(edges, reference)
+    for partial in partials:
+        result.merge(partial)
+    return result
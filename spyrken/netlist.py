@@ -0,0 +1,207 @@
+import gc
+import logging
+import os
+import re
+
+import numpy as np
+
+from .instrument import report
+
+# Multiplicateurs SI reconnus après une valeur (insensibles à la casse, "meg" avant "m")
+SUFFIXES = {"f": 1e-15, "p": 1e-12, "n": 1e-9, "u": 1e-6, "m": 1e-3,
+            "k": 1e3, "meg": 1e6, "g": 1e9, "t": 1e12}
+
+# Nombre, suffixe SI éventuel puis unité ignorée ("10k", "4.7uF", "1meg", "2.2e-3")
+_VALUE = re.compile(r"([+-]?(?:\d+\.?\d*|\.\d+)(?:e[+-]?\d+)?)(meg|[fpnumkgt])?[a-z]*$")
+
+# Noms du nœud de masse
+GROUND_NAMES = ("0", "gnd")
+
+# Code de composant de chaque carte
+_KINDS = {"r": "R", "c": "C", "l": "L", "v": "V"}
+
+
+def parse_value(token):
+    """Convertit une valeur SPICE avec suffixe SI en nombre ("4.7k" -> 4700.0)"""
+    if token[-1].isdigit():
+        try:
+            return float(token)
+        except ValueError:
+            pass
+    match = _VALUE.match(token.lower())
+    if match is None:
+        raise ValueError(f"valeur invalide: {token}")
+    number, suffix = match.groups()
+    return float(number) * SUFFIXES[suffix] if suffix else float(number)
+
+
+def _cards(lines, title):
+    """Itère sur les cartes (numéro de ligne, champs) en un seul passage : commentaires
+    retirés, lignes de continuation "+" rattachées à la carte précédente, arrêt à ".end"."""
+    card, start = None, 0
+    for lineno, line in enumerate(lines, 1):
+        if title and lineno == 1:
+            continue  # Première ligne d'un fichier SPICE : titre
+        line = line.split(";", 1)[0].strip()
+        if not line or line[0] == "*":
+            continue
+        if line[0] == "+":
+            if card is None:
+                raise ValueError(f"Ligne {lineno}: continuation sans carte")
+            card += " " + line[1:]
+            continue
+        if card is not None:
+            yield start, card
+        card, start = line, lineno
+        if line.split()[0].lower() == ".end":
+            return
+    if card is not None:
+        yield start, card
+
+
+def _source(lineno, name, fields):
+    """(tension, fréquence, forme d'onde) d'une source à partir des champs après les nœuds :
+    [DC] valeur, AC module [phase], SIN(décalage amplitude fréquence [retard amortissement phase])"""
+    text = " ".join(fields).lower().replace("(", " ( ").replace(")", " ) ").replace(",", " ")
+    tokens = text.split()
+    dc, ac, sine = 0.0, None, None
+    k = 0
+    try:
+        while k < len(tokens):
+            token = tokens[k]
+            if token == "dc":
+                dc = parse_value(tokens[k + 1])
+                k += 2
+            elif token == "ac":
+                magnitude = parse_value(tokens[k + 1])
+                phase = 0.0
+                if k + 2 < len(tokens) and tokens[k + 2] not in ("dc", "sin", "("):
+                    phase = parse_value(tokens[k + 2])
+                    k += 1
+                ac = magnitude * np.exp(1j * np.deg2rad(phase))
+                k += 2
+            elif token == "sin":
+                end = tokens.index(")", k)
+                sine = [parse_value(token) for token in tokens[k + 1:end] if token != "("]
+                if len(sine) < 3:
+                    raise ValueError("SIN demande au moins décalage, amplitude et fréquence")
+                k = end + 1
+            else:
+                dc = parse_value(token)
+                k += 1
+    except (IndexError, ValueError) as e:
+        raise ValueError(f"Ligne {lineno}: source {name} invalide ({e})") from None
+
+    if sine is None:
+        # Sans SIN, une source AC n'a pas de fréquence propre : elle sert aux réponses en fréquence
+        return (ac if ac is not None else dc), 0.0, None
+
+    offset, amplitude, freq = sine[:3]
+    delay = sine[3] if len(sine) > 3 else 0.0
+    damping = sine[4] if len(sine) > 4 else 0.0
+    phase = sine[5] if len(sine) > 5 else 0.0
+    voltage = ac if ac is not None else amplitude * np.exp(1j * np.deg2rad(phase))
+
+    # Comme en SPICE, SIN pilote l'analyse temporelle et AC les réponses en fréquence : la
+    # forme d'onde suit toujours SIN. La source reste au décalage jusqu'à `delay`, puis
+    # offset + amplitude exp(-damping (t - delay)) sin(2π f (t - delay) + phase)
+    w, theta = 2 * np.pi * freq, np.deg2rad(phase)
+
+    def waveform(t):
+        t = np.asarray(t, dtype=float)
+        elapsed = np.maximum(t - delay, 0.0)
+        sine_part = amplitude * np.exp(-damping * elapsed) * np.sin(w * elapsed + theta)
+        return offset + np.where(t >= delay, sine_part, 0.0)
+    return voltage, freq, waveform
+
+
+def read_netlist(circuit, source, title=True):
+    """Remplit `circuit` à partir d'une netlist SPICE (cartes R, C, L et V).
+    `source` est un chemin ou un flux texte ; la lecture se fait en un seul passage et les
+    composants sont ajoutés en bloc aux colonnes du stockage du circuit."""
+    from .circuit import Node
+
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, encoding="utf-8") as stream:
+            return read_netlist(circuit, stream, title)
+
+    store = circuit.store
+    known = set(map(id, circuit.nodes))
+    nodes = {node.name: store.node_id(node) for node in circuit.nodes}
+    ground = next((node for node in circuit.nodes if node.isG), None)
+    new_nodes = []
+    kinds, values, node1, node2, names = [], [], [], [], []
+    amplitudes, freqs, waveforms = [], [], {}
+    seen = set(store.names[:len(store)])  # Noms déjà pris, netlist et circuit cible compris
+    parsed = {}  # Les netlists générées répètent souvent les mêmes valeurs
+
+    def node_of(name):
+        k = nodes.get(name)
+        if k is not None:
+            return k
+        if name.lower() in GROUND_NAMES:
+            nonlocal ground
+            if ground is None:
+                ground = Node(name, True)
+            node = ground
+        else:
+            node = Node(name)
+            new_nodes.append(node)
+        k = nodes[name] = store.node_id(node)
+        return k
+
+    # Le ramasse-miettes cyclique n'a rien à collecter ici et ralentit la création en masse
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        for lineno, card in _cards(source, title):
+            fields = card.split()
+            name = fields[0]
+            letter = name[0].lower()
+            if letter == ".":
+                report(logging.WARNING, "ignored_directive",
+                       f"Attention: directive {fields[0]} ignorée (ligne {lineno}).")
+                continue
+            if letter not in _KINDS:
+                raise ValueError(f"Ligne {lineno}: élément non supporté: {name}")
+            if len(fields) < 4:
+                raise ValueError(f"Ligne {lineno}: {name} demande deux nœuds et une valeur")
+            if name in seen:
+                raise ValueError(f"Ligne {lineno}: nom en double: {name}")
+            seen.add(name)
+
+            if letter == "v":
+                voltage, freq, waveform = _source(lineno, name, fields[3:])
+                if waveform is not None:
+                    waveforms[len(names)] = waveform
+                value = 0.0
+            else:
+                voltage, freq = 0, 0.0
+                value = parsed.get(fields[3])
+                if value is None:
+                    try:
+                        value = parsed[fields[3]] = parse_value(fields[3])
+                    except ValueError as e:
+                        raise ValueError(f"Ligne {lineno}: {e}") from None
+
+            kinds.append(_KINDS[letter])
+            values.append(value)
+            node1.append(node_of(fields[1]))
+            node2.append(node_of(fields[2]))
+            names.append(name)
+            amplitudes.append(voltage)
+            freqs.append(freq)
+    finally:
+        if collecting:
+            gc.enable()
+
+    # Résistances : impédance réelle connue d'avance ; autres composants : non calculée
+    impedances = np.where(np.array(kinds) == "R", values, np.nan)
+    start = store.extend(kinds, values, node1, node2, names, amplitudes, freqs, impedances)
+    for k, waveform in waveforms.items():
+        store.extras[start + k] = {"waveform": waveform}
+
+    if ground is not None and id(ground) not in known:
+        circuit.nodes.insert(0, ground)
+    circuit.nodes.extend(new_nodes)
+    return circuit
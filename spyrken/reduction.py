@@ -0,0 +1,174 @@
+import numpy as np
+
+from .solver import DenseFactor, SingularMatrixError, SparseFactor, scipy_module
+from .transient import METHODS
+
+
+class ReducedModel:
+    """Modèle réduit d'un circuit vu depuis quelques nœuds d'accès (ports) :
+    (Gr + s Cr) z = Br e, tensions des ports = Lrᵀ z.
+
+    Les matrices ont la taille q de la base de projection, indépendante du nombre de
+    nœuds du circuit d'origine. Les entrées sont les tensions des sources (colonnes de
+    Br) et les courants injectés dans les ports (colonnes de Lr, qui donnent aussi les
+    sorties) : le multipôle est symétrique et la projection de congruence conserve sa
+    passivité."""
+
+    def __init__(self, G, C, B, L, e, ports, reference, sources, s0):
+        self.G = G
+        self.C = C
+        self.B = B
+        self.L = L
+        self.e = e              # Amplitudes des sources divisées par celle de la première
+        self.ports = ports
+        self.reference = reference  # Nœud de référence du circuit d'origine (0 V)
+        self.sources = sources
+        self.s0 = s0            # Point de développement de la base de Krylov (rad/s)
+
+    @property
+    def order(self):
+        return len(self.G)
+
+    def _solve(self, freqs, rhs):
+        s = 2j * np.pi * np.atleast_1d(np.asarray(freqs, dtype=float))
+        A = self.G + s[:, None, None] * self.C
+        return np.linalg.solve(A, np.broadcast_to(rhs, (len(s),) + rhs.shape))
+
+    def _probe_columns(self, probes):
+        """Colonnes (vers, depuis) des paires de nœuds sondées parmi les tensions des
+        ports, la dernière colonne (-1) étant la référence à 0 V"""
+        single = len(probes) == 2 and not isinstance(probes[0], (tuple, list))
+        pairs = [probes] if single else list(probes)
+        columns = {node: k for k, node in enumerate(self.ports)}
+        columns[self.reference] = -1
+
+        def column(node):
+            if node not in columns:
+                raise ValueError(f"Le nœud {node.name} n'est ni un port ni la référence du modèle réduit")
+            return columns[node]
+
+        to_idx = np.array([column(to_node) for from_node, to_node in pairs], dtype=np.intp)
+        from_idx = np.array([column(from_node) for from_node, to_node in pairs], dtype=np.intp)
+        return to_idx, from_idx, single
+
+    def frequency_response(self, freqs, probes):
+        """Fonction de transfert complexe (V_to - V_from) / V_source pour chaque fréquence,
+        comme Circuit.frequency_response : toutes les sources à la fréquence balayée, la
+        référence est la première source. `probes` est une paire (from_node, to_node) ou
+        une liste de paires de ports (ou du nœud de référence) ; le résultat a la forme
+        (F,) ou (F, P)."""
+        to_idx, from_idx, single = self._probe_columns(probes)
+        z = self._solve(freqs, (self.B @ self.e)[:, None])
+        V = np.concatenate([(self.L.T @ z)[..., 0], np.zeros((len(z), 1))], axis=1)
+        H = V[:, to_idx] - V[:, from_idx]
+        return H[:, 0] if single else H
+
+    def impedance(self, freqs):
+        """Matrice d'impédance des ports (F, P, P), sources éteintes"""
+        return self.L.T @ self._solve(freqs, self.L.astype(complex))
+
+    def transient(self, t_stop, dt, method="trapezoidal", chunk=None):
+        """Tensions des ports (T, P) de t=0 à t_stop, sources suivant voltage_at(t), à
+        partir du repos. Un premier pas d'Euler implicite amortit l'écart entre l'état
+        nul et les contraintes algébriques ; chaque pas suivant est une descente-remontée
+        sur une factorisation de taille q. Avec `chunk`, retourne un générateur de blocs."""
+        if method not in METHODS:
+            raise ValueError(f"Méthode inconnue: {method} (choix: {', '.join(METHODS)})")
+        blocks = self._transient(t_stop, dt, method, chunk)
+        if chunk is not None:
+            return blocks
+        return next(blocks)
+
+    def _transient(self, t_stop, dt, method, chunk):
+        steps = int(round(t_stop / dt))
+        euler = DenseFactor(self.G + self.C / dt, check=False)
+        if method == "trapezoidal":
+            trapezoid = DenseFactor(self.G + 2 * self.C / dt, check=False)
+            history = 2 * self.C / dt - self.G
+        z = np.zeros(self.order)
+        u_prev = None
+        chunk = chunk or steps + 1
+        for start in range(0, steps + 1, chunk):
+            t = np.arange(start, min(start + chunk, steps + 1)) * dt
+            E = np.array([source.voltage_at(t) for source in self.sources], dtype=float)
+            E = E.reshape(len(self.sources), len(t)).T
+            out = np.empty((len(t), len(self.ports)))
+            for j in range(len(t)):
+                u = self.B @ E[j]
+                if start + j == 1 or (start + j > 1 and method != "trapezoidal"):
+                    z = euler.solve(self.C @ z / dt + u)
+                elif start + j > 1:
+                    z = trapezoid.solve(history @ z + u + u_prev)
+                u_prev = u
+                out[j] = self.L.T @ z
+            yield t, out
+
+    def __str__(self):
+        return (f"Modèle réduit: ordre {self.order}, {len(self.ports)} port(s),"
+                f" {self.B.shape[1]} source(s)")
+
+
+def _factor(A, sparse, ordering):
+    return SparseFactor(A, ordering) if sparse else DenseFactor(A)
+
+
+def prima(system, ports, order, s0=None, sparse=False, ordering="amd", tol=1e-10):
+    """Réduction PRIMA : base orthonormée V du sous-espace de Krylov par blocs
+    K_order((G + s0 C)⁻¹ C, (G + s0 C)⁻¹ [B, L]) puis projection de congruence
+    Gr = VᵀGV, Cr = VᵀCV, Br = VᵀB, Lr = VᵀL.
+
+    Les lignes de branche sont d'abord changées de signe, ce qui met le système sous la
+    forme [[G, A], [-Aᵀ, 0]] + s [[C, 0], [0, L]] : G + Gᵀ et C y sont semi-définies
+    positives, condition de la conservation de la passivité. Le modèle reproduit les
+    `order` premiers moments (blocs) de la réponse autour de s0 ; sans `s0`, le
+    développement se fait en continu (s0 = 0), ou au point de décalage de StateSpace si
+    G est singulière (nœud relié seulement à des condensateurs). Une colonne dont la
+    norme après orthogonalisation tombe sous `tol` fois sa norme initiale est écartée."""
+    N, n = system.size, system.n
+    flip = np.ones(N)
+    flip[n:] = -1
+    if sparse:
+        D = scipy_module("sparse").diags(flip)
+        G, C = (D @ system.G).tocsc(), (D @ system.C).tocsc()
+    else:
+        G, C = flip[:, None] * system.G, flip[:, None] * system.C
+    B = flip[:, None] * system.B
+
+    # Une colonne par port : injection d'un courant unité, dont la tension est la sortie
+    L = np.zeros((N, len(ports)))
+    reference = next(node for node, row in system.index.items() if row is None)
+    for k, node in enumerate(ports):
+        row = system.index[node]
+        if row is None:
+            raise ValueError("le nœud de référence ne peut pas être un port")
+        L[row, k] = 1
+
+    factor = None
+    for shift in ([s0] if s0 is not None else [0.0, system._shift()]):
+        try:
+            factor = _factor(G + shift * C if shift else G, sparse, ordering)
+            s0 = shift
+            break
+        except SingularMatrixError:
+            continue
+    if factor is None:
+        raise SingularMatrixError("G + s0 C singulière")
+
+    # Arnoldi par blocs, Gram-Schmidt classique répété deux fois (CGS2)
+    V = np.zeros((N, 0))
+    block = factor.solve(np.column_stack([B, L]))
+    for _ in range(order):
+        start = V.shape[1]
+        for x in np.real(block).T:
+            initial = np.linalg.norm(x)
+            for _ in range(2):
+                x = x - V @ (V.T @ x)
+            norm = np.linalg.norm(x)
+            if norm > tol * initial:
+                V = np.column_stack([V, x / norm])
+        if V.shape[1] == start:
+            break
+        block = factor.solve(C @ V[:, start:])
+
+    return ReducedModel(V.T @ (G @ V), V.T @ (C @ V), V.T @ B, V.T @ L, system.e,
+                        list(ports), reference, system.sources, s0)
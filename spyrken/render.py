@@ -0,0 +1,180 @@
+import logging
+import os
+import shutil
+import subprocess
+import threading
+
+import numpy as np
+
+from .instrument import report
+
+
+class LatestWorker:
+    """Fil de calcul en arrière-plan avec une boîte aux lettres à une place : une demande
+    arrivée pendant un calcul remplace celle en attente, seule la dernière est traitée.
+    Le fil d'affichage relève le dernier résultat avec `poll`, sans jamais attendre."""
+
+    def __init__(self, function):
+        self.function = function
+        self._condition = threading.Condition()
+        self._request = None
+        self._pending = False
+        self._result = None
+        self._fresh = False
+        self._busy = False
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, request):
+        """Dépose une demande, en écrasant celle qui n'a pas encore été prise"""
+        with self._condition:
+            self._request = request
+            self._pending = True
+            self._condition.notify_all()
+
+    def poll(self):
+        """Dernier résultat pas encore relevé, ou None"""
+        with self._condition:
+            if not self._fresh:
+                return None
+            self._fresh = False
+            return self._result
+
+    def wait(self, timeout=None):
+        """Attend que toutes les demandes déposées soient traitées ; False si délai dépassé"""
+        with self._condition:
+            return self._condition.wait_for(lambda: not (self._pending or self._busy), timeout)
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or not self._running)
+                if not self._running:
+                    return
+                request = self._request
+                self._pending = False
+                self._busy = True
+            try:
+                result = self.function(request)
+            except Exception as e:
+                report(logging.ERROR, "worker_failed", f"Erreur dans le fil de calcul: {e}")
+                result = None
+            with self._condition:
+                if result is not None:
+                    self._result = result
+                    self._fresh = True
+                self._busy = False
+                self._condition.notify_all()
+
+
+class BlitManager:
+    """Redessin partiel (blitting) d'artistes animés. Le fond de leurs axes (cadre,
+    graduations, grille, légende) est mémorisé à chaque rendu complet de la figure ;
+    `update` le restaure et ne redessine que les artistes animés par-dessus."""
+
+    def __init__(self, canvas, artists):
+        self.canvas = canvas
+        self.artists = list(artists)
+        self.axes = []
+        for artist in self.artists:
+            artist.set_animated(True)
+            if artist.axes not in self.axes:
+                self.axes.append(artist.axes)
+        self._backgrounds = None
+        canvas.mpl_connect("draw_event", self._on_draw)
+
+    def _on_draw(self, event):
+        self._backgrounds = [self.canvas.copy_from_bbox(ax.bbox) for ax in self.axes]
+        self._draw_artists()
+
+    def _draw_artists(self):
+        figure = self.canvas.figure
+        for artist in self.artists:
+            figure.draw_artist(artist)
+
+    def update(self):
+        """Redessine les artistes animés ; rendu complet tant qu'aucun fond n'est mémorisé"""
+        if self._backgrounds is None or not self.canvas.supports_blit:
+            self.canvas.draw_idle()
+            return
+        for background in self._backgrounds:
+            self.canvas.restore_region(background)
+        self._draw_artists()
+        for ax in self.axes:
+            self.canvas.blit(ax.bbox)
+        self.canvas.flush_events()
+
+
+def _frame_path(path, k):
+    """Nom du fichier de la trame `k` : champ de format de `path` ou suffixe _0000"""
+    if "{" in path:
+        return path.format(k)
+    root, ext = os.path.splitext(path)
+    return f"{root}_{k:04d}{ext}"
+
+
+def export_frames(figure, artists, update, count, path, fps):
+    """Rend `count` trames sans affichage (Agg) et les écrit dans `path`. Le fond statique
+    est dessiné une fois ; pour chaque trame, `update(k)` modifie les artistes animés, qui
+    sont redessinés sur ce fond. Le format suit l'extension : .gif (Pillow), .png (une
+    image par trame, voir _frame_path) ou vidéo (.mp4...) encodée par ffmpeg.
+    Retourne `path`, ou None si l'encodeur est introuvable ou échoue."""
+    from matplotlib import rcParams
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    canvas = figure.canvas
+    if not isinstance(canvas, FigureCanvasAgg):
+        canvas = FigureCanvasAgg(figure)
+    for artist in artists:
+        artist.set_animated(True)
+    canvas.draw()
+    background = canvas.copy_from_bbox(figure.bbox)
+
+    def frames():
+        for k in range(count):
+            update(k)
+            canvas.restore_region(background)
+            for artist in artists:
+                figure.draw_artist(artist)
+            yield np.asarray(canvas.buffer_rgba())
+
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".gif", ".png"):
+        from PIL import Image
+        if ext == ".png":
+            for k, frame in enumerate(frames()):
+                Image.fromarray(frame).save(_frame_path(path, k))
+            return path
+        # Palette réduite dès la capture : seules des images 8 bits restent en mémoire
+        images = [Image.fromarray(frame[..., :3]).quantize() for frame in frames()]
+        images[0].save(path, save_all=True, append_images=images[1:],
+                       duration=int(round(1000 / fps)), loop=0)
+        return path
+
+    ffmpeg = shutil.which(rcParams["animation.ffmpeg_path"])
+    if ffmpeg is None:
+        report(logging.ERROR, "ffmpeg_missing",
+               "Erreur: ffmpeg introuvable, impossible d'écrire la vidéo (utiliser .gif ou .png)")
+        return None
+    height, width = np.asarray(canvas.buffer_rgba()).shape[:2]
+    command = [ffmpeg, "-y", "-loglevel", "error", "-f", "rawvideo", "-pix_fmt", "rgba",
+               "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+               "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-pix_fmt", "yuv420p", path]
+    with subprocess.Popen(command, stdin=subprocess.PIPE) as process:
+        try:
+            for frame in frames():
+                process.stdin.write(frame.tobytes())
+        except BrokenPipeError:
+            pass  # ffmpeg s'est arrêté : son code de retour est signalé ci-dessous
+        finally:
+            process.stdin.close()
+    if process.returncode != 0:
+        report(logging.ERROR, "ffmpeg_failed", f"Erreur: ffmpeg a échoué (code {process.returncode})")
+        return None
+    return path
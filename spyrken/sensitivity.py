@@ -0,0 +1,100 @@
+import numpy as np
+
+from .solver import SPARSE_THRESHOLD, factorize
+
+
+class SensitivityResult:
+    """Sensibilités d'une fonction de transfert à la valeur de chaque composant.
+
+    `response[j]` est H = (V_to - V_from) / V_source à la fréquence `freqs[j]` et
+    `derivatives[j, k]` la dérivée dH/dp du composant `component_names[k]`, de valeur
+    `values[k]` (R, C, L, résistance interne ou d'interrupteur). NaN pour une source idéale."""
+
+    def __init__(self, freqs, component_names, values, response, derivatives):
+        self.freqs = freqs
+        self.component_names = component_names
+        self.values = values
+        self.response = response
+        self.derivatives = derivatives
+        self._index = {name: k for k, name in reversed(list(enumerate(component_names)))}
+
+    def of(self, component):
+        """dH/dp du composant `component` (objet ou nom) pour chaque fréquence"""
+        name = component if isinstance(component, str) else component.name
+        return self.derivatives[:, self._index[name]]
+
+    def normalized(self):
+        """Sensibilités relatives (p / H) dH/dp : variation relative de H pour 1 % de
+        variation de chaque valeur, à 1/100 près"""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.derivatives * self.values / self.response[:, None]
+
+    def ranking(self, freq):
+        """Noms des composants du plus au moins influent (|sensibilité relative|) à la
+        fréquence la plus proche de `freq`"""
+        j = int(np.argmin(np.abs(self.freqs - freq)))
+        order = np.argsort(-np.nan_to_num(np.abs(self.normalized()[j])), kind="stable")
+        return [self.component_names[k] for k in order]
+
+    def __str__(self):
+        return (f"Sensibilités: {len(self.component_names)} composant(s) x"
+                f" {len(self.freqs)} fréquence(s)")
+
+
+def admittance_derivatives(compiled, freqs, values):
+    """dy/dp de chaque composant (F, m) : -y² dZ/dp, avec dZ/dp = 1 (résistance),
+    -Z/C (condensateur) ou Z/L (bobine). Nulle là où l'admittance est bornée
+    (impédance nulle, condensateur en continu)."""
+    Z = compiled.impedances(freqs, values)
+    kinds = compiled.kinds
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dZ = np.where(kinds == "C", -Z / values, np.where(kinds == "L", Z / values, 1))
+        dy = -dZ / Z ** 2
+    bounded = (np.abs(Z) < 1e-12) | ((kinds == "C") & (np.asarray(freqs)[:, None] == 0))
+    return np.where(bounded | ~np.isfinite(dy), 0, dy)
+
+
+def adjoint_sensitivities(compiled, freqs, to_node, from_node, method="auto",
+                          threshold=SPARSE_THRESHOLD, ordering="amd"):
+    """Sensibilités de H = (V_to - V_from) / V_source par la méthode adjointe.
+
+    À chaque fréquence, Y x = b est factorisée une fois ; le système adjoint Yᵀ λ = c,
+    où c sélectionne la sortie, réutilise la même factorisation. Le résidu des lois des
+    nœuds s'écrit F = Σ y_k u_k w_k avec w_k = v_k - E_k (tension de branche, moins la
+    tension d'une source de Norton), d'où dH/dy_k = -(λ[node1] - λ[node2]) w_k / V_source :
+    le coût par composant se réduit à des opérations vectorielles."""
+    freqs = np.atleast_1d(np.asarray(freqs, dtype=float))
+    values = compiled.values()
+    y = compiled.admittances(freqs, values)
+    e = compiled.amplitudes()
+    N = compiled.size
+
+    # Vecteur de sortie sur les lignes du système (la référence et les nœuds imposés
+    # n'y figurent pas : leurs décalages ne dépendent pas des valeurs)
+    rows = compiled.row_of_node
+    c = np.zeros(N)
+    for node, sign in ((to_node, 1.0), (from_node, -1.0)):
+        if rows[node] < N:
+            c[rows[node]] += sign
+
+    x = np.empty((len(freqs), N), dtype=complex)
+    adjoint = np.zeros((len(freqs), N + 1), dtype=complex)  # Dernière colonne : référence (0)
+    for j in range(len(freqs)):
+        factor = factorize(compiled, y[j], method, threshold, ordering, check=False)
+        x[j] = factor.solve(compiled.rhs(y[j], e))
+        adjoint[j, :N] = factor.solve(c, transpose=True)
+
+    V = compiled.full_voltages(x, e)
+    v_ref = e[0]
+    response = (V[:, to_node] - V[:, from_node]) / v_ref
+
+    # w_k, puis dérivée de la sortie par rapport à chaque admittance
+    w = V[:, compiled.node1] - V[:, compiled.node2]
+    norton = compiled.sources[compiled.norton]
+    w[:, norton] -= e[compiled.norton]
+    lam = adjoint[:, rows]
+    dH_dy = -(lam[:, compiled.node1] - lam[:, compiled.node2]) * w / v_ref
+
+    derivatives = dH_dy * admittance_derivatives(compiled, freqs, values)
+    derivatives[:, compiled.sources[compiled.ideal]] = np.nan
+    return SensitivityResult(freqs, compiled.component_names, values, response, derivatives)
@@ -0,0 +1,128 @@
+import numpy as np
+
+
+def _frozen(array):
+    """Tableau contigu en lecture seule"""
+    array = np.ascontiguousarray(array)
+    array.flags.writeable = False
+    return array
+
+
+def first_index(names):
+    """Dictionnaire nom -> indice (premier indice pour un nom répété)"""
+    index = {}
+    for i, name in enumerate(names):
+        index.setdefault(name, i)
+    return index
+
+
+class Solution:
+    """Résultat immuable de Circuit.solve() : tableaux NumPy contigus en lecture seule.
+
+    `node_voltages` (n+1,) : tensions des nœuds dans l'ordre de `node_names`, le nœud de
+    référence en dernier (0). Pour chaque composant, dans l'ordre de `component_names` :
+    `branch_voltages` (tension node1 - node2), `currents` (de node1 vers node2) et `power`,
+    puissance complexe reçue V I*/2 (amplitudes crête ; V I en continu), négative pour une
+    source qui fournit de l'énergie.
+    Les nœuds se désignent par leur objet ou leur nom. Un composant se désigne par son objet,
+    retrouvé par sa ligne dans le stockage du circuit résolu (noms absents ou répétés
+    compris), ou par son nom (premier composant de ce nom)."""
+
+    __slots__ = ("freq", "node_names", "component_names", "node_voltages", "branch_voltages",
+                 "currents", "power", "_node_index", "_component_index", "_store", "_version")
+
+    def __init__(self, freq, node_names, component_names, node_voltages, branch_voltages, currents,
+                 node_index=None, component_index=None, store=None):
+        currents = np.asarray(currents)
+        scale = 0.5 if freq else 1.0
+        fields = {
+            "freq": freq,
+            "node_names": tuple(node_names),
+            "component_names": tuple(component_names),
+            "node_voltages": _frozen(node_voltages),
+            "branch_voltages": _frozen(branch_voltages),
+            "currents": _frozen(currents),
+            "power": _frozen(scale * np.asarray(branch_voltages) * np.conj(currents)),
+            # Index partagés par toutes les solutions d'une même topologie
+            "_node_index": node_index if node_index is not None else first_index(node_names),
+            "_component_index": (component_index if component_index is not None
+                                 else first_index(component_names)),
+            # Stockage du circuit résolu et version de sa topologie, pour retrouver un
+            # composant par sa ligne (non conservé par une copie)
+            "_store": store,
+            "_version": store.version if store is not None else None,
+        }
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Solution est immuable")
+
+    def __delattr__(self, name):
+        raise AttributeError("Solution est immuable")
+
+    def __reduce__(self):
+        return (Solution, (self.freq, self.node_names, self.component_names, self.node_voltages,
+                           self.branch_voltages, self.currents))
+
+    def node_index(self, node):
+        """Indice du nœud `node` (objet Node ou nom) dans node_voltages"""
+        name = node if isinstance(node, str) else node.name
+        try:
+            return self._node_index[name]
+        except KeyError:
+            raise KeyError(f"Nœud {name} introuvable dans la solution") from None
+
+    def component_index(self, component):
+        """Indice du composant `component` (objet ou nom) dans les tableaux par composant"""
+        if isinstance(component, str):
+            try:
+                return self._component_index[component]
+            except KeyError:
+                raise KeyError(f"Composant {component} introuvable dans la solution") from None
+        store = self._store
+        if store is None:
+            raise KeyError(f"Composant {component.name}: désigner les composants par leur nom"
+                           " dans une copie de la solution")
+        if (component._store is not store or store.version != self._version
+                or component._index >= len(self.component_names)):
+            raise KeyError(f"Composant {component.name} introuvable dans la solution")
+        return component._index
+
+    def voltage(self, node, reference=None):
+        """Tension du nœud `node`, par rapport au nœud `reference` s'il est donné"""
+        V = self.node_voltages[self.node_index(node)]
+        if reference is not None:
+            V = V - self.node_voltages[self.node_index(reference)]
+        return V
+
+    def branch_voltage(self, component):
+        return self.branch_voltages[self.component_index(component)]
+
+    def current(self, component):
+        return self.currents[self.component_index(component)]
+
+    def component_power(self, component):
+        return self.power[self.component_index(component)]
+
+    def __str__(self):
+        return (f"Solution: f={self.freq} Hz, {len(self.node_names)} nœud(s),"
+                f" {len(self.component_names)} composant(s)")
+
+
+def build_solution(compiled, freq, x, y):
+    """Solution du système `x` pour les admittances `y` : tensions des nœuds, puis tensions
+    et courants de tous les composants en opérations vectorielles sur l'incidence
+    (node1, node2) du circuit compilé"""
+    V = compiled.full_voltages(x)
+    v = V[compiled.node1] - V[compiled.node2]
+    current = y[:compiled.m] * v  # Les termes suivants sont ceux des sous-circuits
+    if freq == 0:
+        current[compiled.kinds == "C"] = 0  # Condensateur en continu : circuit ouvert
+    norton = compiled.sources[compiled.norton]
+    current[norton] -= y[norton] * compiled.amplitudes()[compiled.norton]
+
+    # Courants de branche des sources idéales, issus directement du système
+    current[compiled.sources[compiled.ideal]] = compiled.source_currents(x, V, y)
+    return Solution(freq, compiled.node_names, compiled.component_names, V, v, current,
+                    compiled.node_lookup, compiled.component_lookup, compiled.store)
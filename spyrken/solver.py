@@ -0,0 +1,215 @@
+import importlib
+import importlib.util
+import logging
+import sys
+import warnings
+
+import numpy as np
+
+from .instrument import report
+
+# SciPy est optionnel (seul le solveur dense est alors disponible) et n'est importé qu'au
+# premier usage : import spyrken ne paie pas son temps de chargement
+_scipy_modules = {}
+
+# Nombre de nœuds à partir duquel le solveur creux est choisi automatiquement
+SPARSE_THRESHOLD = 300
+
+# Renumérotations disponibles pour limiter le remplissage de la factorisation LU creuse
+ORDERINGS = {
+    "amd": "MMD_AT_PLUS_A",  # Degré minimum sur la structure de Y + Yᵀ
+    "colamd": "COLAMD",
+    "natural": "NATURAL",
+    "rcm": "NATURAL",        # Reverse Cuthill-McKee appliqué avant la factorisation
+}
+
+
+class SingularMatrixError(np.linalg.LinAlgError):
+    """La matrice du système est singulière"""
+    pass
+
+
+def scipy_module(name):
+    """Sous-module SciPy `name` ("linalg", "sparse", "sparse.linalg", "sparse.csgraph"),
+    importé au premier appel ; None si SciPy n'est pas installé"""
+    try:
+        return _scipy_modules[name]
+    except KeyError:
+        pass
+    try:
+        module = importlib.import_module("scipy." + name)
+    except ImportError:
+        module = None
+    _scipy_modules[name] = module
+    return module
+
+
+def has_sparse():
+    """Indique si le solveur creux (SciPy) est disponible, sans importer SciPy"""
+    return importlib.util.find_spec("scipy") is not None
+
+
+def issparse(Y):
+    """Indique si Y est une matrice creuse SciPy (sans importer SciPy : une matrice creuse
+    n'existe que si scipy.sparse est déjà chargé)"""
+    sp = sys.modules.get("scipy.sparse")
+    return sp is not None and sp.issparse(Y)
+
+
+def use_sparse(n, method="auto", threshold=SPARSE_THRESHOLD):
+    """Choisit entre le solveur dense et le solveur creux"""
+    if method == "dense" or (method != "sparse" and n < threshold):
+        return False
+    if not has_sparse():
+        if method == "sparse":
+            report(logging.WARNING, "scipy_missing",
+                   "Attention: SciPy n'est pas installé, utilisation du solveur dense.")
+        return False
+    return True
+
+
+def _column_scale(Y):
+    """Plus grand module de chaque colonne de Y, référence du test de pivot"""
+    if issparse(Y):
+        return np.asarray(abs(Y).max(axis=0).todense()).ravel()
+    return np.abs(Y).max(axis=0)
+
+
+def _check_pivots(pivots, scale):
+    """Lève SingularMatrixError si un pivot de U est négligeable devant sa colonne de Y"""
+    pivots = np.abs(pivots)
+    tolerance = len(pivots) * np.finfo(float).eps * scale
+    if np.any((pivots == 0) | (pivots <= tolerance)):
+        raise SingularMatrixError("pivot nul ou négligeable")
+
+
+class DenseFactor:
+    """Factorisation LU d'une matrice dense"""
+    def __init__(self, Y, check=True):
+        self.n = Y.shape[0]
+        self.nnz = self.n * self.n  # Termes de la factorisation
+        sla = scipy_module("linalg")
+        self._getrs = None
+        if sla is not None:
+            with warnings.catch_warnings():
+                # Un pivot exactement nul est signalé par le test ci-dessous
+                warnings.simplefilter("ignore", sla.LinAlgWarning)
+                self.lu, self.piv = sla.lu_factor(Y, check_finite=False)
+            # Appel direct de LAPACK : évite le coût fixe de lu_solve à chaque résolution
+            self._getrs = sla.get_lapack_funcs("getrs", (self.lu,))
+            if check:
+                # Le pivotage partiel ne permute que les lignes : le pivot i se compare à la colonne i
+                _check_pivots(np.diag(self.lu), _column_scale(Y))
+        else:
+            self.lu = Y
+            if check and np.linalg.cond(Y) * self.n * np.finfo(float).eps >= 1:
+                raise SingularMatrixError("matrice mal conditionnée")
+
+    def solve(self, b, transpose=False):
+        """Solution de Y x = b, ou de Yᵀ x = b avec `transpose`"""
+        if self._getrs is None:
+            return np.linalg.solve(self.lu.T if transpose else self.lu, b)
+        if np.iscomplexobj(b) and not np.iscomplexobj(self.lu):
+            return self.solve(b.real, transpose) + 1j * self.solve(b.imag, transpose)
+        x, info = self._getrs(self.lu, self.piv, np.asarray(b, dtype=self.lu.dtype),
+                              trans=int(transpose))
+        return x
+
+
+class SparseFactor:
+    """Factorisation LU creuse (SuperLU) avec renumérotation limitant le remplissage"""
+    def __init__(self, Y, ordering="amd", check=True):
+        if ordering not in ORDERINGS:
+            raise ValueError(f"Renumérotation inconnue: {ordering}")
+        Y = scipy_module("sparse").csc_matrix(Y)
+        self.n = Y.shape[0]
+        self.perm = None
+        if ordering == "rcm":
+            csgraph = scipy_module("sparse.csgraph")
+            self.perm = csgraph.reverse_cuthill_mckee(Y.tocsr(), symmetric_mode=True)
+            Y = Y[self.perm][:, self.perm].tocsc()
+        try:
+            self.lu = scipy_module("sparse.linalg").splu(Y, permc_spec=ORDERINGS[ordering])
+        except RuntimeError as e:
+            raise SingularMatrixError(str(e))
+        self.nnz = self.lu.L.nnz + self.lu.U.nnz  # Termes de la factorisation, remplissage compris
+        if check:
+            # Pr Y Pc = L U : le pivot j correspond à la colonne perm_c[j] de Y
+            _check_pivots(self.lu.U.diagonal(), _column_scale(Y)[self.lu.perm_c])
+
+    def solve(self, b, transpose=False):
+        """Solution de Y x = b, ou de Yᵀ x = b avec `transpose`"""
+        trans = "T" if transpose else "N"
+        if self.perm is None:
+            return self.lu.solve(b, trans)
+        # Y est renumérotée de façon symétrique (P Y Pᵀ) : même permutation pour Yᵀ
+        x = np.empty_like(b, dtype=complex)
+        x[self.perm] = self.lu.solve(np.ascontiguousarray(b[self.perm]), trans)
+        return x
+
+
+def condition_estimate(Y, factor):
+    """Conditionnement de Y en norme 1, ‖Y‖₁ ‖Y⁻¹‖₁ : la norme de l'inverse est estimée
+    (Hager-Higham) par quelques résolutions avec la factorisation `factor` existante"""
+    n = Y.shape[0]
+    if n == 0:
+        return 1.0
+    norm = float(abs(Y).sum(axis=0).max())
+    spla = scipy_module("sparse.linalg")
+    if spla is None:
+        return norm * float(np.abs(np.linalg.inv(Y)).sum(axis=0).max())
+    # (Y⁻¹)ᴴ x = conj(Y⁻ᵀ conj(x))
+    inverse = spla.LinearOperator((n, n), dtype=complex, matvec=factor.solve,
+                                  rmatvec=lambda x: np.conj(factor.solve(np.conj(x), transpose=True)))
+    return norm * float(spla.onenormest(inverse))
+
+
+def factorize(compiled, y, method="auto", threshold=SPARSE_THRESHOLD, ordering="amd", check=True):
+    """Assemble et factorise la matrice du système pour le vecteur d'admittances `y`"""
+    if use_sparse(compiled.size, method, threshold):
+        return SparseFactor(compiled.sparse_matrix(y), ordering, check)
+    return DenseFactor(compiled.matrix(y), check)
+
+
+class IncrementalSolver:
+    """Conserve la factorisation d'un système de base et résout les systèmes voisins.
+
+    Un dipôle dont l'admittance change modifie Y d'un terme de rang 1 (y u uᵀ), appliqué
+    par la formule de Sherman-Morrison-Woodbury ; un changement limité aux sources ne
+    demande qu'une nouvelle descente-remontée."""
+
+    def __init__(self, compiled, y, factor, max_rank=8):
+        self.compiled = compiled
+        self.y0 = np.array(y)
+        self.factor = factor
+        self.max_rank = max_rank
+        self._updates = {}  # Composants modifiés -> (U, Y0⁻¹U)
+
+    def solve(self, y, b):
+        """Résout Y(y) x = b, ou retourne None s'il faut refactoriser"""
+        changed = np.flatnonzero(y != self.y0)
+        if len(changed) == 0:
+            return self.factor.solve(b)
+        if len(changed) > min(self.max_rank, self.compiled.size // 4):
+            return None
+        if changed[-1] >= self.compiled.m:
+            return None  # Matrice des ports d'un sous-circuit modifiée : pas un terme de rang 1
+
+        key = tuple(changed)
+        if key not in self._updates:
+            if len(self._updates) >= 16:
+                self._updates.clear()
+            U = self.compiled.incidence(changed)
+            self._updates[key] = (U, self.factor.solve(U.astype(complex)))
+        U, Z = self._updates[key]
+
+        dy = y[changed] - self.y0[changed]
+        S = np.diag(1 / dy) + U.T @ Z
+        try:
+            # Y0 + U D Uᵀ est singulière si et seulement si S l'est : on refactorise alors
+            if np.linalg.cond(S) * np.finfo(float).eps * len(S) >= 1:
+                return None
+            x0 = self.factor.solve(b)
+            return x0 - Z @ np.linalg.solve(S, U.T @ x0)
+        except np.linalg.LinAlgError:
+            return None
@@ -0,0 +1,316 @@
+import numpy as np
+
+from .solver import SingularMatrixError, issparse, scipy_module
+
+
+class PoleZeroModel:
+    """Fonction de transfert rationnelle H(s), sous deux formes équivalentes :
+    pôles et résidus, H(s) = direct + Σ r/(s - p), et pôles, zéros et gain,
+    H(s) = gain * Π(s - zéros) / Π(s - pôles), gardée normalisée en s0 :
+    H(s0) * Π((s - z)/(s0 - z)) / Π((s - p)/(s0 - p)).
+
+    Une fois le modèle extrait, chaque évaluation ne coûte qu'une somme ou un produit
+    de facteurs du premier degré par point, quelle que soit la taille du circuit."""
+
+    def __init__(self, poles, residues, direct, zeros, s0, h0):
+        self.poles = poles
+        self.residues = residues
+        self.direct = direct
+        self.zeros = zeros
+        self.s0 = s0
+        self.h0 = h0
+
+    @property
+    def gain(self):
+        """Coefficient dominant du numérateur sur celui du dénominateur"""
+        with np.errstate(over="ignore", invalid="ignore"):
+            return self.h0 * np.prod(self.s0 - self.poles) / np.prod(self.s0 - self.zeros)
+
+    @property
+    def order(self):
+        return len(self.poles)
+
+    def __call__(self, s):
+        """H(s) pour un scalaire ou un tableau de points complexes.
+        La somme des résidus est exacte près des pôles, mais se réduit à des erreurs
+        d'arrondi loin dans l'atténuation : le produit des facteurs prend alors le relais."""
+        s = np.asarray(s, dtype=complex)[..., None]
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore", under="ignore"):
+            terms = self.residues / (s - self.poles)
+            H = self.direct + terms.sum(axis=-1)
+            cancelled = np.abs(H) < 1e-6 * (abs(self.direct) + np.abs(terms).sum(axis=-1))
+            if np.any(cancelled):
+                product = self.h0 * (np.prod((s - self.zeros) / (self.s0 - self.zeros), axis=-1)
+                                     / np.prod((s - self.poles) / (self.s0 - self.poles), axis=-1))
+                H = np.where(cancelled, product, H)
+        return H
+
+    def response(self, freqs):
+        """Réponse en fréquence H(j2πf)"""
+        return self(2j * np.pi * np.asarray(freqs, dtype=float))
+
+    def step(self, t):
+        """Réponse indicielle, toutes les sources passant de 0 à leur amplitude en t = 0 :
+        y(t) = direct + Σ r φ(p), avec φ(p) = (exp(p t) - 1) / p (t pour un pôle à l'origine).
+        Un pôle double est extrait sous forme de deux pôles très proches aux résidus
+        grands et opposés : leurs résidus sont repris de la forme produit, plus précise
+        que les vecteurs propres presque parallèles, et chaque paire est évaluée en son
+        milieu m par (r1 + r2) φ(m) + (r1 - r2) (p1 - p2)/2 φ'(m), sans compensation."""
+        t = np.asarray(t, dtype=float)[..., None]
+        p, r = self.poles, self.residues.copy()
+        first, second = _close_pairs(p)
+        for i in np.concatenate([first, second]):
+            others = np.delete(p, i)
+            r[i] = self.h0 * (self.s0 - p[i]) * (np.prod((p[i] - self.zeros) / (self.s0 - self.zeros))
+                                                 / np.prod((p[i] - others) / (self.s0 - others)))
+        single = np.ones(len(p), dtype=bool)
+        single[first] = single[second] = False
+        middle = (p[first] + p[second]) / 2
+        y = self.direct + (r[single] * _phi(p[single], t)).sum(axis=-1)
+        phi = _phi(middle, t)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slope = np.where(middle == 0, t ** 2 / 2, (t * np.exp(middle * t) - phi) / middle)
+        y = y + ((r[first] + r[second]) * phi
+                 + (r[first] - r[second]) * (p[first] - p[second]) / 2 * slope).sum(axis=-1)
+        return y.real
+
+    def resonances(self):
+        """(fréquences propres en Hz, facteurs de qualité) des paires de pôles complexes"""
+        p = self.poles[self.poles.imag > 0]
+        with np.errstate(divide="ignore"):
+            return np.abs(p) / (2 * np.pi), np.abs(p) / (-2 * p.real)
+
+    def __str__(self):
+        return (f"Modèle pôles-zéros: {len(self.poles)} pôle(s), {len(self.zeros)} zéro(s),"
+                f" gain {_clean(np.complex128(self.gain)):.4g}")
+
+
+class StateSpace:
+    """Système nodal d'un circuit sous forme de descripteur (G + sC) x = B e.
+
+    Les inconnues sont les tensions des nœuds (dans l'ordre du circuit compilé), puis les
+    courants des sources idéales, des bobines et des courts-circuits (résistances nulles).
+    La colonne k de B est l'excitation de la source k pour une tension unité ; `e` contient
+    les amplitudes des sources divisées par celle de la première, de sorte que b = B e
+    correspond à une entrée u égale à la tension de la première source, comme dans
+    frequency_response. G et C sont creuses (SciPy) si le circuit est grand."""
+
+    def __init__(self, G, C, B, e, index, n, sources):
+        self.G = G
+        self.C = C
+        self.B = B
+        self.e = e
+        self.index = index      # Nœud -> ligne (None pour la référence)
+        self.n = n              # Nombre de lignes de tensions de nœuds
+        self.sources = sources  # Sources, dans l'ordre des colonnes de B
+
+    @property
+    def b(self):
+        return self.B @ self.e
+
+    def dense(self):
+        """(G, C) en tableaux denses"""
+        if issparse(self.G):
+            return self.G.toarray(), self.C.toarray()
+        return self.G, self.C
+
+    @property
+    def size(self):
+        return len(self.b)
+
+    def output(self, from_node, to_node):
+        """Vecteur de sortie c tel que cᵀx = V(to_node) - V(from_node)"""
+        c = np.zeros(self.size)
+        for node, sign in ((to_node, 1.0), (from_node, -1.0)):
+            row = self.index[node]
+            if row is not None:
+                c[row] += sign
+        return c
+
+    def transfer(self, from_node, to_node, tol=1e-10):
+        """Modèle pôles-zéros de (V(to_node) - V(from_node)) / u.
+
+        Le faisceau (G, -C) est ramené à un problème aux valeurs propres standard par
+        décalage-inversion en un point réel s0 > 0, qui n'est jamais un pôle d'un circuit
+        passif : M = (G + s0 C)⁻¹ C, et chaque valeur propre μ de M donne un pôle
+        p = s0 - 1/μ. Les μ négligeables (module inférieur à `tol`/s0) correspondent aux
+        pôles à l'infini. Les résidus viennent des vecteurs propres à droite et à gauche.
+        Les zéros sont les valeurs propres finies du faisceau de Rosenbrock, en nombre
+        fixé par le degré relatif ; les paires pôle-zéro confondues (parties du circuit
+        invisibles depuis la sortie) sont retirées."""
+        c = self.output(from_node, to_node)
+        G, C = self.dense()
+        s0 = self._shift()
+        A = G + s0 * C
+        b = self.b
+        try:
+            X = np.linalg.solve(A, np.column_stack([C, b]))
+        except np.linalg.LinAlgError:
+            raise SingularMatrixError("faisceau G + sC singulier") from None
+        M, x0 = X[:, :-1], X[:, -1]
+        h0 = c @ x0
+
+        # H(s) = cᵀ (I + (s - s0) M)⁻¹ x0 : chaque groupe de modes de même valeur propre μ
+        # contribue cᵀVᵢ (WᵢᵀVᵢ)⁻¹ Wᵢᵀx0 / (1 + (s - s0) μ), avec V et W les vecteurs
+        # propres à droite et à gauche (un pôle répété non défectif reste un pôle simple de H)
+        mu, right = np.linalg.eig(M)
+        mu_left, left = np.linalg.eig(M.T)
+        free = np.ones(len(mu_left), dtype=bool)
+        finite = np.flatnonzero(np.abs(mu) > tol / s0)
+        finite = finite[np.argsort(mu[finite])]
+        groups = np.split(finite, np.flatnonzero(np.abs(np.diff(mu[finite])) > 1e-8 * np.abs(mu[finite][1:])) + 1)
+        eigenvalues, weights = [], []
+        for group in groups if len(finite) else []:
+            center = mu[group].mean()
+            j = np.argsort(np.where(free, np.abs(mu_left - center), np.inf))[:len(group)]
+            free[j] = False
+            V, W = right[:, group], left[:, j]
+            eigenvalues.append(center)
+            weights.append((c @ V) @ np.linalg.solve(W.T @ V, W.T @ x0))
+        mu = np.array(eigenvalues, dtype=complex)
+        poles = _clean(s0 - 1 / mu)
+        residues = np.array(weights, dtype=complex) / mu
+        direct = h0 - np.sum(residues / (s0 - poles))
+
+        # Degré relatif : premier paramètre de Markov (direct, Σ r, Σ r p, ...) non nul
+        scale = abs(h0) + np.sum(np.abs(residues / (s0 - poles)))
+        degree = 0
+        if abs(direct) <= 1e-8 * scale:
+            direct, degree = 0, len(poles) + 1
+            ratio = poles / max(np.abs(poles).max(initial=0), s0)
+            for j in range(len(poles)):
+                terms = residues * ratio ** j
+                if abs(terms.sum()) > 1e-8 * np.sum(np.abs(terms)):
+                    degree = j + 1
+                    break
+        count = max(len(poles) - degree, 0)
+
+        zeros = np.zeros(0, dtype=complex)
+        if count and h0 != 0:
+            # Faisceau de Rosenbrock [[G + sC, b], [cᵀ, 0]], régulier en s0 puisque H(s0) ≠ 0
+            N = self.size
+            P = np.zeros((N + 1, N + 1), dtype=complex)
+            P[:N, :N] = A
+            P[:N, N] = b
+            P[N, :N] = c
+            E = np.zeros((N + 1, N + 1))
+            E[:N, :N] = C
+            nu = np.linalg.eigvals(np.linalg.solve(P, E))
+            nu = nu[np.argsort(-np.abs(nu))[:count]]
+            nu = nu[np.abs(nu) > tol / s0]
+            zeros = _clean(s0 - 1 / nu)
+
+        keep, zeros = _cancel(poles, zeros, s0)
+        return PoleZeroModel(poles[keep], residues[keep], direct, zeros, s0, h0)
+
+    def _shift(self):
+        """Point de décalage s0 : moyenne géométrique des taux G_ii / C_ii des nœuds
+        (1 si aucun nœud n'a à la fois une conductance et une capacité)"""
+        g, c = np.abs(self.G.diagonal()), np.abs(self.C.diagonal())
+        both = (g > 0) & (c > 0)
+        if not np.any(both):
+            return 1.0
+        return float(np.exp(np.mean(np.log(g[both] / c[both]))))
+
+
+def _clean(s):
+    """Retire la partie imaginaire d'arrondi des valeurs réelles"""
+    return np.where(np.abs(s.imag) <= 1e-9 * np.abs(s), s.real + 0j, s)
+
+
+def _phi(p, t):
+    """(exp(p t) - 1) / p, égal à t pour p = 0"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(p == 0, t, np.expm1(p * t) / np.where(p == 0, 1, p))
+
+
+def _close_pairs(poles, rtol=1e-6):
+    """Indices (i, j) des paires de pôles distincts mais confondus à `rtol` près"""
+    first, second, used = [], [], set()
+    for i in range(len(poles)):
+        for j in range(i + 1, len(poles)):
+            if i not in used and j not in used and abs(poles[i] - poles[j]) <= rtol * abs(poles[i]):
+                first.append(i)
+                second.append(j)
+                used.update((i, j))
+    return np.array(first, dtype=np.intp), np.array(second, dtype=np.intp)
+
+
+def _cancel(poles, zeros, s0, rtol=1e-6):
+    """Retire les paires pôle-zéro confondues (à `rtol` près) ; retourne le masque des
+    pôles conservés et les zéros restants"""
+    keep, kept = np.ones(len(poles), dtype=bool), []
+    for z in zeros:
+        distance = np.where(keep, np.abs(poles - z), np.inf)
+        if len(poles):
+            k = int(np.argmin(distance))
+            if distance[k] <= rtol * max(abs(z), abs(poles[k])) + 1e-8 * s0:
+                keep[k] = False
+                continue
+        kept.append(z)
+    return keep, np.array(kept, dtype=complex)
+
+
+def build_state_space(compiled, sparse=False):
+    """Assemble le descripteur (G, C, B) d'un circuit compilé, en matrices creuses CSC si
+    `sparse` ; `e` reçoit les amplitudes actuelles divisées par celle de la première source"""
+    n = compiled.n
+    kinds, node1, node2 = compiled.kinds, compiled.node1, compiled.node2
+    values = compiled.values()
+
+    # Dipôles résistifs (résistances, interrupteurs, sources de Norton) et courts-circuits
+    resistive = (kinds == "R") | (kinds == "S")
+    resistive[compiled.sources[compiled.norton]] = True
+    shorts = resistive & (np.abs(values) < 1e-12)
+    resistive &= ~shorts
+    branches = np.concatenate([compiled.sources[compiled.ideal], np.flatnonzero(kinds == "L"),
+                               np.flatnonzero(shorts)])
+    N = n + len(branches)
+
+    # Les entrées sur la référence (indice n) sont redirigées vers la ligne N, retirée à la fin
+    a, c = node1.copy(), node2.copy()
+    a[a == n] = N
+    c[c == n] = N
+
+    def stamp(slots, weights):
+        rows = np.concatenate([a[slots], c[slots], a[slots], c[slots]])
+        cols = np.concatenate([a[slots], c[slots], c[slots], a[slots]])
+        return rows, cols, np.concatenate([weights, weights, -weights, -weights])
+
+    slots = np.flatnonzero(resistive)
+    G = [stamp(slots, 1 / values[slots])]
+    slots = np.flatnonzero(kinds == "C")
+    C = [stamp(slots, values[slots])]
+
+    # Lignes de branche : V(node1) - V(node2) - sL i = E (E = 0 hors sources idéales)
+    rows = n + np.arange(len(branches))
+    ones = np.ones(len(branches))
+    G.append((np.concatenate([a[branches], rows, c[branches], rows]),
+              np.concatenate([rows, a[branches], rows, c[branches]]),
+              np.concatenate([ones, ones, -ones, -ones])))
+    inductors = kinds[branches] == "L"
+    C.append((rows[inductors], rows[inductors], -values[branches[inductors]]))
+
+    # Excitation unité de chaque source : 1/r en node1 et -1/r en node2 pour une source de
+    # Norton, second membre de sa ligne de branche pour une source idéale
+    B = np.zeros((N + 1, len(compiled.sources)))
+    norton = compiled.sources[compiled.norton]
+    np.add.at(B, (a[norton], compiled.norton), 1 / values[norton])
+    np.add.at(B, (c[norton], compiled.norton), -1 / values[norton])
+    B[n + np.arange(len(compiled.ideal)), compiled.ideal] = 1
+
+    def assemble(parts):
+        rows, cols, vals = (np.concatenate(column) for column in zip(*parts))
+        keep = (rows < N) & (cols < N)
+        if sparse:
+            M = scipy_module("sparse").coo_matrix((vals[keep], (rows[keep], cols[keep])), shape=(N, N))
+            return M.tocsc()
+        M = np.zeros((N, N))
+        np.add.at(M, (rows[keep], cols[keep]), vals[keep])
+        return M
+
+    index = {node: i for i, node in enumerate(compiled.nodes)}
+    index[compiled.reference] = None
+    amplitudes = compiled.amplitudes()
+    sources = [compiled.component(k) for k in compiled.sources]
+    return StateSpace(assemble(G), assemble(C), B[:N], amplitudes / amplitudes[0], index, n, sources)
@@ -0,0 +1,323 @@
+import numpy as np
+
+# Colonnes du stockage : type, valeur, connexions, paramètres de source et résultats
+FIELDS = (("kind", "<U1"), ("value", float), ("node1", np.intp), ("node2", np.intp),
+          ("amplitude", complex), ("freq", float), ("voltage", complex), ("current", complex),
+          ("impedance", complex), ("uid", np.int64))
+
+# Classe de vue associée à chaque code de composant (renseignée par components.py)
+KINDS = {}
+
+_next_uid = 0  # Identifiant unique des composants, conservé quand une ligne change de stockage
+
+
+def _new_uids(count):
+    global _next_uid
+    _next_uid += count
+    return _next_uid - count
+
+
+class RowStore:
+    """Stockage d'un composant seul, pas encore ajouté à un circuit : une ligne de scalaires,
+    moins coûteuse à créer que des colonnes NumPy. Les nœuds y sont gardés tels quels."""
+    __slots__ = [field for field, _ in FIELDS] + ["name", "component", "_extras"]
+    owned = False
+    size = 1
+
+    def __init__(self, kind, value, name, component):
+        self.kind = kind
+        self.value = value
+        self.node1 = self.node2 = -1
+        self.amplitude = self.freq = self.voltage = self.current = 0
+        self.impedance = np.nan
+        self.uid = _new_uids(1)
+        self.name = name
+        self.component = component
+        self._extras = None
+
+    def get(self, field, i):
+        return getattr(self, field)
+
+    def set(self, field, i, value):
+        setattr(self, field, value)
+
+    def name_of(self, i):
+        return self.name
+
+    def rename(self, i, name):
+        self.name = name
+
+    @property
+    def extras(self):
+        return {0: self._extras} if self._extras else {}
+
+    def extras_of(self, i):
+        if self._extras is None:
+            self._extras = {}
+        return self._extras
+
+    def node_id(self, node):
+        if node is None:
+            return -1
+        if node._store is None:
+            node._store = self
+        return node
+
+    def node_of(self, k):
+        return None if isinstance(k, int) and k == -1 else k
+
+    def view(self, i):
+        return self.component
+
+    def touching(self, node):
+        return [self.component] if node is self.node1 or node is self.node2 else []
+
+    def source_count(self, node):
+        return int(self.kind == "V" and (node is self.node1 or node is self.node2))
+
+
+def _flushed(name, column=False):
+    """Propriété lisant un attribut après recopie des composants en attente"""
+    def get(self):
+        if self._pending:
+            self._flush()
+        return self._columns[name] if column else getattr(self, name)
+    return property(get)
+
+
+class ComponentStore:
+    """Composants rangés en colonnes (struct-of-arrays) : une ligne par composant.
+
+    Les objets Resistor, Capacitor... ne sont que des vues (stockage, ligne) créées à la
+    demande. Les nœuds sont référencés par leur indice dans `nodes` (-1 : non connecté) et
+    les attributs rares (forme d'onde, paramètres d'interrupteur...) sont dans `extras`.
+    Les composants ajoutés un par un sont mis en attente, puis recopiés en bloc à la
+    lecture suivante des colonnes."""
+
+    def __init__(self, capacity=8, owned=False):
+        self.owned = owned  # Stockage d'un circuit : devient le stockage de référence de ses nœuds
+        self.version = 0    # Incrémenté à chaque changement de topologie
+        self._size = 0
+        self._columns = {field: np.empty(capacity, dtype=dtype) for field, dtype in FIELDS}
+        self._names = []
+        self._views = []
+        self._extras = {}
+        self._pending = {}
+        self._sources = (None, None)
+        self.nodes = []
+        self._node_index = {}
+
+    kind = _flushed("kind", True)
+    value = _flushed("value", True)
+    node1 = _flushed("node1", True)
+    node2 = _flushed("node2", True)
+    amplitude = _flushed("amplitude", True)
+    freq = _flushed("freq", True)
+    voltage = _flushed("voltage", True)
+    current = _flushed("current", True)
+    impedance = _flushed("impedance", True)
+    uid = _flushed("uid", True)
+    size = _flushed("_size")
+    names = _flushed("_names")
+    views = _flushed("_views")
+    extras = _flushed("_extras")
+
+    def __len__(self):
+        return self.size
+
+    def get(self, field, i):
+        return getattr(self, field)[i]
+
+    def set(self, field, i, value):
+        getattr(self, field)[i] = value
+
+    def name_of(self, i):
+        return self.names[i]
+
+    def rename(self, i, name):
+        self.names[i] = name
+
+    def extras_of(self, i):
+        return self.extras.setdefault(i, {})
+
+    def node_id(self, node):
+        """Indice de `node` dans ce stockage, enregistré au besoin (-1 pour None)"""
+        if node is None:
+            return -1
+        k = self._node_index.get(id(node))
+        if k is None:
+            k = self._node_index[id(node)] = len(self.nodes)
+            self.nodes.append(node)
+        if self.owned or node._store is None:
+            node._store = self
+        return k
+
+    def node_of(self, k):
+        return self.nodes[k] if k >= 0 else None
+
+    def view(self, i):
+        """Objet composant de la ligne `i` (créé une seule fois)"""
+        component = self.views[i]
+        if component is None:
+            component = object.__new__(KINDS[self.kind[i]])
+            object.__setattr__(component, "_store", self)
+            object.__setattr__(component, "_index", i)
+            self.views[i] = component
+        return component
+
+    def touching(self, node):
+        """Composants connectés à `node`"""
+        k = self._node_index.get(id(node))
+        if k is None:
+            return []
+        size = self.size
+        rows = np.flatnonzero((self.node1[:size] == k) | (self.node2[:size] == k))
+        return [self.view(i) for i in rows]
+
+    def source_counts(self):
+        """Nombre de sources de tension connectées à chaque nœud du stockage"""
+        size = self.size
+        sources = self.kind[:size] == "V"
+        a, b = self.node1[:size][sources], self.node2[:size][sources]
+        counts = np.bincount(a[a >= 0], minlength=len(self.nodes))
+        return counts + np.bincount(b[(b >= 0) & (b != a)], minlength=len(self.nodes))
+
+    def source_count(self, node):
+        return int(self.source_counts()[self.node_id(node)])
+
+    def _reserve(self, count):
+        """Agrandit les colonnes (capacité doublée) pour `count` lignes de plus"""
+        needed = self._size + count
+        capacity = len(self._columns["kind"])
+        if needed <= capacity:
+            return
+        capacity = max(needed, 2 * capacity)
+        for field, column in self._columns.items():
+            new = np.empty(capacity, dtype=column.dtype)
+            new[:self._size] = column[:self._size]
+            self._columns[field] = new
+
+    def extend(self, kinds, values, node1, node2, names, amplitudes=0, freqs=0, impedances=np.nan):
+        """Ajoute des lignes en bloc ; retourne l'indice de la première"""
+        if self._pending:
+            self._flush()
+        count = len(names)
+        self._reserve(count)
+        rows = slice(self._size, self._size + count)
+        columns = self._columns
+        columns["kind"][rows] = kinds
+        columns["value"][rows] = values
+        columns["node1"][rows] = node1
+        columns["node2"][rows] = node2
+        columns["amplitude"][rows] = amplitudes
+        columns["freq"][rows] = freqs
+        columns["voltage"][rows] = 0
+        columns["current"][rows] = 0
+        columns["impedance"][rows] = impedances
+        columns["uid"][rows] = np.arange(count) + _new_uids(count)
+        self._names.extend(names)
+        self._views.extend([None] * count)
+        self._size += count
+        self.version += 1
+        return rows.start
+
+    def adopt(self, component):
+        """Rattache `component` (venant d'un autre stockage) à ce stockage ; sa ligne est
+        recopiée avec celles des autres composants en attente"""
+        self._pending[id(component)] = component
+        self.version += 1
+
+    def contains(self, component):
+        return component._store is self or id(component) in self._pending
+
+    def _flush(self):
+        """Recopie en bloc les lignes des composants en attente"""
+        pending = list(self._pending.values())
+        self._pending = {}
+        rows = [(component._store, component._index) for component in pending]
+        start, count = self._size, len(rows)
+        self._reserve(count)
+        block = slice(start, start + count)
+        for field, column in self._columns.items():
+            if field in ("node1", "node2"):
+                column[block] = [self.node_id(store.node_of(store.get(field, i))) for store, i in rows]
+            else:
+                column[block] = [store.get(field, i) for store, i in rows]
+        for k, (component, (store, i)) in enumerate(zip(pending, rows)):
+            self._names.append(store.name_of(i))
+            extras = store.extras.get(i)
+            if extras:
+                self._extras[start + k] = dict(extras)
+            object.__setattr__(component, "_store", self)
+            object.__setattr__(component, "_index", start + k)
+        self._views.extend(pending)
+        self._size += count
+
+    def components(self):
+        return tuple(self.view(i) for i in range(self.size))
+
+    def delete(self, rows):
+        """Retire les lignes `rows` : chaque composant retiré retrouve un stockage d'une
+        ligne (valeurs, nœuds, nom et attributs rares conservés)"""
+        size = self.size
+        removed = np.zeros(size, dtype=bool)
+        removed[np.asarray(rows, dtype=np.intp)] = True
+        for i in np.flatnonzero(removed):
+            component = self.view(i)
+            row = RowStore(self.kind[i], self.value[i], self._names[i], component)
+            for field, _ in FIELDS:
+                if field in ("node1", "node2"):
+                    row.set(field, 0, self.node_of(self.get(field, i)))
+                elif field != "kind":
+                    row.set(field, 0, self.get(field, i).item())
+            if self._extras.get(i):
+                row.extras_of(0).update(self._extras[i])
+            object.__setattr__(component, "_store", row)
+            object.__setattr__(component, "_index", 0)
+
+        keep = np.flatnonzero(~removed)
+        for column in self._columns.values():
+            column[:len(keep)] = column[keep]
+        self._names = [self._names[i] for i in keep]
+        self._views = [self._views[i] for i in keep]
+        for k, component in enumerate(self._views):
+            if component is not None:
+                object.__setattr__(component, "_index", k)
+        position = np.full(size, -1, dtype=np.intp)
+        position[keep] = np.arange(len(keep))
+        self._extras = {int(position[i]): extras for i, extras in self._extras.items()
+                        if position[i] >= 0}
+        self._size = len(keep)
+        self.version += 1
+
+    def permute(self, order):
+        """Réordonne les lignes : la nouvelle ligne k est l'ancienne ligne order[k]"""
+        size = self.size
+        for column in self._columns.values():
+            column[:size] = column[:size][order]
+        self._names = [self._names[i] for i in order]
+        self._views = [self._views[i] for i in order]
+        for k, component in enumerate(self._views):
+            if component is not None:
+                object.__setattr__(component, "_index", k)
+        position = np.empty(size, dtype=np.intp)
+        position[order] = np.arange(size)
+        self._extras = {int(position[i]): extras for i, extras in self._extras.items()}
+        self.version += 1
+
+    def priorities(self, nodes):
+        """Priorités des nœuds `nodes` : priorité propre plus 100 par source connectée"""
+        ids = np.array([self.node_id(node) for node in nodes], dtype=np.intp)
+        base = np.array([node._priority for node in nodes], dtype=np.intp)
+        return base + 100 * self.source_counts()[ids]
+
+    def sources(self):
+        """Lignes des sources de tension (recalculées seulement si la topologie change)"""
+        size = self.size
+        if self._sources[0] != self.version:
+            self._sources = (self.version, np.flatnonzero(self.kind[:size] == "V"))
+        return self._sources[1]
+
+    def ideal_sources(self):
+        """Sources de tension idéales (résistance interne nulle), parmi sources()"""
+        return self.value[self.sources()] == 0
@@ -0,0 +1,150 @@
+import numpy as np
+
+from .cache import LRUCache
+from .circuit import Circuit
+from .compiled import CompiledCircuit
+from .solver import SPARSE_THRESHOLD, DenseFactor, SparseFactor, use_sparse
+
+
+class Subcircuit(Circuit):
+    """Définition réutilisable d'un bloc passif (R, C, L, interrupteurs) vu par ses ports.
+
+    Le bloc se construit comme un circuit (add_node, add_component, from_netlist) ; `ports`
+    nomme ses nœuds d'accès, les autres nœuds sont internes. Circuit.add_subcircuit en place
+    des instances : à chaque fréquence, les nœuds internes sont éliminés une seule fois par
+    réduction de Kron (complément de Schur) en une matrice d'admittance des ports (P, P),
+    conservée en cache et ajoutée au système du circuit parent pour chaque instance."""
+
+    def __init__(self, ports=()):
+        super().__init__()
+        self.ports = [self.add_node(name) for name in ports]
+        self._port_compiled = None
+        self._model = None  # PortModel de l'état actuel (matrices des ports par fréquence)
+
+    def set_ports(self, names):
+        """Désigne les ports parmi les nœuds existants (après from_netlist par exemple)"""
+        nodes = {node.name: node for node in self.nodes}
+        missing = [name for name in names if name not in nodes]
+        if missing:
+            raise ValueError(f"Nœud(s) introuvable(s) dans le sous-circuit: {', '.join(missing)}")
+        self.ports = [nodes[name] for name in names]
+
+    def compile_ports(self):
+        """Topologie figée du bloc, le premier port servant de référence"""
+        if len(self.ports) < 2:
+            raise ValueError("Un sous-circuit doit avoir au moins deux ports")
+        store = self.store
+        signature = self._signature() + (tuple(id(port) for port in self.ports),)
+        if self._port_compiled is not None and self._port_compiled.signature == signature:
+            return self._port_compiled
+        kinds = store.kind[:len(store)]
+        if np.any(kinds == "V"):
+            raise ValueError("Un sous-circuit ne peut contenir que des composants passifs")
+        members = set(map(id, self.nodes))
+        for component in self.components:
+            if not all(id(node) in members for node in component.nodes):
+                raise ValueError(f"Le composant {component.name} n'est pas correctement connecté.")
+        self._port_compiled = CompiledCircuit(self, self.ports[0], signature, self.factor_cache_size)
+        return self._port_compiled
+
+    def state(self):
+        """Topologie et valeurs du bloc, sous-circuits imbriqués compris"""
+        compiled = self.compile_ports()
+        return (self.nodes.version, self.store.version, compiled.values().tobytes(),
+                compiled.definition_state())
+
+    def port_model(self):
+        """Modèle des ports pour l'état actuel du bloc, reconstruit quand il change"""
+        state = self.state()
+        if self._model is None or self._model.state() != state:
+            compiled = self.compile_ports()
+            rows = compiled.row_of_node
+            ports = np.array([rows[compiled.index[port]] for port in self.ports[1:]], dtype=np.intp)
+            self._model = PortModel(compiled, compiled.values(), ports, state, self.solver,
+                                    self.sparse_threshold, self.ordering)
+        return self._model
+
+    def port_admittance(self, freq):
+        """Matrice d'admittance des ports (..., P, P) pour `freq` (scalaire ou tableau).
+        Ses lignes et colonnes sont de somme nulle, comme le motif ±y d'un dipôle."""
+        return self.port_model().port_admittance(freq)
+
+
+class PortModel:
+    """Topologie compilée et valeurs figées d'un Subcircuit, avec ses matrices des ports
+    par fréquence. C'est aussi la copie du bloc envoyée à un autre processus."""
+
+    def __init__(self, compiled, values, ports, state, solver="auto", threshold=SPARSE_THRESHOLD,
+                 ordering="amd", cache_size=64):
+        self.compiled = compiled
+        self.values = values
+        self.ports = ports  # Lignes des ports, sauf le premier (référence)
+        self._state = state
+        self.solver = solver
+        self.sparse_threshold = threshold
+        self.ordering = ordering
+        self.cache = LRUCache(cache_size)
+
+    def state(self):
+        return self._state
+
+    def port_model(self):
+        return self
+
+    def port_admittance(self, freq):
+        """Matrice d'admittance des ports (..., P, P) pour `freq` (scalaire ou tableau)"""
+        freq = np.asarray(freq, dtype=float)
+        unique, inverse = np.unique(freq.ravel(), return_inverse=True)
+        P = len(self.ports) + 1
+        blocks = np.empty((len(unique), P, P), dtype=complex)
+        for k, f in enumerate(unique):
+            block = self.cache.get(float(f))
+            if block is None:
+                block = self._kron(self.compiled.admittances(f, self.values))
+                self.cache.put(float(f), block)
+            blocks[k] = block
+        return blocks[inverse].reshape(freq.shape + (P, P))
+
+    def _kron(self, y):
+        """Réduction de Kron : Y_pp - Y_pi Y_ii⁻¹ Y_ip sur la matrice mise à la masse au
+        premier port, puis ligne et colonne de ce port rétablies (sommes nulles)"""
+        compiled, ports = self.compiled, self.ports
+        internal = np.setdiff1d(np.arange(compiled.size), ports)
+        if use_sparse(compiled.size, self.solver, self.sparse_threshold):
+            Y = compiled.sparse_matrix(y).tocsr()
+            Ypp = Y[ports][:, ports].toarray()
+            Ypi = Y[ports][:, internal].toarray()
+            Yip = Y[internal][:, ports].toarray()
+            Yii = Y[internal][:, internal].tocsc()
+            factor = SparseFactor(Yii, self.ordering) if len(internal) else None
+        else:
+            Y = compiled.matrix(y)
+            Ypp = Y[np.ix_(ports, ports)]
+            Ypi = Y[np.ix_(ports, internal)]
+            Yip = Y[np.ix_(internal, ports)]
+            factor = DenseFactor(Y[np.ix_(internal, internal)]) if len(internal) else None
+        grounded = Ypp - Ypi @ factor.solve(Yip.astype(complex)) if factor is not None else Ypp
+
+        P = len(ports) + 1
+        block = np.empty((P, P), dtype=complex)
+        block[1:, 1:] = grounded
+        block[0, 1:] = -grounded.sum(axis=0)
+        block[1:, 0] = -grounded.sum(axis=1)
+        block[0, 0] = grounded.sum()
+        return block
+
+
+class SubcircuitInstance:
+    """Instance d'un Subcircuit dans un circuit : ses ports sont reliés à `nodes`"""
+
+    def __init__(self, definition, nodes, name=None):
+        if len(nodes) != len(definition.ports):
+            raise ValueError(f"{len(nodes)} nœud(s) pour {len(definition.ports)} port(s)")
+        self.definition = definition
+        self.nodes = list(nodes)
+        self.name = name if name else f"X_{id(self)}"
+
+    def __str__(self):
+        ports = ", ".join(f"{port.name}={node.name}"
+                          for port, node in zip(self.definition.ports, self.nodes))
+        return f"{self.name}: sous-circuit ({ports})"
@@ -0,0 +1,32 @@
+import numpy as np
+
+
+class SuperpositionResult:
+    """Résultat d'une analyse par superposition : un jeu de phaseurs par fréquence.
+
+    `freqs` contient les fréquences distinctes des sources (0 pour le continu) et
+    `voltages[g, i]` la tension du nœud d'indice i (voir `index`) due aux seules
+    sources de fréquence `freqs[g]`."""
+
+    def __init__(self, freqs, voltages, index):
+        self.freqs = freqs
+        self.voltages = voltages
+        self.index = index
+
+    def phasors(self, from_node, to_node):
+        """Phaseurs de la tension entre deux nœuds, un par fréquence"""
+        return self.voltages[:, self.index[to_node]] - self.voltages[:, self.index[from_node]]
+
+    def waveform(self, from_node, to_node, t):
+        """Reconstruction temporelle : somme des composantes continues et des
+        sinusoïdes amplitude * sin(ωt + phase) de chaque fréquence"""
+        t = np.asarray(t, dtype=float)
+        V = self.phasors(from_node, to_node)
+        w = 2 * np.pi * self.freqs
+        terms = (V[:, None] * np.exp(1j * w[:, None] * t.ravel()[None, :])).imag
+        dc = self.freqs == 0
+        terms[dc] = V[dc].real[:, None]
+        return terms.sum(axis=0).reshape(t.shape)
+
+    def __str__(self):
+        return f"Superposition: {len(self.freqs)} fréquence(s) {self.freqs.tolist()} Hz"
@@ -0,0 +1,34 @@
+import numpy as np
+
+
+class ParameterSweep:
+    """Résultat étiqueté d'un balayage de paramètre.
+
+    `data[i, j, p]` est le phaseur de la sonde p pour la valeur `values[i]` du composant
+    balayé et la fréquence `freqs[j]` ; `dims` et `coords` nomment les axes."""
+
+    dims = ("value", "freq", "probe")
+
+    def __init__(self, component, values, freqs, probes, data):
+        self.component = component
+        self.values = values
+        self.freqs = freqs
+        self.probes = probes
+        self.data = data
+
+    @property
+    def coords(self):
+        return {"value": self.values, "freq": self.freqs, "probe": self.probes}
+
+    def sel(self, value=None, freq=None, probe=None):
+        """Extrait le sous-tableau le plus proche des coordonnées données"""
+        index = []
+        for coord, target in zip((self.values, self.freqs), (value, freq)):
+            index.append(slice(None) if target is None else int(np.argmin(np.abs(coord - target))))
+        index.append(slice(None) if probe is None else probe)
+        return self.data[tuple(index)]
+
+    def __str__(self):
+        name = getattr(self.component, "name", self.component)
+        return (f"Balayage de {name}: {len(self.values)} valeur(s) x {len(self.freqs)} fréquence(s)"
+                f" x {len(self.probes)} sonde(s)")
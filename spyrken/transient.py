@@ -0,0 +1,155 @@
+import numpy as np
+from .solver import SingularMatrixError, factorize
+
+METHODS = ("trapezoidal", "backward_euler")
+
+
+def companion_admittances(compiled, values, dt, method):
+    """Admittances du système discrétisé : résistances et sources inchangées,
+    condensateurs et bobines remplacés par leur conductance équivalente"""
+    order = 2 if method == "trapezoidal" else 1
+    kinds = compiled.kinds
+    y = compiled.admittances(0, values).real
+    with np.errstate(divide="ignore"):
+        y = np.where(kinds == "C", order * values / dt, y)
+        y = np.where(kinds == "L", dt / (order * values), y)
+    return y
+
+
+def initial_admittances(compiled, values):
+    """Admittances du point de départ au repos : condensateurs déchargés (courts-circuits)
+    et bobines sans courant (circuits ouverts)"""
+    kinds = compiled.kinds
+    y = compiled.admittances(0, values).real
+    y = np.where(kinds == "C", 1e12, y)
+    return np.where(kinds == "L", 1e-12, y)
+
+
+def _cached_factor(circuit, compiled, key, y, check=True):
+    """Factorisation du système constant, conservée tant que le pas, les valeurs et
+    l'état des interrupteurs ne changent pas. Avec `check`, lève SingularMatrixError si un
+    pivot est nul ou négligeable : l'intégration ne poursuit pas sur une matrice singulière."""
+    key = key + (circuit.solver, circuit.sparse_threshold, circuit.ordering)
+    factor = compiled.cache.get(key)
+    if factor is None:
+        factor = factorize(compiled, y, circuit.solver, circuit.sparse_threshold, circuit.ordering,
+                           check)
+        compiled.cache.put(key, factor)
+    return factor
+
+
+def _switched(compiled, y, states):
+    """Admittances `y` avec les interrupteurs dans l'état `states`"""
+    y = y.copy()
+    y[compiled.switches] = _resistive_admittances(compiled.switch_values(states))
+    return y
+
+
+def _resistive_admittances(r):
+    """Admittances de résistances (limitées à 1e12 pour une résistance nulle)"""
+    with np.errstate(divide="ignore"):
+        return np.where(np.abs(r) < 1e-12, 1e12, 1 / r)
+
+
+def run_transient(circuit, compiled, t_stop, dt, method, to_idx, from_idx, chunk):
+    """Intègre le circuit de t=0 à t_stop par pas de dt à partir du repos.
+    Retourne un générateur de blocs (t, sondes) d'au plus `chunk` pas. Les factorisations
+    de départ sont vérifiées dès l'appel (SingularMatrixError) ; celles d'un nouvel état
+    des interrupteurs le sont pendant l'itération."""
+    N = compiled.size
+    steps = int(round(t_stop / dt))
+    values = compiled.values()
+    sources = [compiled.component(i) for i in compiled.sources]
+    row_of_node = compiled.row_of_node
+    offsets = compiled.offset_matrix() if len(compiled.offset_nodes) else None
+
+    cap = np.flatnonzero(compiled.kinds == "C")
+    ind = np.flatnonzero(compiled.kinds == "L")
+    c1, c2 = compiled.node1[cap], compiled.node2[cap]
+    l1, l2 = compiled.node1[ind], compiled.node2[ind]
+
+    y = companion_admittances(compiled, values, dt, method)
+    gc, gl = y[cap], y[ind]
+
+    # Une factorisation par état des interrupteurs, conservée dans le cache LRU du circuit,
+    # avec la décomposition du second membre sur les sources (qui dépend des admittances)
+    switches = [compiled.component(i) for i in compiled.switches]
+    fixed = values.copy()
+    fixed[compiled.switches] = 0
+    fixed = fixed.tobytes()
+
+    def factor_for(states):
+        key = ("transient", method, dt, fixed, tuple(bool(s) for s in states))
+        ys = _switched(compiled, y, states)
+        return _cached_factor(circuit, compiled, key, ys), compiled.source_rhs_map(ys)
+
+    def voltages(x, E):
+        """Tensions de tous les nœuds, décalages des supernœuds compris"""
+        V = np.append(x, 0.0)[row_of_node]
+        return V if offsets is None else V + offsets @ E
+
+    # Point de départ : condensateurs déchargés, bobines sans courant
+    states = np.array([switch.state_at(0.0) for switch in switches], dtype=bool)
+    y0 = _switched(compiled, initial_admittances(compiled, values), states)
+    E0 = np.array([source.voltage_at(0.0) for source in sources], dtype=float)
+    # Les admittances bornées du repos (1e12, 1e-12) rendent cette matrice très mal
+    # conditionnée sans fausser la solution : seul un résultat non fini est refusé
+    factor0 = _cached_factor(circuit, compiled, ("initial", fixed, tuple(states.tolist())), y0,
+                             check=False)
+    factor, source_map = factor_for(states)
+    V = voltages(factor0.solve(compiled.rhs(y0, E0)), E0)
+    if not np.all(np.isfinite(V)):
+        raise SingularMatrixError("point de départ indéterminé")
+    vc = V[c1] - V[c2]
+    ic = y0[cap] * vc
+    vl = V[l1] - V[l2]
+    il = np.zeros(len(ind))
+
+    # Injections : sources puis courants d'historique des condensateurs et bobines
+    history = np.concatenate([row_of_node[c1], row_of_node[c2], row_of_node[l1], row_of_node[l2]])
+    bounds = np.cumsum([0, len(cap), len(cap), len(ind), len(ind)])
+    c1_part, c2_part, l1_part, l2_part = [slice(lo, hi) for lo, hi in zip(bounds[:-1], bounds[1:])]
+    hist_weights = np.empty(len(history))
+
+    trapezoidal = method == "trapezoidal"
+    chunk = chunk or steps + 1
+
+    # Boucle d'intégration, exécutée au fil de l'itération
+    def integrate(states, factor, source_map, V, vc, ic, vl, il):
+        src_rows, src_positions, src_weight = source_map
+        for start in range(0, steps + 1, chunk):
+            t = np.arange(start, min(start + chunk, steps + 1)) * dt
+            E = np.array([source.voltage_at(t) for source in sources], dtype=float).reshape(len(sources), len(t)).T
+            out = np.empty((len(t), len(to_idx)))
+
+            # Instants où l'état des interrupteurs change
+            switch_states = np.array([switch.state_at(t) for switch in switches], dtype=bool).reshape(len(switches), len(t)).T
+            toggles = np.zeros(len(t), dtype=bool)
+            if len(switches):
+                toggles[1:] = np.any(switch_states[1:] != switch_states[:-1], axis=1)
+                toggles[0] = np.any(switch_states[0] != states)
+                states = switch_states[-1]
+
+            for j in range(len(t)):
+                if toggles[j]:
+                    factor, (src_rows, src_positions, src_weight) = factor_for(switch_states[j])
+                if start + j > 0:
+                    Jc = gc * vc + ic if trapezoidal else gc * vc
+                    Jl = il + gl * vl if trapezoidal else il
+                    hist_weights[c1_part] = Jc
+                    hist_weights[c2_part] = -Jc
+                    hist_weights[l1_part] = -Jl
+                    hist_weights[l2_part] = Jl
+                    b = (np.bincount(src_rows, src_weight * E[j, src_positions], minlength=N + 1)
+                         + np.bincount(history, hist_weights, minlength=N + 1))
+                    V = voltages(factor.solve(b[:N]), E[j])
+
+                    vc = V[c1] - V[c2]
+                    ic = gc * vc - Jc
+                    vl = V[l1] - V[l2]
+                    il = gl * vl + Jl
+                out[j] = V[to_idx] - V[from_idx]
+
+            yield t, out
+
+    return integrate(states, factor, source_map, V, vc, ic, vl, il)